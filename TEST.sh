@@ -24,11 +24,19 @@ fi
 [[ -n "${SERP_API_KEY:-}" ]]   && echo "[INFO] SERP_API_KEY detected."   || echo "[WARNING] SERP_API_KEY not set."
 
 # Run main CLI help check
-if python src/main.py --help; then
+if python -m src.main --help; then
   echo "[INFO] CLI responded successfully."
 else
   echo "[WARNING] CLI exited with a non-zero status."
 fi
 
+# Guard startup time: heavy dependencies must stay lazily imported
+if python -m benchmarks.bench_import_time --check; then
+  echo "[INFO] Import-time budget met."
+else
+  echo "[ERROR] Import-time budget exceeded (see benchmarks/import_budget.json)."
+  exit 1
+fi
+
 echo "[INFO] Smoke test completed."
 
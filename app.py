@@ -1,14 +1,15 @@
-from flask import Flask, request, render_template, jsonify, send_from_directory
+from flask import Flask, render_template, send_from_directory
 from flask_cors import CORS  # Add this import
 from dotenv import load_dotenv
 import os
 from pathlib import Path
-import google.generativeai as genai
-from src.agent.GeminiPatentAgent import GeminiPatentAgent
 
 # Load environment variables
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 
+# Imported after .env is loaded: the job queue and coalescer are configured from the environment
+from src.ui.analysis_api import register_analysis_api, start_services
+
 # Initialize Flask app with CORS
 app = Flask(__name__, template_folder="docs")
 CORS(app)  # Enable CORS for all routes
@@ -20,10 +21,8 @@ try:
 except KeyError as e:
     raise EnvironmentError(f"Missing required environment variable: {e}")
 
-# Configure Gemini
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel("gemini-2.5-pro")
-agent = GeminiPatentAgent(model=model, serpapi_api_key=SERP_API_KEY)
+# Job queue, /analyze, /jobs, /analyze/stream and /metrics (see src/ui/analysis_api.py)
+register_analysis_api(app)
 
 @app.route("/")
 def index():
@@ -33,33 +32,12 @@ def index():
 def serve_static_from_docs(filename):
     return send_from_directory("docs", filename)
 
-@app.route("/analyze", methods=["POST", "OPTIONS"])  # Add OPTIONS method
-def analyze():
-    if request.method == "OPTIONS":
-        # Handle CORS preflight
-        response = jsonify({"status": "preflight"})
-        response.headers.add("Access-Control-Allow-Origin", "*")
-        response.headers.add("Access-Control-Allow-Headers", "*")
-        response.headers.add("Access-Control-Allow-Methods", "*")
-        return response
-    
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "No JSON data received"}), 400
-        
-    claim = data.get("claim", "").strip()
-    if not claim:
-        return jsonify({"error": "Missing claim text"}), 400
-
-    try:
-        result = agent.run(user_input=claim)
-        return jsonify({"response": result})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
 if __name__ == '__main__':
     # Set debug mode to development - utilize CLAIMFORGE_ENV=development or similar for dev/workflows
     import os
     is_dev = os.environ.get("CLAIMFORGE_ENV", "development") == "development"
-    app.run(debug=is_dev)
+    # With the reloader, the parent process only watches files; the serving child runs the jobs
+    if not is_dev or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_services()
+    app.run(host=os.environ.get("FLASK_RUN_HOST", "127.0.0.1"), debug=is_dev)
 
@@ -0,0 +1,43 @@
+"""
+Micro-benchmark for the per-request overhead of building and compiling the patent graph.
+
+Compares the old hot path (build_patent_graph() + compile() on every run) with the
+cached get_compiled_graph(). Run from the repository root:
+
+    python -m benchmarks.bench_graph_compile --iterations 200
+"""
+import argparse
+import json
+import time
+
+from src.agent.graph.patent_graph import build_patent_graph, get_compiled_graph
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    get_compiled_graph(use_async=True)  # warm the cache
+
+    rebuild = _time_per_call(lambda: build_patent_graph(use_async=True).compile(), args.iterations)
+    cached = _time_per_call(lambda: get_compiled_graph(use_async=True), args.iterations)
+
+    results = {
+        "iterations": args.iterations,
+        "rebuild_ms_per_request": rebuild * 1000,
+        "cached_ms_per_request": cached * 1000,
+        "saved_ms_per_request": (rebuild - cached) * 1000,
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Import-time profile of the entry points, with a regression guard.
+
+Each target is imported in a fresh interpreter under `python -X importtime`. The report
+shows the total import time and the heaviest third-party packages pulled in, attributed
+to the first-party module that imported them. Run from the repository root:
+
+    python -m benchmarks.bench_import_time            # report
+    python -m benchmarks.bench_import_time --check    # exit 1 if a budget is exceeded
+
+Budgets live in benchmarks/import_budget.json: per target, a maximum import time and a
+list of heavy packages that must not be imported at startup (they should load lazily on
+first use). The package list is the reliable guard; the time limit is deliberately loose
+because timings vary between machines.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(REPO_ROOT, "benchmarks", "import_budget.json")
+
+FIRST_PARTY = ("src", "app", "agent", "data", "benchmarks")
+
+
+def _is_first_party(module: str) -> bool:
+    return module.split(".")[0] in FIRST_PARTY
+
+
+def profile_import(target: str, runs=3) -> dict:
+    """
+    Imports `target` in fresh interpreters and returns the fastest run's profile.
+    Returns:
+        dict: total_ms, modules (set of imported module names) and packages
+        ({top-level package: cumulative ms, importer}).
+    """
+    env = dict(os.environ)
+    # The web apps refuse to import without API keys; no API is called at import time
+    env.setdefault("GOOGLE_API_KEY", "import-profile")
+    env.setdefault("SERP_API_KEY", "import-profile")
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {target} failed:\n{proc.stderr[-2000:]}")
+        profile = _parse(proc.stderr)
+        if best is None or profile["total_ms"] < best["total_ms"]:
+            best = profile
+    return best
+
+
+def _parse(output: str) -> dict:
+    # Lines look like "import time:   self_us |  cumulative_us | <indent>module"; children come
+    # before their parent, and nesting is shown by two spaces of indentation per level.
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((depth, name.strip(), int(cumulative)))
+
+    modules = {name for _, name, _ in entries}
+    total_us = sum(cumulative for depth, _, cumulative in entries if depth == 0)
+
+    # Walk in reverse (parents first) to find which module imported each third-party package
+    packages = defaultdict(lambda: {"ms": 0.0, "imported_by": None})
+    stack = []
+    for depth, name, cumulative in reversed(entries):
+        del stack[depth:]
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        if _is_first_party(name) or (parent is not None and not _is_first_party(parent)):
+            continue
+        package = packages[name.split(".")[0]]
+        package["ms"] += cumulative / 1000
+        package["imported_by"] = package["imported_by"] or parent or "<target>"
+    return {"total_ms": total_us / 1000, "modules": modules, "packages": dict(packages)}
+
+
+def check(target: str, profile: dict, budget: dict) -> list:
+    """Returns the budget violations of one target."""
+    problems = []
+    if profile["total_ms"] > budget.get("max_ms", float("inf")):
+        problems.append(f"{target}: import took {profile['total_ms']:.0f} ms, budget {budget['max_ms']} ms")
+    for package in budget.get("forbidden", []):
+        if package in profile["modules"]:
+            importer = profile["packages"].get(package.split(".")[0], {}).get("imported_by", "?")
+            problems.append(f"{target}: imports {package} at startup (via {importer})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the import time of the entry points.")
+    parser.add_argument("targets", nargs="*", help="Modules to profile (default: every target in the budget file).")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per target; the fastest is reported.")
+    parser.add_argument("--top", type=int, default=8, help="Number of heaviest packages to show per target.")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a budget is exceeded.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    with open(BUDGET_PATH, encoding="utf-8") as f:
+        budgets = json.load(f)
+    targets = args.targets or list(budgets)
+
+    results, problems = {}, []
+    for target in targets:
+        profile = profile_import(target, runs=args.runs)
+        heaviest = sorted(profile["packages"].items(), key=lambda item: -item[1]["ms"])[:args.top]
+        print(f"{target}: {profile['total_ms']:.0f} ms")
+        for package, info in heaviest:
+            print(f"   {info['ms']:8.1f} ms  {package:<24} (imported by {info['imported_by']})")
+        results[target] = {"total_ms": profile["total_ms"], "packages": dict(heaviest)}
+        problems += check(target, profile, budgets.get(target, {}))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    for problem in problems:
+        print(f"BUDGET EXCEEDED: {problem}")
+    if args.check and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
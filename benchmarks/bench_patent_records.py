@@ -0,0 +1,111 @@
+"""
+Memory and conversion cost of the patent result representations.
+
+Compares, for result sets of increasing size built from the same PatentsView records:
+    dicts    The dict format (five keys, including a Google Patents URL string per patent).
+    records  A list of slotted PatentRecords (url derived on access).
+    batch    A columnar PatentBatch (one list per text field, dates packed in an array).
+
+Title and abstract strings are shared with the source records in every representation, so the
+figures are the per-representation overhead. Conversion timings cover building each form from
+the API records and converting records and batches to and from the dict format.
+Run from the repository root:
+
+    python -m benchmarks.bench_patent_records --sizes 100 1000 10000
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks.patentsview_stub import make_patents
+from src.agent.tools.patent_record import PatentBatch, PatentRecord, patent_url
+
+
+def _as_dicts(results: list) -> list:
+    # The dict format as patent_search built it before PatentRecord
+    return [
+        {
+            "title": r.get("patent_title"),
+            "patent_number": r.get("patent_number"),
+            "publication_date": r.get("patent_date"),
+            "abstract": r.get("patent_abstract"),
+            "url": patent_url(r.get("patent_number")),
+        }
+        for r in results
+    ]
+
+
+REPRESENTATIONS = {
+    "dicts": _as_dicts,
+    "records": lambda results: [PatentRecord.from_api(r) for r in results],
+    "batch": PatentBatch.from_api,
+}
+
+
+def _retained_bytes(build, results) -> int:
+    """Bytes still allocated after build(results) returns, i.e. the size of the built object."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        built = build(results)
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del built
+    return size
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def bench_size(size: int, repeat: int) -> dict:
+    results = make_patents("benchmark query", size)
+    dicts, records, batch = (build(results) for build in REPRESENTATIONS.values())
+    memory = {name: _retained_bytes(build, results) for name, build in REPRESENTATIONS.items()}
+    return {
+        "size": size,
+        "bytes": memory,
+        "bytes_per_patent": {name: round(b / size, 1) for name, b in memory.items()},
+        "ms": {
+            "build_dicts": _best_ms(lambda: _as_dicts(results), repeat),
+            "build_records": _best_ms(lambda: [PatentRecord.from_api(r) for r in results], repeat),
+            "build_batch": _best_ms(lambda: PatentBatch.from_api(results), repeat),
+            "records_to_dicts": _best_ms(lambda: [r.to_dict() for r in records], repeat),
+            "dicts_to_records": _best_ms(lambda: [PatentRecord.from_dict(d) for d in dicts], repeat),
+            "batch_to_dicts": _best_ms(batch.to_dicts, repeat),
+            "dicts_to_batch": _best_ms(lambda: PatentBatch.from_dicts(dicts), repeat),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory use of patent result representations.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Result set sizes.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (the best is reported).")
+    parser.add_argument("--output", help="Also write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = [bench_size(size, args.repeat) for size in args.sizes]
+    print(f"{'patents':>8} {'dicts':>10} {'records':>10} {'batch':>10}   (bytes per patent)", file=sys.stderr)
+    for r in results:
+        per = r["bytes_per_patent"]
+        print(f"{r['size']:>8} {per['dicts']:>10} {per['records']:>10} {per['batch']:>10}", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
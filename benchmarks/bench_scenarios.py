@@ -0,0 +1,241 @@
+"""
+Offline end-to-end benchmarks: a FakeGeminiModel plus a local PatentsView stub, no API keys needed.
+
+Scenarios:
+    single      Latency of sequential GeminiPatentAgent.run() calls.
+    throughput  Jobs per second through POST /analyze and the background job queue.
+    memory      Python heap and RSS growth over many sequential runs.
+
+Run from the repository root; results are printed and written as JSON so they can be
+compared across commits:
+
+    python -m benchmarks.bench_scenarios --scenario all --runs 20 --llm-latency 0.05
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.fake_model import FakeGeminiModel
+from benchmarks.patentsview_stub import PatentsViewStub
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+def _claim(i: int) -> str:
+    return f"Claim 1: A computer-implemented system for managing contract risk, variant {i}."
+
+
+def _stats(values: list) -> dict:
+    values = np.asarray(values, dtype=float)
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _configure_env(stub: PatentsViewStub, args):
+    """Points every external dependency at the local stand-ins and disables on-disk caches."""
+    os.environ.update({
+        "PATENTSVIEW_API_KEY": "bench",
+        "PATENTSVIEW_BASE_URL": stub.base_url,
+        "PATENTSVIEW_RPM": "0",
+        "PATENT_SEARCH_BACKEND": "patentsview",
+        "PATENT_RERANK_STORE": "",
+        "JOB_WORKER_MODE": "thread",
+        "JOB_WORKERS": str(args.workers),
+        "JOB_QUEUE_SIZE": str(max(args.runs, 32)),
+    })
+    if args.with_caches:
+        # The fake model sets no temperature; cache its responses as a sampled model's would be
+        os.environ["LLM_CACHE_NONDETERMINISTIC"] = "1"
+    else:
+        os.environ["LLM_CACHE"] = "0"
+        os.environ["PATENT_SEARCH_CACHE"] = "0"
+        os.environ["CHECKPOINTS"] = "0"
+    # The web app refuses to start without these; the fake model never uses them
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    os.environ.setdefault("SERP_API_KEY", "bench")
+
+
+def _fake_model(args) -> FakeGeminiModel:
+    return FakeGeminiModel(latency=args.llm_latency, output_chars=args.output_chars)
+
+
+def scenario_single(args) -> dict:
+    from src.agent.GeminiPatentAgent import GeminiPatentAgent
+
+    agent = GeminiPatentAgent(_fake_model(args))
+    agent.run(_claim(-1))  # warm-up: graph compile, connection pools
+    latencies = []
+    for i in range(args.runs):
+        start = time.perf_counter()
+        agent.run(_claim(i))
+        latencies.append(time.perf_counter() - start)
+    return {"latency_seconds": _stats(latencies)}
+
+
+def _load_web_app():
+    spec = importlib.util.spec_from_file_location("claimforge_web_app", os.path.join(REPO_ROOT, "src", "ui", "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def scenario_throughput(args) -> dict:
+    from src.agent.GeminiPatentAgent import GeminiPatentAgent
+    from src.ui import analysis_api
+
+    web = _load_web_app()
+    analysis_api.set_agent(GeminiPatentAgent(_fake_model(args)))
+    client = web.app.test_client()
+
+    start = time.perf_counter()
+    job_ids = []
+    for i in range(args.runs):
+        response = client.post("/analyze", json={"claim": _claim(i)})
+        if response.status_code != 202:
+            raise RuntimeError(f"/analyze returned {response.status_code}: {response.get_data(as_text=True)}")
+        job_ids.append(response.get_json()["job_id"])
+    submitted = time.perf_counter() - start
+
+    finished, failed, latencies = set(), 0, []
+    while len(finished) < len(job_ids):
+        for job_id in job_ids:
+            if job_id in finished:
+                continue
+            job = client.get(f"/jobs/{job_id}").get_json()
+            if job["status"] in ("succeeded", "failed"):
+                finished.add(job_id)
+                failed += job["status"] == "failed"
+                latencies.append(time.perf_counter() - start)
+        time.sleep(0.02)
+    wall = time.perf_counter() - start
+
+    # Leave the app database as it was
+    analysis_api.job_queue.stop()
+    from src.data import db_client
+    with db_client.session_scope() as db:
+        db.query(db_client.Job).filter(db_client.Job.id.in_(job_ids)).delete(synchronize_session=False)
+
+    return {
+        "jobs": len(job_ids),
+        "failed": failed,
+        "workers": args.workers,
+        "submit_seconds": submitted,
+        "wall_seconds": wall,
+        "jobs_per_second": len(job_ids) / wall,
+        "completion_seconds": _stats(latencies),
+    }
+
+
+def scenario_memory(args) -> dict:
+    from src.agent.GeminiPatentAgent import GeminiPatentAgent
+
+    agent = GeminiPatentAgent(_fake_model(args))
+    agent.run(_claim(-1))
+    tracemalloc.start()
+    samples = []
+    for i in range(args.runs):
+        agent.run(_claim(i))
+        current, peak = tracemalloc.get_traced_memory()
+        samples.append({"run": i + 1, "heap_kb": current / 1024, "peak_kb": peak / 1024, "max_rss_mb": _rss_mb()})
+    tracemalloc.stop()
+
+    runs = np.array([s["run"] for s in samples], dtype=float)
+    heap = np.array([s["heap_kb"] for s in samples])
+    slope = float(np.polyfit(runs, heap, 1)[0]) if len(samples) > 1 else 0.0
+    return {
+        "runs": args.runs,
+        "heap_growth_kb_per_run": slope,
+        "heap_kb_first": float(heap[0]),
+        "heap_kb_last": float(heap[-1]),
+        "max_rss_mb": samples[-1]["max_rss_mb"],
+        "samples": samples,
+    }
+
+
+SCENARIOS = {
+    "single": scenario_single,
+    "throughput": scenario_throughput,
+    "memory": scenario_memory,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline end-to-end benchmarks.")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--runs", type=int, default=20, help="Analyses per scenario.")
+    parser.add_argument("--workers", type=int, default=4, help="Job queue workers (throughput).")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake model call.")
+    parser.add_argument("--output-chars", type=int, default=2000, help="Length of the fake report.")
+    parser.add_argument("--search-delay", type=float, default=0.05, help="Seconds per stub search request.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub requests failing with 503.")
+    parser.add_argument("--with-caches", action="store_true", help="Keep the LLM and search caches enabled.")
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/<time>-<commit>.json).")
+    parser.add_argument("--verbose", action="store_true", help="Show the agent's own output.")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "scenarios": {},
+    }
+
+    with PatentsViewStub(delay=args.search_delay, error_rate=args.error_rate) as stub:
+        _configure_env(stub, args)
+        for name in names:
+            print(f"--- Benchmark: {name} ---", file=sys.stderr)
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                results["scenarios"][name] = SCENARIOS[name](args)
+        results["stub"] = {"requests": stub.requests, "errors": stub.errors}
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{results['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({name: {k: v for k, v in r.items() if k != "samples"} for name, r in results["scenarios"].items()}, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Deterministic stand-in for genai.GenerativeModel, for offline benchmarks.
+
+The same prompt always produces the same text. Planning prompts get a ReAct action
+(a search first, then final_report once the prompt holds a search observation) and the
+final report prompt gets `output_chars` of filler text. Latency is simulated with sleep
+(time.sleep / asyncio.sleep), so concurrent calls overlap like real network calls.
+"""
+import asyncio
+import hashlib
+import time
+
+_WORDS = (
+    "system method apparatus claim prior art device module signal data processor network "
+    "invention embodiment configured receive transmit compute store display user control"
+).split()
+
+
+class FakeResponse:
+    """Mimics the parts of a Gemini response the agent reads."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Implements generate_content / generate_content_async with configurable latency and size.
+    """
+
+    def __init__(self, latency=0.05, output_chars=2000, chunk_chars=200, model_name="fake-gemini"):
+        """
+        Args:
+            latency (float): Seconds each call takes (time to the last chunk when streaming).
+            output_chars (int): Length of the generated report text.
+            chunk_chars (int): Size of each streamed chunk.
+            model_name (str): Reported model name (part of the LLM cache key).
+        """
+        self.latency = latency
+        self.output_chars = output_chars
+        self.chunk_chars = chunk_chars
+        self.model_name = model_name
+        self.calls = 0
+
+    def _text(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        if "PRIOR ART PATENT SEARCH RESULTS" not in prompt:
+            if "returned:" in prompt:
+                return "Thought: The search results cover the key features.\nAction: final_report()"
+            terms = " ".join(_WORDS[b % len(_WORDS)] for b in digest[:4])
+            return f"Thought: I should search for prior art.\nAction: search(\"{terms}\")"
+
+        words, i = [], 0
+        length = 0
+        while length < self.output_chars:
+            word = _WORDS[digest[i % len(digest)] % len(_WORDS)]
+            words.append(word)
+            length += len(word) + 1
+            i += 1
+        return " ".join(words)[:self.output_chars]
+
+    def _chunks(self, text: str) -> list:
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or [""]
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        text = self._text(prompt)
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency)
+        return FakeResponse(text)
+
+    def _stream(self, text):
+        chunks = self._chunks(text)
+        for chunk in chunks:
+            time.sleep(self.latency / len(chunks))
+            yield FakeResponse(chunk)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        text = self._text(prompt)
+        if stream:
+            return self._astream(text)
+        await asyncio.sleep(self.latency)
+        return FakeResponse(text)
+
+    async def _astream(self, text):
+        chunks = self._chunks(text)
+        for chunk in chunks:
+            await asyncio.sleep(self.latency / len(chunks))
+            yield FakeResponse(chunk)
@@ -0,0 +1,166 @@
+"""
+Local stand-in for the PatentsView search API, for offline benchmarks.
+
+Serves GET /api/v1/patent with the same q/f/o query parameters and response shape as
+https://search.patentsview.org. Results are derived from the query text, so the same
+query always returns the same patents: `total_hits` of them, sorted by patent number and
+paged with the "size" and "after" options like the real API. Point the agent at it with
+PATENTSVIEW_BASE_URL=<stub.base_url>, or run it on its own:
+
+    python -m benchmarks.patentsview_stub --port 8765 --delay 0.1 --error-rate 0.05
+"""
+import argparse
+import functools
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_patents(query: str, count: int) -> list:
+    """Returns `count` deterministic patent records for a query."""
+    patents = []
+    for i in range(count):
+        digest = hashlib.sha256(f"{query}:{i}".encode("utf-8")).hexdigest()
+        number = str(5000000 + int(digest[:8], 16) % 4000000)
+        year = 1976 + int(digest[8:10], 16) % 45
+        patents.append({
+            "patent_number": number,
+            "patent_title": f"{query.title()[:60]} apparatus variant {i}",
+            "patent_date": f"{year}-{1 + int(digest[10:12], 16) % 12:02d}-{1 + int(digest[12:14], 16) % 28:02d}",
+            "patent_abstract": f"A {query} system in which {digest[:40]} is processed. " * 3,
+        })
+    return patents
+
+
+@functools.lru_cache(maxsize=32)
+def _sorted_patents(query: str, count: int) -> tuple:
+    # All hits of a query in patent number order, the order the stub pages through
+    unique = {p["patent_number"]: p for p in make_patents(query, count)}
+    return tuple(unique[number] for number in sorted(unique))
+
+
+class PatentsViewStub:
+    """
+    A threaded HTTP server imitating /api/v1/patent, started in a daemon thread.
+    Use as a context manager or call start()/stop().
+    """
+
+    def __init__(self, delay=0.05, error_rate=0.0, error_status=503, seed=0, host="127.0.0.1", port=0, total_hits=1000):
+        """
+        Args:
+            delay (float): Seconds each request takes before it is answered.
+            error_rate (float): Fraction of requests answered with error_status instead of results.
+            error_status (int): HTTP status of injected errors (503 is retried by the client).
+            seed (int): Seed for the error injection, so runs are reproducible.
+            port (int): Port to listen on; 0 picks a free port.
+            total_hits (int): Number of patents matching any query.
+        """
+        self.delay = delay
+        self.total_hits = total_hits
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return fail
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.rstrip("/") != "/api/v1/patent":
+                    self._send(404, {"error": True, "reason": "Not found"})
+                    return
+                time.sleep(stub.delay)
+                if stub._should_fail():
+                    self._send(stub.error_status, {"error": True, "reason": "Injected error"})
+                    return
+
+                params = parse_qs(url.query)
+                q = json.loads(params.get("q", ["{}"])[0])
+                options = json.loads(params.get("o", ["{}"])[0])
+                # A date-filtered search is {"_and": [{"_text_any": ...}, {"_lt": {"patent_date": ...}}]}
+                clauses = q.get("_and", [q])
+                text = next((next(iter(c["_text_any"].values()), "") for c in clauses if "_text_any" in c), "")
+                before = next((c["_lt"].get("patent_date") for c in clauses if "_lt" in c), None)
+                size = int(options.get("size") or options.get("per_page") or 3)
+                after = options.get("after")
+                hits = [p for p in _sorted_patents(text, stub.total_hits) if not before or p["patent_date"] < before]
+                patents = [p for p in hits if after is None or p["patent_number"] > after][:size]
+                self._send(200, {"error": False, "count": len(patents), "total_hits": len(hits), "patents": patents})
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="patentsview-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local PatentsView API stand-in.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--total-hits", type=int, default=1000)
+    args = parser.parse_args()
+
+    stub = PatentsViewStub(
+        delay=args.delay, error_rate=args.error_rate, error_status=args.error_status, port=args.port,
+        total_hits=args.total_hits,
+    )
+    print(f"PatentsView stub listening on {stub.base_url}")
+    stub.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
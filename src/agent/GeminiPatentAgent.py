@@ -2,9 +2,42 @@
 This module provides a LangGraph-based agent implementation.
 """
 
-from .graph.patent_graph import build_patent_graph
+import asyncio
+import os
+import queue
+import threading
+
+from .cache.llm_cache import CachingModel
+from .limits.rate_limiter import RateLimitedModel
+from .checkpoint.checkpoint_store import disclosure_hash, get_checkpoint_store
+from .graph.patent_graph import enough_patents, get_compiled_graph, next_node
 from .memory.memory import AgentMemory
 from .prompts.react_prompts import REACT_PLANNING_PROMPT
+from .nodes.events import emit_event
+from .tracing.tracer import run_context, span
+from .utils.dates import parse_priority_date
+
+_background_loop = None
+_background_loop_pid = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop():
+    """
+    Returns a process-wide event loop running in a daemon thread. Synchronous callers
+    (e.g. Flask worker threads) submit coroutines to it, so async connection pools
+    are shared across all of them instead of being rebuilt per call.
+    """
+    global _background_loop, _background_loop_pid
+    with _background_loop_lock:
+        # A forked worker process inherits the loop object but not its thread
+        if _background_loop is None or _background_loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="patent-agent-loop", daemon=True).start()
+            _background_loop = loop
+            _background_loop_pid = os.getpid()
+        return _background_loop
+
 
 class GeminiPatentAgent:
     """
@@ -16,39 +49,187 @@ class GeminiPatentAgent:
         Initializes the agent with the given LLM model.
         Args:
             model: An LLM model instance with a generate_content(prompt) method.
+                It is wrapped in a RateLimitedModel (shared Gemini budget) inside a
+                CachingModel, so repeated deterministic prompts (or all of them with
+                LLM_CACHE_NONDETERMINISTIC=1) are served from the LLM response cache
+                (disable with LLM_CACHE=0) without using any of the rate budget.
         """
-        self.model = model
+        self.model = model if isinstance(model, CachingModel) else CachingModel(RateLimitedModel(model))
 
-    def run(self, user_input: str, max_iterations=5):
+    def run(self, user_input: str, max_iterations=5, search_queries=None, details=False, refresh=False):
         """
         Runs the LangGraph-based patent agent workflow.
+        Thin synchronous wrapper around arun(), executed on a shared background event loop.
         Args:
             user_input (str): The invention disclosure or user query.
-            max_iterations (int): Maximum number of workflow steps.
+            max_iterations (int): Maximum number of planning (LLM) steps. The agent searches
+                until enough relevant patents are found (AGENT_ENOUGH_PATENTS) or the LLM
+                asks for the report, and writes the report with what it has at the limit.
+            search_queries (list): Optional query formulations (e.g. one per claim-1 feature)
+                to search concurrently instead of a single search.
+            details (bool): If True, return a dict with the 'report', the 'references' it
+                was written from (patent dicts, best first) and the 'queries' searched.
+            refresh (bool): If True, analyze from scratch: no checkpoint of an earlier run is
+                reused, and the searches and model calls bypass their caches.
         Returns:
             str: The final report or a message if not completed.
         """
-        memory = AgentMemory()
-        memory.add_entry(f"User Input: {user_input}")
+        future = asyncio.run_coroutine_threadsafe(
+            self.arun(
+                user_input, max_iterations=max_iterations, search_queries=search_queries, details=details, refresh=refresh,
+            ),
+            _get_background_loop(),
+        )
+        return future.result()
+
+    def stream(self, user_input: str, max_iterations=5, search_queries=None):
+        """
+        Runs the workflow and yields progress as it happens, for Server-Sent Events.
+        Yields:
+            tuple: (event, data) pairs: 'llm_done', 'search_done', 'report_started',
+            one 'report_chunk' per piece of streamed report text, 'report_done', and
+            finally 'done' with the full report (or 'error' if the run failed).
+        Closing the generator early (e.g. when the SSE client disconnects) cancels the run; its
+        checkpoints let a later analysis of the same disclosure continue from the last completed node.
+        """
+        events = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self.arun(
+                user_input,
+                max_iterations=max_iterations,
+                search_queries=search_queries,
+                on_event=lambda event, data: events.put((event, data)),
+            ),
+            _get_background_loop(),
+        )
+        future.add_done_callback(lambda _: events.put(None))
+
+        try:
+            while True:
+                item = events.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+
+        try:
+            yield "done", {"response": future.result()}
+        except Exception as e:
+            yield "error", {"error": str(e)}
+
+    async def arun(
+        self, user_input: str, max_iterations=5, search_queries=None, on_event=None, run_id=None, details=False, refresh=False,
+    ):
+        """
+        Runs the patent agent workflow as a coroutine, using async HTTP and the async
+        Gemini client, so many analyses can be in flight on one event loop.
+        Takes the same arguments and returns the same value as run().
+        Args:
+            on_event: Optional callback(event, data) receiving node progress events.
+                When set, the final report is generated with streaming and delivered
+                as 'report_chunk' events.
+            run_id (str): Correlation id attached to every tracing span of this run;
+                generated when not given. Also the key of the run's checkpoints: passing
+                the id of a failed run resumes it after its last completed node.
+        """
+        with run_context(run_id) as run_id, span("agent.run", user_input_chars=len(user_input)):
+            result_state = await self._arun(user_input, max_iterations, search_queries, on_event, run_id, refresh)
+        report = result_state.get("final_report") or "Agent did not produce a final report."
+        if not details:
+            return report
+        return {
+            "report": report,
+            "references": result_state.get("search_results") or [],
+            "queries": result_state.get("queries") or [],
+        }
+
+    async def _arun(self, user_input, max_iterations, search_queries, on_event, run_id, refresh=False):
+        """Runs (or resumes) the graph and returns its final state."""
+        memory = AgentMemory.from_env()
 
         state = {
             "user_input": user_input,
-            "model": self.model,
             "prompt": REACT_PLANNING_PROMPT.format(user_input=user_input),
-            "memory": memory,
-            "tool_input": user_input  # For demo, pass user_input as tool_input
+            "search_queries": search_queries,
+            # Searches only return patents dated before the disclosure's "Priority Date:" line
+            "priority_date": parse_priority_date(user_input),
+            "max_iterations": max_iterations,
+            "iteration": 0,
+            # The disclosure is already part of "prompt"; the history only holds what happens after it
+            "history": [],
+        }
+        # Per-run objects travel in the config so the compiled graph stays shared and stateless.
+        # Each planning step is followed by at most one search, plus the entry and the report.
+        config = {
+            "configurable": {
+                "model": self.model.uncached() if refresh else self.model,
+                "memory": memory,
+                "on_event": on_event,
+                "refresh": refresh,
+            },
+            "recursion_limit": 2 * max_iterations + 5,
         }
 
-        graph = build_patent_graph()
-        compiled_graph = graph.compile()
+        store = get_checkpoint_store()
+        if store is not None:
+            digest = disclosure_hash(user_input, search_queries)
+            config["configurable"].update(checkpoints=store, run_id=run_id, disclosure_hash=digest)
+            # A refresh still checkpoints its own progress, but never starts from an earlier run's
+            if not refresh:
+                resumed, finished = await asyncio.to_thread(self._resume_state, store, run_id, digest, config)
+                if finished:
+                    return resumed
+                state = resumed or state
+        # The memory holds the history sent with each planning prompt; a resumed run rebuilds it
+        for entry in state.get("history", []):
+            memory.add_entry(entry)
+
+        compiled_graph = get_compiled_graph(use_async=True)
         print("--- Running LangGraph Workflow ---")
-        print(f"   - Initial State: {state}")
-        result_state = compiled_graph.invoke(state) 
-        final_report = result_state.get("final_report")
-        if final_report:
-            return final_report
+        try:
+            result_state = await compiled_graph.ainvoke(state, config=config)
+        except Exception:
+            if store is not None:
+                await asyncio.to_thread(store.set_status, run_id, "failed")
+            raise
+        if store is not None:
+            await asyncio.to_thread(store.set_status, run_id, "completed")
+        return result_state
+
+    @staticmethod
+    def _resume_state(store, run_id, digest, config):
+        """
+        Looks for a checkpoint to continue from: this run's own (when resuming a failed run by
+        its id) or the latest run of the same disclosure.
+        Returns:
+            tuple: (state, finished). finished is True if the run already completed; state is
+            then its final state. Otherwise state is the state to start the graph with (its
+            'resume_at' naming the first node to run), or None to start from scratch.
+        """
+        checkpoint = store.load(run_id)
+        if checkpoint is None or checkpoint.disclosure_hash != digest:
+            checkpoint = store.find_latest(digest)
+        if checkpoint is None:
+            return None, False
+
+        state = checkpoint.state
+        if checkpoint.run_id == run_id and checkpoint.status == "completed" and state.get("final_report"):
+            return state, True
+        found = state.get("search_results") or []
+        if checkpoint.run_id != run_id and found and (checkpoint.status == "completed" or len(found) >= enough_patents()):
+            # The disclosure was searched recently: only the report is generated again. A run that
+            # failed before finding enough patents is continued instead, like this run's own.
+            resume_at = "final_report"
         else:
-            return "Agent did not produce a final report."
+            resume_at = next_node(checkpoint.last_node, state)
+            if resume_at is None:
+                return (state, True) if state.get("final_report") else (None, False)
+        state["resume_at"] = resume_at
+        state.pop("final_report", None)
+        emit_event(config, "resumed", {"run_id": checkpoint.run_id, "resume_at": resume_at})
+        return state, False
 
     def main(): 
         # Read the invention disclosure from a file
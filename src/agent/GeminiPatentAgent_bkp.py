@@ -9,6 +9,8 @@ from . import tools
 from . import prompts
 from . import memory
 from .prompts import REACT_PLANNING_PROMPT
+from .cache.llm_cache import CachingModel
+from .limits.rate_limiter import RateLimitedModel
 
 
 import tenacity
@@ -24,8 +26,10 @@ class GeminiPatentAgent:
         Args:
             model: An instance of a generative AI model (like Google's Gemini).
         """
-        self.model = model
-        self.memory = memory.AgentMemory()
+        # Cache responses so identical prompts are not sent to Gemini twice, and
+        # pace uncached calls through the shared Gemini rate limiter
+        self.model = CachingModel(RateLimitedModel(model))
+        self.memory = memory.AgentMemory.from_env()
         self.available_tools = {
             "search": tools.patent_search,
             "final_report": tools.final_report
@@ -79,6 +83,7 @@ class GeminiPatentAgent:
             print(f"\n--- Iteration {i+1} ---")
 
             current_prompt = f"{planning_prompt}\n{self.memory.get_history()}"
+            print(f"    - Prompt size: ~{self.memory.token_count()} history tokens")
 
             try:
                 llm_response = self._call_gemini(current_prompt)
@@ -0,0 +1,254 @@
+# src/cache/llm_cache.py
+import asyncio
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+import threading
+
+from .tiered_cache import TieredCache
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "llm_cache.db"
+)
+
+
+class CachedResponse:
+    """Minimal stand-in for a model response served from the cache; exposes .text."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _config_to_dict(config):
+    """Normalizes a generation config (dict, GenerationConfig, dataclass) into a dict for hashing."""
+    if config is None:
+        return None
+    if isinstance(config, dict):
+        return config
+    if dataclasses.is_dataclass(config):
+        return dataclasses.asdict(config)
+    if hasattr(type(config), "to_dict"):
+        return type(config).to_dict(config)
+    return repr(config)
+
+
+def supports_streaming(method) -> bool:
+    """Returns True if a generate_content(-_async) method accepts the stream argument."""
+    try:
+        params = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == "stream" or p.kind == p.VAR_KEYWORD for p in params)
+
+
+def _chunk_text(chunk) -> str:
+    # Gemini raises ValueError for responses without text parts (e.g. blocked by safety filters)
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+
+class CachingModel:
+    """
+    Wraps any object exposing generate_content(prompt) with a content-addressed response cache.
+
+    Responses are keyed on a SHA-256 of (model name, prompt, generation config), so re-analyzing
+    the same disclosure reuses earlier LLM output instead of paying for it again. Streaming calls
+    are cached once the stream has been fully consumed and are replayed as a single chunk.
+    Other attributes are delegated to the wrapped model.
+    """
+
+    def __init__(self, model, cache=None, cache_nondeterministic=None):
+        """
+        Args:
+            model: The model to wrap, e.g. genai.GenerativeModel or the DummyModel in main.py.
+            cache: A TieredCache-like object with get/set; defaults to get_llm_cache().
+                Caching is disabled if no cache is available.
+            cache_nondeterministic (bool): If False, only calls with a temperature of 0 (passed
+                with the call or set in the model's generation config) are cached, so sampled
+                responses stay fresh on every call. Defaults to the LLM_CACHE_NONDETERMINISTIC
+                environment variable (off).
+        """
+        self.model = model
+        self.cache = cache if cache is not None else get_llm_cache()
+        if cache_nondeterministic is None:
+            cache_nondeterministic = os.environ.get("LLM_CACHE_NONDETERMINISTIC", "0") == "1"
+        self.cache_nondeterministic = cache_nondeterministic
+
+    def __getattr__(self, name):
+        # Guard against recursion while unpickling, before 'model' is set
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.model, "model_name", type(self.model).__name__)
+
+    def make_key(self, prompt, generation_config=None) -> str:
+        """Builds the content-addressed cache key for a call."""
+        if generation_config is None:
+            generation_config = getattr(self.model, "_generation_config", None)
+        raw = json.dumps(
+            [self.model_name, prompt, _config_to_dict(generation_config)],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def uncached(self):
+        """Returns a view of this model whose calls all bypass the cache (use_cache=False)."""
+        return _UncachedModel(self)
+
+    def _cacheable(self, generation_config, use_cache: bool) -> bool:
+        if self.cache is None or not use_cache:
+            return False
+        if self.cache_nondeterministic:
+            return True
+        if generation_config is None:
+            generation_config = getattr(self.model, "_generation_config", None)
+        config = _config_to_dict(generation_config) or {}
+        return isinstance(config, dict) and config.get("temperature") == 0
+
+    def generate_content(self, prompt, *, generation_config=None, stream=False, use_cache=True, **kwargs):
+        """
+        Same as the wrapped model's generate_content, served from the cache when possible.
+        Args:
+            use_cache (bool): Set to False to bypass the cache for this call.
+        """
+        if stream and not supports_streaming(self.model.generate_content):
+            # The wrapped model cannot stream: return its full response as a single chunk
+            return [self.generate_content(prompt, generation_config=generation_config, use_cache=use_cache, **kwargs)]
+        if generation_config is not None:
+            kwargs["generation_config"] = generation_config
+        if stream:
+            kwargs["stream"] = True
+        if not self._cacheable(generation_config, use_cache):
+            return self.model.generate_content(prompt, **kwargs)
+
+        key = self.make_key(prompt, generation_config)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return [CachedResponse(cached)] if stream else CachedResponse(cached)
+
+        response = self.model.generate_content(prompt, **kwargs)
+        if stream:
+            return self._cache_stream(key, response)
+        text = _chunk_text(response)
+        if text:
+            self.cache.set(key, text)
+        return response
+
+    async def generate_content_async(self, prompt, *, generation_config=None, stream=False, use_cache=True, **kwargs):
+        """
+        Async version of generate_content(). If the wrapped model has no async method, the sync
+        one runs in a worker thread and a requested stream is replayed as a single chunk.
+        """
+        if not hasattr(self.model, "generate_content_async"):
+            response = await asyncio.to_thread(
+                self.generate_content, prompt, generation_config=generation_config, use_cache=use_cache, **kwargs
+            )
+            return self._replay_async(_chunk_text(response)) if stream else response
+        if generation_config is not None:
+            kwargs["generation_config"] = generation_config
+        if stream:
+            kwargs["stream"] = True
+        if not self._cacheable(generation_config, use_cache):
+            return await self.model.generate_content_async(prompt, **kwargs)
+
+        # Cache reads and writes hit SQLite; keep them off the event loop
+        key = self.make_key(prompt, generation_config)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            if stream:
+                return self._replay_async(cached)
+            return CachedResponse(cached)
+
+        response = await self.model.generate_content_async(prompt, **kwargs)
+        if stream:
+            return self._cache_async_stream(key, response)
+        text = _chunk_text(response)
+        if text:
+            await asyncio.to_thread(self.cache.set, key, text)
+        return response
+
+    def _cache_stream(self, key, chunks):
+        parts = []
+        for chunk in chunks:
+            parts.append(_chunk_text(chunk))
+            yield chunk
+        # Only a fully consumed stream is cached
+        if any(parts):
+            self.cache.set(key, "".join(parts))
+
+    async def _cache_async_stream(self, key, chunks):
+        parts = []
+        async for chunk in chunks:
+            parts.append(_chunk_text(chunk))
+            yield chunk
+        if any(parts):
+            await asyncio.to_thread(self.cache.set, key, "".join(parts))
+
+    @staticmethod
+    async def _replay_async(text):
+        yield CachedResponse(text)
+
+
+class _UncachedModel:
+    """A CachingModel that neither reads nor writes its cache, e.g. for a forced re-analysis."""
+
+    def __init__(self, model: CachingModel):
+        self.model = model
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def generate_content(self, prompt, **kwargs):
+        return self.model.generate_content(prompt, use_cache=False, **kwargs)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return await self.model.generate_content_async(prompt, use_cache=False, **kwargs)
+
+
+_UNSET = object()
+_llm_cache = _UNSET
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Returns the process-wide LLM response cache, creating it from environment variables on first use.
+    Set LLM_CACHE=0 to disable caching; in that case None is returned.
+    Other settings: LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MEMORY_SIZE and LLM_CACHE_DISK_SIZE.
+    Only deterministic (temperature 0) calls are cached unless LLM_CACHE_NONDETERMINISTIC=1,
+    which also replays sampled responses (see CachingModel).
+    """
+    global _llm_cache
+    if os.environ.get("LLM_CACHE", "1") == "0":
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is _UNSET:
+            _llm_cache = TieredCache(
+                "llm_responses",
+                db_path=os.environ.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+                ttl=float(os.environ.get("LLM_CACHE_TTL", 7 * 86400)),
+                max_memory_entries=int(os.environ.get("LLM_CACHE_MEMORY_SIZE", 128)),
+                max_disk_entries=int(os.environ.get("LLM_CACHE_DISK_SIZE", 5000)),
+            )
+        return _llm_cache
+
+
+def set_llm_cache(cache):
+    """
+    Replaces the process-wide LLM response cache.
+    Args:
+        cache: A TieredCache-like object with get(key) and set(key, value), or None to disable caching.
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        _llm_cache = cache
@@ -0,0 +1,94 @@
+# src/cache/search_cache.py
+import hashlib
+import json
+import os
+import threading
+
+from .tiered_cache import TieredCache
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "search_cache.db"
+)
+
+
+class SearchCache:
+    """
+    Caches patent search results keyed on (cleaned query, field list, max_results).
+    Any object exposing the same get/set/stats methods can be plugged in instead
+    via set_search_cache().
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, ttl=86400, max_memory_entries=256, max_disk_entries=10000):
+        """
+        Args:
+            db_path (str): SQLite file for the disk tier, or None for memory only.
+            ttl (float): Time-to-live of a cached result in seconds.
+            max_memory_entries (int): Size of the in-process LRU tier.
+            max_disk_entries (int): Size of the on-disk tier.
+        """
+        self._cache = TieredCache(
+            "patent_search",
+            db_path=db_path,
+            ttl=ttl,
+            max_memory_entries=max_memory_entries,
+            max_disk_entries=max_disk_entries,
+        )
+
+    @staticmethod
+    def make_key(cleaned_query: str, fields: list, max_results: int, priority_date=None) -> str:
+        """Builds a stable cache key from the search parameters."""
+        params = [cleaned_query.lower(), list(fields), max_results]
+        if priority_date:
+            # Date-filtered searches get their own entries; undated keys stay as they were
+            params.append(priority_date)
+        raw = json.dumps(params, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        return self._cache.get(key)
+
+    def set(self, key: str, results: list):
+        self._cache.set(key, results)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+_UNSET = object()
+_search_cache = _UNSET
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """
+    Returns the process-wide search cache, creating it from environment variables on first use.
+    Set PATENT_SEARCH_CACHE=0 to disable caching; in that case None is returned.
+    Other settings: PATENT_SEARCH_CACHE_PATH, PATENT_SEARCH_CACHE_TTL,
+    PATENT_SEARCH_CACHE_MEMORY_SIZE and PATENT_SEARCH_CACHE_DISK_SIZE.
+    """
+    global _search_cache
+    if os.environ.get("PATENT_SEARCH_CACHE", "1") == "0":
+        return None
+    with _search_cache_lock:
+        if _search_cache is _UNSET:
+            _search_cache = SearchCache(
+                db_path=os.environ.get("PATENT_SEARCH_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+                ttl=float(os.environ.get("PATENT_SEARCH_CACHE_TTL", 86400)),
+                max_memory_entries=int(os.environ.get("PATENT_SEARCH_CACHE_MEMORY_SIZE", 256)),
+                max_disk_entries=int(os.environ.get("PATENT_SEARCH_CACHE_DISK_SIZE", 10000)),
+            )
+        return _search_cache
+
+
+def set_search_cache(cache):
+    """
+    Replaces the process-wide search cache.
+    Args:
+        cache: An object with get(key), set(key, value) and stats() methods, or None to disable caching.
+    """
+    global _search_cache
+    with _search_cache_lock:
+        _search_cache = cache
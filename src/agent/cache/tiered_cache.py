@@ -0,0 +1,176 @@
+# src/cache/tiered_cache.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from ..tracing.metrics import record_cache_lookup
+
+
+class TieredCache:
+    """
+    A two-tier key/value cache: an in-process LRU dict in front of an on-disk SQLite table.
+    Entries expire after `ttl` seconds and each tier is bounded by a maximum entry count,
+    evicting the least recently used entries first. Values must be JSON-serializable.
+    """
+
+    def __init__(self, name: str, db_path=None, ttl=3600, max_memory_entries=256, max_disk_entries=10000):
+        """
+        Args:
+            name (str): Name of the cache, used as the SQLite table name.
+            db_path (str): Path of the SQLite file. If None, only the memory tier is used.
+            ttl (float): Time-to-live of an entry in seconds.
+            max_memory_entries (int): Maximum number of entries held in memory.
+            max_disk_entries (int): Maximum number of entries held on disk.
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Invalid cache name: {name!r}")
+        self.name = name
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.RLock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.name} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{self.name}_last_access ON {self.name} (last_access)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str):
+        """
+        Looks up a key, first in memory and then on disk.
+        Returns:
+            The cached value, or None on a miss or an expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    record_cache_lookup(self.name, True)
+                    return value
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    f"SELECT value, expires_at FROM {self.name} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value_json, expires_at = row
+                    if expires_at > now:
+                        self._conn.execute(
+                            f"UPDATE {self.name} SET last_access = ? WHERE key = ?", (now, key)
+                        )
+                        self._conn.commit()
+                        value = json.loads(value_json)
+                        # Promote the disk hit into the memory tier
+                        self._put_memory(key, expires_at, value)
+                        self._stats["disk_hits"] += 1
+                        record_cache_lookup(self.name, True)
+                        return value
+                    self._conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self._stats["misses"] += 1
+            record_cache_lookup(self.name, False)
+            return None
+
+    def set(self, key: str, value, ttl=None):
+        """
+        Stores a value in both tiers.
+        Args:
+            key (str): The cache key.
+            value: A JSON-serializable value.
+            ttl (float): Optional per-entry TTL overriding the cache default.
+        """
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._put_memory(key, expires_at, value)
+            if self._conn is not None:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.name} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires_at, now),
+                )
+                self._evict_disk(now)
+                self._conn.commit()
+            self._stats["sets"] += 1
+
+    def invalidate(self, key: str):
+        """Removes a single key from both tiers."""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+                self._conn.commit()
+
+    def clear(self):
+        """Removes every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.name}")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and current tier sizes.
+        Returns:
+            dict: Counters including 'hits', 'misses' and 'hit_rate'.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+            return stats
+
+    def close(self):
+        """Closes the underlying SQLite connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _put_memory(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self, now):
+        # Drop expired rows first, then the least recently used rows above the size limit
+        self._conn.execute(f"DELETE FROM {self.name} WHERE expires_at <= ?", (now,))
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.name} WHERE key IN "
+                f"(SELECT key FROM {self.name} ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._stats["evictions"] += overflow
+            logging.debug(f"Evicted {overflow} entries from the '{self.name}' disk cache.")
@@ -0,0 +1,211 @@
+# src/checkpoint/checkpoint_store.py
+"""
+Per-node checkpoints of the patent graph state, so a failed run does not pay for its
+planning LLM call and PatentsView search again.
+
+After every graph node the run's state is written to a SQLite table keyed by run id, together
+with the name of the node that just completed and a hash of the disclosure. A run that fails
+(e.g. the final Gemini call errors out) can then be resumed from the node after the last
+completed one, and a re-analysis of an unchanged disclosure reuses the stored search results
+and goes straight to report generation.
+
+Configuration: CHECKPOINTS=0 disables checkpointing, CHECKPOINT_PATH sets the SQLite file and
+CHECKPOINT_TTL the age in seconds after which a checkpoint is neither reused nor kept.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "checkpoints.db"
+)
+
+
+def disclosure_hash(user_input: str, search_queries=None) -> str:
+    """
+    Hashes the inputs that determine a run's search, ignoring whitespace differences.
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    payload = json.dumps(
+        {"user_input": " ".join((user_input or "").split()), "search_queries": search_queries or None},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Checkpoint:
+    """The latest saved state of a run."""
+    run_id: str
+    disclosure_hash: str
+    last_node: str
+    status: str  # 'running', 'failed' or 'completed'
+    state: dict
+    updated_at: float
+
+
+class CheckpointStore:
+    """
+    SQLite store holding the latest graph state of each run. Values must be JSON-serializable;
+    anything that is not (e.g. a model object someone put in the state) is stored as its repr.
+    """
+
+    def __init__(self, db_path, ttl=7 * 86400):
+        """
+        Args:
+            db_path (str): Path of the SQLite file.
+            ttl (float): Age in seconds after which checkpoints are ignored and deleted.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "run_id TEXT PRIMARY KEY, disclosure_hash TEXT NOT NULL, last_node TEXT NOT NULL, "
+            "status TEXT NOT NULL, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_checkpoints_hash ON checkpoints (disclosure_hash, updated_at)"
+        )
+        self._conn.commit()
+        self.prune()
+
+    def save(self, run_id: str, node: str, state: dict, disclosure_hash: str):
+        """Records that `node` completed, replacing the run's previous checkpoint."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(run_id, disclosure_hash, last_node, status, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, disclosure_hash, node, "running", json.dumps(state, default=repr), time.time()),
+            )
+            self._conn.commit()
+
+    def set_status(self, run_id: str, status: str):
+        """Marks a checkpointed run as 'completed' or 'failed'. A no-op for unknown runs."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE checkpoints SET status = ?, updated_at = ? WHERE run_id = ?",
+                (status, time.time(), run_id),
+            )
+            self._conn.commit()
+
+    def load(self, run_id: str):
+        """
+        Returns:
+            Checkpoint: The run's latest checkpoint, or None if there is none (or it expired).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, disclosure_hash, last_node, status, state, updated_at "
+                "FROM checkpoints WHERE run_id = ? AND updated_at > ?",
+                (run_id, time.time() - self.ttl),
+            ).fetchone()
+        return self._to_checkpoint(row)
+
+    def find_latest(self, disclosure_hash: str):
+        """
+        Finds the most useful earlier run of the same disclosure: the most recent one that
+        completed a search, or failing that the most recent one that completed any node.
+        Returns:
+            Checkpoint: The checkpoint, or None if the disclosure has not been analyzed recently.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, disclosure_hash, last_node, status, state, updated_at "
+                "FROM checkpoints WHERE disclosure_hash = ? AND updated_at > ? "
+                "ORDER BY last_node = 'llm', updated_at DESC LIMIT 1",
+                (disclosure_hash, time.time() - self.ttl),
+            ).fetchone()
+        return self._to_checkpoint(row)
+
+    def prune(self):
+        """Deletes checkpoints older than the TTL."""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM checkpoints WHERE updated_at <= ?", (time.time() - self.ttl,)
+            ).rowcount
+            self._conn.commit()
+        if deleted:
+            logging.debug(f"Pruned {deleted} expired checkpoints.")
+
+    def close(self):
+        """Closes the underlying SQLite connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _to_checkpoint(row):
+        if row is None:
+            return None
+        run_id, digest, last_node, status, state_json, updated_at = row
+        return Checkpoint(run_id, digest, last_node, status, json.loads(state_json), updated_at)
+
+
+def checkpointed_node(name: str, node):
+    """
+    Wraps a sync or async LangGraph node function so its resulting state is checkpointed once it
+    completes. Expects 'checkpoints' (a CheckpointStore), 'run_id' and 'disclosure_hash' in
+    config["configurable"]; without a store the node runs unchanged.
+    """
+    def _save(result, state, config):
+        configurable = config["configurable"]
+        store = configurable.get("checkpoints")
+        if store is not None:
+            store.save(configurable["run_id"], name, state if result is None else result, configurable["disclosure_hash"])
+
+    if asyncio.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def _async_node(state, config):
+            result = await node(state, config)
+            # SQLite writes are blocking; keep them off the event loop
+            await asyncio.to_thread(_save, result, state, config)
+            return result
+        return _async_node
+
+    @functools.wraps(node)
+    def _node(state, config):
+        result = node(state, config)
+        _save(result, state, config)
+        return result
+    return _node
+
+
+_checkpoint_store = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store():
+    """
+    Returns the process-wide checkpoint store, creating it from environment variables on first use.
+    Set CHECKPOINTS=0 to disable checkpointing; in that case None is returned.
+    Other settings: CHECKPOINT_PATH and CHECKPOINT_TTL.
+    """
+    global _checkpoint_store
+    if os.environ.get("CHECKPOINTS", "1") == "0":
+        return None
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            _checkpoint_store = CheckpointStore(
+                os.environ.get("CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH),
+                ttl=float(os.environ.get("CHECKPOINT_TTL", 7 * 86400)),
+            )
+        return _checkpoint_store
+
+
+def set_checkpoint_store(store):
+    """Replaces the process-wide checkpoint store (e.g. with one on a temporary file)."""
+    global _checkpoint_store
+    with _checkpoint_store_lock:
+        _checkpoint_store = store
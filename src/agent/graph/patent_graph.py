@@ -1,17 +1,106 @@
-from langgraph.graph import StateGraph
-from ..nodes.llm_node import llm_node
-from ..nodes.search_node import search_node
-from ..nodes.final_report_node import final_report_node
+import os
+from functools import lru_cache
+
+from ..checkpoint.checkpoint_store import checkpointed_node
+from ..tracing.tracer import traced_node
+
+DEFAULT_MAX_ITERATIONS = 5
+DEFAULT_ENOUGH_PATENTS = 3
+
+# Name of LangGraph's END node, repeated here so routing does not import langgraph
+END = "__end__"
+
+def enough_patents() -> int:
+    """Number of unique relevant patents after which the agent stops searching (AGENT_ENOUGH_PATENTS, default 3)."""
+    return int(os.environ.get("AGENT_ENOUGH_PATENTS", DEFAULT_ENOUGH_PATENTS))
+
+def _out_of_iterations(state):
+    return state.get("iteration", 0) >= state.get("max_iterations", DEFAULT_MAX_ITERATIONS)
+
+def _finish(state):
+    # Write the report if anything was found; a run without prior art ends without one
+    return "final_report" if state.get("search_results") else END
+
+def route_entry(state):
+    """
+    Starts at 'resume_at' when resuming from a checkpoint. Otherwise caller-supplied
+    'search_queries' are searched right away, before the first planning step.
+    """
+    if state.get("resume_at"):
+        return state["resume_at"]
+    return "multi_search" if state.get("search_queries") else "llm"
+
+def route_after_llm(state):
+    """Follows the parsed action; a response without a usable action gets another planning step."""
+    action = state.get("action")
+    if action in ("search", "final_report"):
+        return action
+    return _finish(state) if _out_of_iterations(state) else "llm"
+
+def route_after_search(state):
+    """Reports once enough relevant patents are found or the iterations are used up, else plans again."""
+    if len(state.get("search_results") or []) >= enough_patents() or _out_of_iterations(state):
+        return _finish(state)
+    return "llm"
+
+def next_node(node, state):
+    """
+    Returns the node that runs after `node` for this state, or None if the run ends there.
+    Mirrors the edges below; used to resume a checkpointed run after its last completed node.
+    """
+    if node == "llm":
+        target = route_after_llm(state)
+    elif node in ("search", "multi_search"):
+        target = route_after_search(state)
+    else:
+        target = END
+    return None if target == END else target
+
+def _node(name, node):
+    # Every node runs in a tracing span (see tracing/tracer.py) and its result is checkpointed
+    # (see checkpoint/checkpoint_store.py)
+    return traced_node(name, checkpointed_node(name, node))
+
+def build_patent_graph(use_async=False):
+    """
+    Builds the patent workflow graph.
+    Args:
+        use_async (bool): If True, use the coroutine nodes; the compiled graph
+            must then be run with ainvoke().
+    """
+    # Imported here rather than at module level: LangGraph and the node dependencies
+    # (HTTP clients, NumPy) take about a second to import and are only needed once a
+    # graph is compiled, not when the agent module is loaded.
+    from langgraph.graph import StateGraph
+    from ..nodes.llm_node import llm_node, allm_node
+    from ..nodes.search_node import search_node, asearch_node
+    from ..nodes.multi_search_node import multi_search_node, amulti_search_node
+    from ..nodes.final_report_node import final_report_node, afinal_report_node
 
-def build_patent_graph():
     graph = StateGraph(dict)  # <-- Pass dict as the state schema
-    graph.add_node("llm", llm_node)
-    graph.add_node("search", search_node)
-    graph.add_node("final_report", final_report_node)
+    graph.add_node("llm", _node("llm", allm_node if use_async else llm_node))
+    graph.add_node("search", _node("search", asearch_node if use_async else search_node))
+    graph.add_node("multi_search", _node("multi_search", amulti_search_node if use_async else multi_search_node))
+    graph.add_node("final_report", _node("final_report", afinal_report_node if use_async else final_report_node))
+
+    # The ReAct loop: the LLM plans an action, searches feed their observations back into the
+    # next planning step, and the report is written once enough prior art has been found
+    # (or the LLM asks for it, or max_iterations planning steps have been used).
+    graph.add_conditional_edges("llm", route_after_llm, {"llm": "llm", "search": "search", "final_report": "final_report", END: END})
+    for search in ("search", "multi_search"):
+        graph.add_conditional_edges(search, route_after_search, {"llm": "llm", "final_report": "final_report", END: END})
+    graph.add_edge("final_report", END)
+
+    nodes = ["llm", "search", "multi_search", "final_report"]
+    graph.set_conditional_entry_point(route_entry, {name: name for name in nodes})
+    return graph
 
-    # Define the workflow: LLM -> Search -> Final Report
-    graph.add_edge("llm", "search")
-    graph.add_edge("search", "final_report")
 
-    graph.set_entry_point("llm")
-    return graph
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_compiled_graph(use_async=False):
+    """
+    Returns the compiled patent graph, building and validating it only once per process.
+    The compiled graph holds no per-run data (the model and memory are passed in the
+    invocation config), so it is safe to invoke from many threads or coroutines at once.
+    """
+    return build_patent_graph(use_async=use_async).compile()
@@ -0,0 +1,139 @@
+# src/limits/coalescing.py
+"""
+Single-flight request coalescing.
+
+Identical requests that arrive while one is already running (the same claim submitted from
+several browser tabs, or a UI retry after a timeout) wait for that run and share its result
+instead of starting their own. Results are kept for a short time afterwards, so repeats that
+arrive just after completion are served without a new run. Errors are shared with the waiting
+callers but never cached.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from ..tracing.metrics import COALESCED_REQUESTS
+
+
+def request_key(text: str) -> str:
+    """Hashes request text with whitespace normalized, so re-pasted claims share a key."""
+    return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """An in-flight call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestCoalescer:
+    """
+    Runs at most one call per key at a time, from any number of threads, and caches successful
+    results for `ttl` seconds. Keys are request texts, normalized and hashed by request_key().
+    """
+
+    def __init__(self, name: str, ttl=30.0, max_entries=256):
+        """
+        Args:
+            name (str): Name used in metrics, e.g. 'analyze'.
+            ttl (float): Seconds a finished result is served to identical requests; 0 disables the cache.
+            max_entries (int): Maximum number of cached results (least recently stored evicted first).
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call
+        self._results = OrderedDict()  # key -> (expires_at, result)
+        self._stats = {"executed": 0, "coalesced": 0, "cached": 0}
+
+    @classmethod
+    def from_env(cls, name: str):
+        """Creates a coalescer whose result TTL comes from COALESCE_TTL (default 30 seconds)."""
+        return cls(name, ttl=float(os.environ.get("COALESCE_TTL", 30)))
+
+    def do(self, text: str, fn):
+        """
+        Returns fn() for this request text, sharing the call with identical concurrent requests
+        and serving a recent result from the cache. Raises what the shared call raised.
+        """
+        key = request_key(text)
+        with self._lock:
+            result = self._cached(key)
+            if result is not None:
+                self._record("cached")
+                return result
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._record("executed" if leader else "coalesced")
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._store(key, call.result)
+            call.done.set()
+        return call.result
+
+    def cached(self, text: str):
+        """Returns the cached result for this request text, or None (counted as a cache hit)."""
+        key = request_key(text)
+        with self._lock:
+            result = self._cached(key)
+            if result is not None:
+                self._record("cached")
+            return result
+
+    def remember(self, text: str, result):
+        """Caches a result produced outside of do(), e.g. by a streamed run."""
+        with self._lock:
+            self._store(request_key(text), result)
+
+    def stats(self) -> dict:
+        """Returns the executed / coalesced / cached counters and the coalescing rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        requests = stats["executed"] + stats["coalesced"] + stats["cached"]
+        stats["coalesced_rate"] = (stats["coalesced"] + stats["cached"]) / requests if requests else 0.0
+        return stats
+
+    def _cached(self, key):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at > time.monotonic():
+            return result
+        del self._results[key]
+        return None
+
+    def _store(self, key, result):
+        if self.ttl <= 0 or result is None:
+            return
+        self._results[key] = (time.monotonic() + self.ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def _record(self, outcome):
+        self._stats[outcome] += 1
+        COALESCED_REQUESTS.labels(name=self.name, outcome=outcome).inc()
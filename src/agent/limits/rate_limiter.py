@@ -0,0 +1,302 @@
+# src/limits/rate_limiter.py
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from ..cache.llm_cache import supports_streaming
+from ..utils.tokens import estimate_tokens
+
+# Re-check interval for waiters blocked only by the in-flight limit
+_IN_FLIGHT_POLL_SECONDS = 0.05
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at `capacity` tokens per `period` seconds.
+    Not thread-safe on its own; RateLimiter guards it with its lock.
+    """
+
+    def __init__(self, capacity: float, period=60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now) -> float:
+        """Seconds until `amount` tokens are available (0 if they are available now)."""
+        self._refill(now)
+        # A single request larger than the whole bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Removes tokens; the balance may go negative, which delays later callers."""
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Process-wide budget for one external API: requests per minute, tokens per minute and
+    a maximum number of calls in flight. Callers over budget queue (sleep) instead of failing,
+    so concurrent workers are spread out rather than all hitting the quota and backing off
+    at once. Usable from threads (limit) and coroutines (alimit).
+    """
+
+    def __init__(self, name: str, requests_per_minute=None, tokens_per_minute=None, max_in_flight=None):
+        """
+        Args:
+            name (str): Name of the API, used in metrics.
+            requests_per_minute (float): Request budget, or None for unlimited.
+            tokens_per_minute (float): Token budget, or None for unlimited.
+            max_in_flight (int): Maximum concurrent calls, or None for unlimited.
+        """
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._waiting = 0
+        self._acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @classmethod
+    def from_env(cls, name: str, requests_per_minute=None, tokens_per_minute=None, max_in_flight=None):
+        """
+        Creates a limiter whose defaults can be overridden by <NAME>_RPM, <NAME>_TPM and
+        <NAME>_MAX_IN_FLIGHT environment variables (e.g. GEMINI_RPM). A value of 0 means unlimited.
+        """
+        prefix = name.upper()
+
+        def _env(suffix, default):
+            value = os.environ.get(f"{prefix}_{suffix}")
+            if value is None:
+                return default
+            return float(value) or None
+
+        max_in_flight = _env("MAX_IN_FLIGHT", max_in_flight)
+        return cls(
+            name,
+            requests_per_minute=_env("RPM", requests_per_minute),
+            tokens_per_minute=_env("TPM", tokens_per_minute),
+            max_in_flight=int(max_in_flight) if max_in_flight else None,
+        )
+
+    def _try_acquire(self, tokens: int) -> float:
+        # Must hold self._lock. Returns 0 if a slot was taken, otherwise the seconds to wait.
+        if self.max_in_flight is not None and self._in_flight >= self.max_in_flight:
+            return _IN_FLIGHT_POLL_SECONDS
+        now = time.monotonic()
+        wait = 0.0
+        if self._requests is not None:
+            wait = max(wait, self._requests.wait_time(1, now))
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        if self._requests is not None:
+            self._requests.consume(1)
+        if self._tokens is not None:
+            self._tokens.consume(tokens)
+        self._in_flight += 1
+        return 0.0
+
+    def _record_acquired(self, waited: float):
+        self._acquired += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+    def acquire(self, tokens=1):
+        """Blocks the calling thread until the call fits the budget, then takes a slot."""
+        start = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+            try:
+                while True:
+                    wait = self._try_acquire(tokens)
+                    if wait == 0:
+                        break
+                    self._released.wait(timeout=wait)
+            finally:
+                self._waiting -= 1
+            self._record_acquired(time.monotonic() - start)
+
+    async def acquire_async(self, tokens=1):
+        """Async version of acquire(); waits with asyncio.sleep so the event loop keeps running."""
+        start = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_acquire(tokens)
+                if wait == 0:
+                    break
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        with self._lock:
+            self._record_acquired(time.monotonic() - start)
+
+    def release(self):
+        """Frees the in-flight slot taken by acquire()."""
+        with self._lock:
+            self._in_flight -= 1
+            self._released.notify()
+
+    def record_tokens(self, tokens: int):
+        """Charges extra tokens (e.g. the response size, known only after the call) to the budget."""
+        if self._tokens is not None and tokens > 0:
+            with self._lock:
+                self._tokens.consume(tokens)
+
+    @contextmanager
+    def limit(self, tokens=1):
+        """Context manager holding a slot for the duration of a call."""
+        self.acquire(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def alimit(self, tokens=1):
+        """Async context manager holding a slot for the duration of a call."""
+        await self.acquire_async(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> dict:
+        """
+        Returns the current queue depth, in-flight count and wait-time statistics.
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "queue_depth": self._waiting,
+                "in_flight": self._in_flight,
+                "acquired_total": self._acquired,
+                "wait_seconds_total": self._total_wait,
+                "wait_seconds_max": self._max_wait,
+                "wait_seconds_avg": self._total_wait / self._acquired if self._acquired else 0.0,
+            }
+
+
+# Defaults per external API; PatentsView documents a limit of 45 requests per minute.
+_LIMITER_DEFAULTS = {
+    "gemini": {"max_in_flight": 8},
+    "patentsview": {"requests_per_minute": 45, "max_in_flight": 8},
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> RateLimiter:
+    """
+    Returns the process-wide limiter for an external API ('gemini' or 'patentsview'),
+    creating it from environment variables on first use.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = RateLimiter.from_env(name, **_LIMITER_DEFAULTS.get(name, {}))
+            _limiters[name] = limiter
+        return limiter
+
+
+def limiter_metrics() -> list:
+    """Returns metrics() for every limiter created so far."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.metrics() for limiter in limiters]
+
+
+def _response_tokens(response, use_usage=True) -> int:
+    # Streamed chunks report cumulative usage, so they are estimated from their text instead
+    usage = getattr(response, "usage_metadata", None) if use_usage else None
+    count = getattr(usage, "candidates_token_count", None)
+    if count:
+        return count
+    try:
+        return estimate_tokens(response.text)
+    except (AttributeError, ValueError):
+        return 0
+
+
+class RateLimitedModel:
+    """
+    Wraps any object exposing generate_content(prompt) so every call goes through the shared
+    'gemini' RateLimiter. The prompt's estimated tokens are charged up front and the response
+    tokens afterwards. Other attributes are delegated to the wrapped model.
+    """
+
+    def __init__(self, model, limiter=None):
+        """
+        Args:
+            model: The model to wrap.
+            limiter (RateLimiter): Defaults to get_limiter("gemini").
+        """
+        self.model = model
+        self.limiter = limiter or get_limiter("gemini")
+
+    def __getattr__(self, name):
+        # Guard against recursion while unpickling, before 'model' is set
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream and not supports_streaming(self.model.generate_content):
+            # The wrapped model cannot stream: return its full response as a single chunk
+            return [self.generate_content(prompt, **kwargs)]
+        if stream:
+            return self._limited_stream(prompt, kwargs)
+        with self.limiter.limit(estimate_tokens(prompt)):
+            response = self.model.generate_content(prompt, **kwargs)
+        self.limiter.record_tokens(_response_tokens(response))
+        return response
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        if not hasattr(self.model, "generate_content_async"):
+            response = await asyncio.to_thread(self.generate_content, prompt, **kwargs)
+            return self._replay_async([response]) if stream else response
+        if stream:
+            return self._limited_async_stream(prompt, kwargs)
+        async with self.limiter.alimit(estimate_tokens(prompt)):
+            response = await self.model.generate_content_async(prompt, **kwargs)
+        self.limiter.record_tokens(_response_tokens(response))
+        return response
+
+    def _limited_stream(self, prompt, kwargs):
+        # The in-flight slot is held until the stream is exhausted or closed
+        with self.limiter.limit(estimate_tokens(prompt)):
+            for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+                self.limiter.record_tokens(_response_tokens(chunk, use_usage=False))
+                yield chunk
+
+    async def _limited_async_stream(self, prompt, kwargs):
+        async with self.limiter.alimit(estimate_tokens(prompt)):
+            response = await self.model.generate_content_async(prompt, stream=True, **kwargs)
+            async for chunk in response:
+                self.limiter.record_tokens(_response_tokens(chunk, use_usage=False))
+                yield chunk
+
+    @staticmethod
+    async def _replay_async(chunks):
+        for chunk in chunks:
+            yield chunk
@@ -1,13 +1,48 @@
 # src/memory.py
+import json
+import os
+
+from ..utils.tokens import estimate_tokens
+
+# Prefix of the observation entries written after a search tool call
+_OBSERVATION_MARKER = "returned:"
+
 
 class AgentMemory:
     """
     A simple class to store the agent's conversation history.
     Used by the agent to maintain context across multiple reasoning and tool-calling steps.
+
+    With a token budget, older entries are compacted once the history grows past it:
+    search observations become one-line patent stubs and other entries are truncated,
+    while the most recent entries are always kept verbatim.
     """
-    def __init__(self):
+    def __init__(self, max_tokens=None, keep_recent=4, summary_chars=300):
+        """
+        Args:
+            max_tokens (int): Estimated token budget for the history, or None for unbounded.
+            keep_recent (int): Number of most recent entries that are never compacted.
+            summary_chars (int): Maximum length of a compacted non-observation entry.
+        """
         # This list will hold all conversation entries in order (user input, LLM thoughts, tool calls, etc.)
         self._history = []
+        # The joined history, kept up to date incrementally so get_history() does not rebuild it
+        self._history_text = ""
+        # Entries before this index have already been compacted
+        self._compacted_upto = 0
+
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.summary_chars = summary_chars
+
+    @classmethod
+    def from_env(cls):
+        """
+        Creates a memory whose token budget comes from AGENT_MEMORY_MAX_TOKENS
+        (default 8000; 0 means unbounded).
+        """
+        max_tokens = int(os.environ.get("AGENT_MEMORY_MAX_TOKENS", 8000))
+        return cls(max_tokens=max_tokens or None)
 
     def add_entry(self, entry: str):
         """
@@ -17,6 +52,10 @@ class AgentMemory:
         """
         # Append the new entry (could be user input, LLM response, or tool result) to the end of the history list
         self._history.append(entry)
+        self._history_text = f"{self._history_text}\n{entry}" if len(self._history) > 1 else entry
+
+        if self.max_tokens is not None and self.token_count() > self.max_tokens:
+            self._compact()
 
     def get_history(self) -> str:
         """
@@ -25,6 +64,46 @@ class AgentMemory:
         Returns:
             str: The conversation history, with each entry separated by a newline.
         """
-        # Join all entries in the history list with newline characters to form a single string
-        # This string is then used as context for the next LLM prompt
-        return "\n".join(self._history)
\ No newline at end of file
+        return self._history_text
+
+    def token_count(self) -> int:
+        """
+        Returns the estimated number of tokens in get_history(), so callers can cap prompt size.
+        """
+        return estimate_tokens(self._history_text)
+
+    def _compact(self):
+        # Summarize the oldest uncompacted entries until the history fits the budget,
+        # then rebuild the joined text once.
+        last = len(self._history) - self.keep_recent
+        over = self.token_count() - self.max_tokens
+        index = self._compacted_upto
+        while index < last and over > 0:
+            original = self._history[index]
+            summary = self._summarize(original)
+            self._history[index] = summary
+            over -= estimate_tokens(original) - estimate_tokens(summary)
+            index += 1
+        if index == self._compacted_upto:
+            return
+        self._compacted_upto = index
+        self._history_text = "\n".join(self._history)
+
+    def _summarize(self, entry: str) -> str:
+        """Compacts one entry: patent search observations to stubs, anything else by truncation."""
+        head, marker, payload = entry.partition(_OBSERVATION_MARKER)
+        if marker:
+            try:
+                patents = json.loads(payload)
+            except ValueError:
+                patents = None
+            if isinstance(patents, list) and all(isinstance(p, dict) for p in patents):
+                stubs = "; ".join(
+                    f"{p.get('patent_number')} ({p.get('publication_date')}) {(p.get('title') or '')[:80]}"
+                    for p in patents
+                )
+                return f"{head}{marker} {len(patents)} patents: {stubs}"
+
+        if len(entry) <= self.summary_chars:
+            return entry
+        return entry[:self.summary_chars] + " ...[truncated]"
@@ -0,0 +1,18 @@
+def emit_event(config, event: str, data=None):
+    """
+    Reports workflow progress (e.g. 'llm_done', 'search_done', 'report_chunk') to the
+    optional 'on_event' callback in config["configurable"]. A no-op when no callback is set.
+    """
+    on_event = (config or {}).get("configurable", {}).get("on_event")
+    if on_event is not None:
+        on_event(event, data or {})
+
+def remember(state, config, entry: str):
+    """
+    Adds an entry to the run's AgentMemory (config["configurable"]["memory"]), whose history is
+    sent with every planning prompt, and to state["history"] so a resumed run can rebuild it.
+    """
+    memory = (config or {}).get("configurable", {}).get("memory")
+    if memory is not None:
+        memory.add_entry(entry)
+    state.setdefault("history", []).append(entry)
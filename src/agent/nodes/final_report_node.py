@@ -1,15 +1,39 @@
-from ..tools.patent_tools import final_report
+from ..tools.patent_tools import final_report, afinal_report
+from .events import emit_event
 
-def final_report_node(state):
+def _chunk_callback(config):
+    """Streams report text as 'report_chunk' events when a progress listener is attached."""
+    if not config["configurable"].get("on_event"):
+        return None
+    return lambda text: emit_event(config, "report_chunk", {"text": text})
+
+def final_report_node(state, config):
     """
     Node that generates the final report using the model, user input, and search results.
-    Expects 'model', 'user_input', and 'search_results' in the state dict.
+    Expects 'user_input' and 'search_results' in the state dict and 'model' in config["configurable"].
+    """
+    model = config["configurable"].get("model")
+    invention_text = state.get("user_input")
+    search_results = state.get("search_results")
+    if not model or not invention_text or search_results is None:
+        raise ValueError("Config must contain 'model' and state must contain 'user_input' and 'search_results'.")
+    emit_event(config, "report_started")
+    report = final_report(model, invention_text, search_results, on_chunk=_chunk_callback(config))
+    state["final_report"] = report
+    emit_event(config, "report_done", {"chars": len(report)})
+    return state
+
+async def afinal_report_node(state, config):
+    """
+    Async version of final_report_node, using the async Gemini client.
     """
-    model = state.get("model")
+    model = config["configurable"].get("model")
     invention_text = state.get("user_input")
     search_results = state.get("search_results")
     if not model or not invention_text or search_results is None:
-        raise ValueError("State must contain 'model', 'user_input', and 'search_results' keys.")
-    report = final_report(model, invention_text, search_results)
+        raise ValueError("Config must contain 'model' and state must contain 'user_input' and 'search_results'.")
+    emit_event(config, "report_started")
+    report = await afinal_report(model, invention_text, search_results, on_chunk=_chunk_callback(config))
     state["final_report"] = report
-    return state
\ No newline at end of file
+    emit_event(config, "report_done", {"chars": len(report)})
+    return state
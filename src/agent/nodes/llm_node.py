@@ -1,11 +1,90 @@
-def llm_node(state):
+import re
+
+from ..cache.llm_cache import CachedResponse
+from ..tools.patent_tools import agenerate_content
+from ..tracing.tracer import llm_span
+from .events import emit_event, remember
+
+TOOLS = ("search", "final_report")
+
+# One action per line, optionally wrapped in Markdown backticks or bold markers
+_ACTION_RE = re.compile(r"^[\s`*]*Action:[\s`*]*(\w+)\s*\((.*)\)[\s`*.]*$", re.MULTILINE)
+
+NO_RESULTS_GUARDRAIL = (
+    "Observation: The `final_report` tool cannot be called yet because no prior art has been found. "
+    "You must use the `search` tool first, or try a different search query."
+)
+INVALID_ACTION = (
+    "Observation: No valid action was found. End your response with "
+    "`Action: search(\"<query>\")` or `Action: final_report()`."
+)
+
+def parse_action(llm_output: str):
     """
-    Node that calls the LLM with the current prompt and updates the state with the response.
-    Expects 'model' and 'prompt' in the state dict.
+    Parses the last `Action: tool_name(tool_input)` line of a ReAct response.
+    Returns:
+        tuple: (tool_name, tool_input), with tool_input stripped of quotes (None when empty),
+        or (None, None) if the response contains no action.
     """
-    model = state.get("model")
-    prompt = state.get("prompt")
-    if not model or not prompt:
-        raise ValueError("State must contain 'model' and 'prompt' keys.")
-    response = model.generate_content(prompt)
-    state["llm_response"] = response.text
\ No newline at end of file
+    matches = _ACTION_RE.findall(llm_output or "")
+    if not matches:
+        return None, None
+    tool_name, tool_input = matches[-1]
+    tool_input = tool_input.strip().strip("'\"").strip()
+    return tool_name, tool_input or None
+
+def _planning_prompt(state, config):
+    memory = config["configurable"].get("memory")
+    history = memory.get_history() if memory is not None else "\n".join(state.get("history", []))
+    return f"{state['prompt']}\n{history}"
+
+def _apply_response(state, config, text):
+    """Records the response and sets state['action'] / state['tool_input'] for routing."""
+    state["iteration"] = state.get("iteration", 0) + 1
+    state["llm_response"] = text
+    remember(state, config, f"LLM Response:\n{text}")
+
+    tool_name, tool_input = parse_action(text)
+    if tool_name == "search" and not tool_input:
+        tool_name = None
+    if tool_name == "final_report" and not state.get("search_results"):
+        # Guardrail: a report without any prior art is worthless, ask for a search instead
+        remember(state, config, NO_RESULTS_GUARDRAIL)
+        tool_name = None
+    elif tool_name not in TOOLS:
+        remember(state, config, INVALID_ACTION)
+        tool_name = None
+
+    state["action"] = tool_name
+    state["tool_input"] = tool_input if tool_name == "search" else None
+    emit_event(config, "llm_done", {
+        "chars": len(text), "iteration": state["iteration"], "action": tool_name, "tool_input": state["tool_input"],
+    })
+    return state
+
+def llm_node(state, config):
+    """
+    Node that asks the LLM for the next ReAct step and parses its action.
+    Expects 'prompt' in the state dict and 'model' and 'memory' in config["configurable"]; the
+    prompt is sent together with the run's history. Sets 'action' ('search', 'final_report' or
+    None when the response had no usable action) and 'tool_input' (the search query).
+    """
+    model = config["configurable"].get("model")
+    if not model or not state.get("prompt"):
+        raise ValueError("Config must contain 'model' and state must contain 'prompt'.")
+    prompt = _planning_prompt(state, config)
+    with llm_span("gemini.plan", prompt) as current:
+        response = model.generate_content(prompt)
+        current.set(response_chars=len(response.text or ""), cache_hit=isinstance(response, CachedResponse))
+    return _apply_response(state, config, response.text or "")
+
+async def allm_node(state, config):
+    """
+    Async version of llm_node, using the model's async client when it has one.
+    """
+    model = config["configurable"].get("model")
+    if not model or not state.get("prompt"):
+        raise ValueError("Config must contain 'model' and state must contain 'prompt'.")
+    prompt = _planning_prompt(state, config)
+    response = await agenerate_content(model, prompt, span_name="gemini.plan")
+    return _apply_response(state, config, response.text or "")
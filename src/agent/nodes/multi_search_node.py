@@ -0,0 +1,33 @@
+from ..tools.patent_tools import multi_search, amulti_search
+from ..tools.reranker import DEFAULT_TOP_K, candidate_count
+from .search_node import arecord_search_results, record_search_results
+
+def multi_search_node(state, config):
+    """
+    Node that runs several patent searches concurrently and merges the results.
+    Expects 'search_queries' (a list of query strings supplied by the caller) in the state dict.
+    The merged candidates are re-ranked against 'user_input', keeping DEFAULT_TOP_K per query.
+    """
+    queries = state.get("search_queries")
+    if not queries:
+        raise ValueError("State must contain 'search_queries' key for multi search.")
+    state.setdefault("queries", []).extend(queries)
+    result = multi_search(
+        queries, max_results=candidate_count(), priority_date=state.get("priority_date"),
+        refresh=config["configurable"].get("refresh", False),
+    )
+    return record_search_results(state, config, "; ".join(queries), result, DEFAULT_TOP_K * len(queries))
+
+async def amulti_search_node(state, config):
+    """
+    Async version of multi_search_node; the searches run as concurrent coroutines.
+    """
+    queries = state.get("search_queries")
+    if not queries:
+        raise ValueError("State must contain 'search_queries' key for multi search.")
+    state.setdefault("queries", []).extend(queries)
+    result = await amulti_search(
+        queries, max_results=candidate_count(), priority_date=state.get("priority_date"),
+        refresh=config["configurable"].get("refresh", False),
+    )
+    return await arecord_search_results(state, config, "; ".join(queries), result, DEFAULT_TOP_K * len(queries))
@@ -1,13 +1,105 @@
-from ..tools.patent_tools import patent_search
+import asyncio
+import json
+import os
 
-def search_node(state):
+from ..tools.patent_tools import patent_search, apatent_search
+from ..tools.patent_record import as_dict
+from ..tools.reranker import DEFAULT_TOP_K, candidate_count, rerank_results
+from .events import emit_event, remember
+
+def min_relevance() -> float:
+    """Minimum re-ranker similarity for a result to count as relevant (AGENT_MIN_RELEVANCE, default 0.05)."""
+    return float(os.environ.get("AGENT_MIN_RELEVANCE", 0.05))
+
+def _patent_key(patent):
+    return patent.get("patent_number") or patent.get("title")
+
+def _rank_results(state, results, top_k):
     """
-    Node that performs a patent search using the provided query.
-    Expects 'tool_input' in the state dict.
+    Re-ranks a search's results against the run's accumulated ones.
+    Returns:
+        tuple: (new, accumulated): the best top_k new, relevant results as dicts, and every
+        result found so far in rank order. The state is not changed.
+    """
+    found = state.get("search_results") or []
+    if isinstance(results, list):
+        known = {_patent_key(p) for p in found}
+        new = [p for p in results if _patent_key(p) not in known]
+        new = rerank_results(state.get("user_input"), new, top_k, min_score=min_relevance())
+        # Candidates arrive as PatentRecords; only the kept ones are stored, as JSON-friendly dicts
+        new = [as_dict(p) for p in new]
+    else:
+        new = []  # The search tools return an info string when nothing was found
+    if found and new:
+        return new, rerank_results(state.get("user_input"), found + new, len(found) + len(new))
+    return new, found + new
+
+def _record_ranked(state, config, query, new, accumulated):
+    state["search_results"] = accumulated
+    if new:
+        remember(state, config, f"Observation: Tool `search` returned: {json.dumps(new)}")
+    else:
+        remember(state, config, f"Observation: The search for {query!r} found no new relevant patents. Try a different query.")
+    emit_event(config, "search_done", {"results": len(new), "total": len(accumulated)})
+    return state
+
+def record_search_results(state, config, query, results, top_k=DEFAULT_TOP_K):
+    """
+    Adds the best top_k new, relevant results of a search to the run's accumulated
+    state['search_results'] and records them as an observation for the next planning step.
+    Patents already found by an earlier search are skipped; the rest are re-ranked against
+    'user_input' and those below min_relevance() are dropped. The accumulated results are
+    kept in rank order, best first, so the report prompt can drop the weakest ones.
+    """
+    return _record_ranked(state, config, query, *_rank_results(state, results, top_k))
+
+async def arecord_search_results(state, config, query, results, top_k=DEFAULT_TOP_K):
     """
+    Async version of record_search_results. The re-ranking (NumPy scoring and embedding store
+    writes) runs in a worker thread; the observation and event are recorded on the event loop.
+    """
+    new, accumulated = await asyncio.to_thread(_rank_results, state, results, top_k)
+    return _record_ranked(state, config, query, new, accumulated)
+
+def _next_query(state, config):
+    """Returns the planned query, or None (with an observation) if it was already searched."""
     query = state.get("tool_input")
     if not query:
         raise ValueError("State must contain 'tool_input' key for search.")
-    result = patent_search(query)
-    state["search_results"] = result
-    return state
\ No newline at end of file
+    queries = state.setdefault("queries", [])
+    if query in queries:
+        remember(state, config, f"Observation: {query!r} was already searched. Try a different query or call final_report().")
+        emit_event(config, "search_done", {"results": 0, "total": len(state.get("search_results") or [])})
+        return None
+    queries.append(query)
+    return query
+
+def search_node(state, config):
+    """
+    Node that performs a patent search with the query parsed from the LLM's action.
+    Expects 'tool_input' in the state dict. Over-fetches candidates and adds the DEFAULT_TOP_K
+    most similar to 'user_input' to 'search_results' (see record_search_results). Only patents
+    dated before 'priority_date', when the state has one, are searched. A run started with
+    refresh (config["configurable"]["refresh"]) bypasses the search cache.
+    """
+    query = _next_query(state, config)
+    if query is None:
+        return state
+    result = patent_search(
+        query, max_results=candidate_count(), refresh=config["configurable"].get("refresh", False),
+        priority_date=state.get("priority_date"),
+    )
+    return record_search_results(state, config, query, result)
+
+async def asearch_node(state, config):
+    """
+    Async version of search_node, using non-blocking HTTP.
+    """
+    query = _next_query(state, config)
+    if query is None:
+        return state
+    result = await apatent_search(
+        query, max_results=candidate_count(), refresh=config["configurable"].get("refresh", False),
+        priority_date=state.get("priority_date"),
+    )
+    return await arecord_search_results(state, config, query, result)
@@ -0,0 +1,137 @@
+# src/prompts/report_builder.py
+"""
+Builds the final report prompt within a token budget.
+
+Search results are serialized as compact numbered references (one header line and an abstract
+line each, no JSON indentation or URLs). Long abstracts are cut down to their first sentence plus
+the sentences sharing the most terms with the invention disclosure. If the prompt still exceeds
+the budget, the lowest-ranked references are dropped (with a warning). The disclosure itself is
+never shortened: the claims it contains are what the report analyzes.
+
+Configuration: REPORT_PROMPT_MAX_TOKENS (default: the model's context window,
+MODEL_CONTEXT_TOKENS, minus REPORT_OUTPUT_TOKENS reserved for the report; 0 means unbounded)
+and REPORT_ABSTRACT_CHARS (default 600).
+"""
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+
+from ..tools.patent_record import as_dict
+from ..utils.tokens import estimate_tokens
+from .react_prompts import FINAL_REPORT_PROMPT
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+_TERM_RE = re.compile(r"[a-z0-9]{4,}")  # Words of four letters or more; skips most stop words
+_TRUNCATED = " ...[truncated]"
+
+# Gemini 2.5 Pro accepts about one million input tokens and writes up to 65,536
+DEFAULT_CONTEXT_TOKENS = 1_048_576
+DEFAULT_OUTPUT_TOKENS = 65_536
+
+
+def default_max_tokens() -> int:
+    """The prompt budget: REPORT_PROMPT_MAX_TOKENS, or the context window left after the report's output."""
+    if "REPORT_PROMPT_MAX_TOKENS" in os.environ:
+        return int(os.environ["REPORT_PROMPT_MAX_TOKENS"])
+    context = int(os.environ.get("MODEL_CONTEXT_TOKENS", DEFAULT_CONTEXT_TOKENS))
+    return max(context - int(os.environ.get("REPORT_OUTPUT_TOKENS", DEFAULT_OUTPUT_TOKENS)), 0)
+
+
+@dataclass
+class ReportPrompt:
+    """A built report prompt and its size before and after compaction."""
+    text: str
+    tokens: int  # Estimated tokens of the prompt that is sent
+    raw_tokens: int  # Estimated tokens of the prompt with the results as indented JSON
+    references: int  # References included in the prompt
+    dropped: int  # References dropped to fit the budget
+
+
+def _terms(text: str) -> set:
+    return set(_TERM_RE.findall(text.lower()))
+
+
+def _squash(text) -> str:
+    return " ".join(str(text or "").split())
+
+
+def key_sentences(abstract: str, invention_terms: set, max_chars: int) -> str:
+    """
+    Shortens an abstract to at most max_chars: the first sentence is always kept, then the
+    sentences sharing the most terms with the invention, in their original order.
+    """
+    abstract = _squash(abstract)
+    if len(abstract) <= max_chars:
+        return abstract
+    sentences = _SENTENCE_RE.split(abstract)
+    chosen, length = {0}, len(sentences[0])
+    by_overlap = sorted(range(1, len(sentences)), key=lambda i: -len(_terms(sentences[i]) & invention_terms))
+    seen = {sentences[0]}
+    for i in by_overlap:
+        if sentences[i] not in seen and length + 1 + len(sentences[i]) <= max_chars:
+            chosen.add(i)
+            seen.add(sentences[i])
+            length += 1 + len(sentences[i])
+    text = " ".join(sentences[i] for i in sorted(chosen))
+    if len(text) > max_chars:
+        # A single overlong first sentence: cut at a word boundary
+        text = text[:max_chars - len(_TRUNCATED)].rsplit(" ", 1)[0] + _TRUNCATED
+    return text
+
+
+def format_reference(rank: int, patent: dict, invention_terms: set, abstract_chars: int) -> str:
+    """Serializes one search result as a compact numbered reference."""
+    header = f"[{rank}] US {patent.get('patent_number') or 'n/a'} ({patent.get('publication_date') or 'n/a'}): {_squash(patent.get('title'))}"
+    abstract = key_sentences(patent.get("abstract"), invention_terms, abstract_chars)
+    return f"{header}\n{abstract}" if abstract else header
+
+
+def build_report_prompt(invention_text: str, search_results, max_tokens=None, abstract_chars=None) -> ReportPrompt:
+    """
+    Fills in FINAL_REPORT_PROMPT with compactly serialized search results.
+    Args:
+        invention_text (str): The invention disclosure.
+        search_results: Patents in rank order (best first), as dicts or PatentRecords, or an info string.
+        max_tokens (int): Estimated token budget of the whole prompt; only the references are cut
+            to fit it. Defaults to default_max_tokens().
+        abstract_chars (int): Maximum abstract length; defaults to REPORT_ABSTRACT_CHARS.
+    Returns:
+        ReportPrompt: The prompt text with its token counts.
+    """
+    if max_tokens is None:
+        max_tokens = default_max_tokens()
+    if abstract_chars is None:
+        abstract_chars = int(os.environ.get("REPORT_ABSTRACT_CHARS", 600))
+
+    if not isinstance(search_results, list):
+        text = FINAL_REPORT_PROMPT.format(invention_text=invention_text, search_results=search_results)
+        return ReportPrompt(text, estimate_tokens(text), estimate_tokens(text), 0, 0)
+
+    search_results = [as_dict(p) for p in search_results]
+    raw_tokens = estimate_tokens(
+        FINAL_REPORT_PROMPT.format(invention_text=invention_text, search_results=json.dumps(search_results, indent=2))
+    )
+    invention_terms = _terms(invention_text)
+    references = [format_reference(i, p, invention_terms, abstract_chars) for i, p in enumerate(search_results, 1)]
+
+    if max_tokens:
+        # Token counts are estimated per part, counting one extra token per reference for its separator.
+        # The disclosure is always sent whole; what is left of the budget goes to the references.
+        fixed = estimate_tokens(FINAL_REPORT_PROMPT.format(invention_text=invention_text, search_results=""))
+        sizes = [estimate_tokens(r) + 1 for r in references]
+        total = fixed + sum(sizes)
+        while total > max_tokens and len(references) > 1:
+            total -= sizes.pop()
+            references.pop()
+        if len(references) < len(search_results):
+            logging.warning(
+                f"Report prompt over its {max_tokens}-token budget: dropped {len(search_results) - len(references)} "
+                f"of {len(search_results)} references (the disclosure alone is ~{fixed} tokens)."
+            )
+        if total > max_tokens:
+            logging.warning(f"Report prompt (~{total} tokens) exceeds its {max_tokens}-token budget even with one reference.")
+
+    text = FINAL_REPORT_PROMPT.format(invention_text=invention_text, search_results="\n".join(references))
+    return ReportPrompt(text, estimate_tokens(text), raw_tokens, len(references), len(search_results) - len(references))
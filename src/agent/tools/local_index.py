@@ -0,0 +1,428 @@
+# src/tools/local_index.py
+"""
+Offline patent search backend: an on-disk inverted index with BM25 ranking.
+
+Build an index from PatentsView bulk dumps (TSV with a header row, JSON arrays or JSON lines;
+records may use patent_id or patent_number), then select it with
+PATENT_SEARCH_BACKEND=local and PATENT_LOCAL_INDEX_DIR=<index dir>:
+
+    python -m src.agent.tools.local_index build --out data/patent_index g_patent.tsv g_patent_abstract.tsv
+    python -m src.agent.tools.local_index search --index data/patent_index "risk management contracts"
+
+Records sharing a patent number across files are merged, so title and abstract dumps can be
+ingested together. Building streams the dumps through an on-disk staging table and sorted
+posting chunks, so a full PatentsView dump is indexed in bounded memory. The term table,
+postings, document lengths and the document store are all memory-mapped: opening an index
+reads only its metadata, however large the vocabulary, and only touched pages are read.
+"""
+import argparse
+import csv
+import functools
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+from array import array
+from collections import Counter
+
+import numpy as np
+
+INDEX_VERSION = 2
+
+# Document fields kept in the store, besides the patent number
+_DOC_FIELDS = ("patent_title", "patent_abstract", "patent_date")
+_STAGE_BATCH = 10_000  # Records per staging insert
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the to was were which with "
+    "said wherein comprising least one each".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lowercases text and splits it into index terms, dropping stopwords and 1-character tokens."""
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _read_records(path: str):
+    """Yields dict records from a TSV, JSON array or JSON lines dump."""
+    if path.endswith((".tsv", ".tsv.txt")):
+        csv.field_size_limit(sys.maxsize)
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f, delimiter="\t")
+        return
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from json.load(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _normalize(record: dict):
+    number = record.get("patent_number") or record.get("patent_id")
+    if not number:
+        return None, None
+    fields = {
+        "patent_title": record.get("patent_title"),
+        "patent_abstract": record.get("patent_abstract"),
+        "patent_date": record.get("patent_date"),
+    }
+    return str(number).strip(), {k: v for k, v in fields.items() if v}
+
+
+def _stage_records(dump_paths: list, db_path: str):
+    """
+    Loads every dump into a temporary SQLite table keyed on patent number, merging records that
+    share one (later non-empty fields win), so ingestion memory does not grow with the dumps.
+    Returns:
+        sqlite3.Connection: The staging database; its rowids follow first appearance.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        "CREATE TABLE docs (patent_number TEXT PRIMARY KEY, patent_title TEXT, patent_abstract TEXT, patent_date TEXT)"
+    )
+    upsert = (
+        "INSERT INTO docs VALUES (?, ?, ?, ?) ON CONFLICT(patent_number) DO UPDATE SET "
+        + ", ".join(f"{field} = COALESCE(excluded.{field}, {field})" for field in _DOC_FIELDS)
+    )
+    for path in dump_paths:
+        print(f"--- Ingesting {path} ---")
+        rows = []
+        for record in _read_records(path):
+            number, fields = _normalize(record)
+            if number:
+                rows.append((number, *(fields.get(field) for field in _DOC_FIELDS)))
+            if len(rows) >= _STAGE_BATCH:
+                conn.executemany(upsert, rows)
+                rows = []
+        conn.executemany(upsert, rows)
+        conn.commit()
+    return conn
+
+
+class _ArrayWriter:
+    """Appends numbers of one array typecode to a binary file, buffering them in blocks."""
+
+    def __init__(self, path: str, typecode: str, block=65536):
+        self.file = open(path, "wb")
+        self.values = array(typecode)
+        self.block = block
+
+    def append(self, value):
+        self.values.append(value)
+        if len(self.values) >= self.block:
+            self.flush()
+
+    def flush(self):
+        self.values.tofile(self.file)
+        del self.values[:]
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _spill(postings: dict, chunk_dir: str, number: int) -> str:
+    """Writes one chunk of postings, sorted by term, and returns its path prefix."""
+    prefix = os.path.join(chunk_dir, f"chunk-{number}")
+    with open(prefix + ".terms", "w", encoding="utf-8") as terms, \
+            open(prefix + ".docs", "wb") as docs, open(prefix + ".tfs", "wb") as tfs:
+        for term in sorted(postings):
+            doc_ids, counts = postings[term]
+            terms.write(f"{term}\t{len(doc_ids)}\n")
+            doc_ids.tofile(docs)
+            counts.tofile(tfs)
+    return prefix
+
+
+def _read_chunk(prefix: str, number: int):
+    """Yields (term, chunk number, doc ids, tfs) from a chunk written by _spill, one term at a time."""
+    with open(prefix + ".terms", encoding="utf-8") as terms, \
+            open(prefix + ".docs", "rb") as docs, open(prefix + ".tfs", "rb") as tfs:
+        for line in terms:
+            term, count = line.rstrip("\n").split("\t")
+            count = int(count)
+            yield term, number, np.fromfile(docs, dtype=np.uint32, count=count), np.fromfile(tfs, dtype=np.uint32, count=count)
+
+
+def _merge_chunks(chunks: list, out_dir: str):
+    """
+    Merges the spilled chunks into the postings files and the sorted term table.
+    Returns:
+        tuple: (number of terms, number of postings)
+    """
+    num_terms, position, term_bytes = 0, 0, 0
+    path = functools.partial(os.path.join, out_dir)
+    with open(path("postings_docs.bin"), "wb") as post_docs, open(path("postings_tfs.bin"), "wb") as post_tfs, \
+            open(path("terms.bin"), "wb") as terms, _ArrayWriter(path("term_offsets.bin"), "Q") as term_offsets, \
+            _ArrayWriter(path("term_postings.bin"), "Q") as term_postings:
+        term_offsets.append(0)
+        term_postings.append(0)
+        merged = heapq.merge(*(_read_chunk(prefix, i) for i, prefix in enumerate(chunks)))
+        for term, group in itertools.groupby(merged, key=lambda entry: entry[0]):
+            for _, _, doc_ids, counts in group:
+                doc_ids.tofile(post_docs)
+                counts.tofile(post_tfs)
+                position += len(doc_ids)
+            encoded = term.encode("utf-8")
+            terms.write(encoded)
+            term_bytes += len(encoded)
+            term_offsets.append(term_bytes)
+            term_postings.append(position)
+            num_terms += 1
+    return num_terms, position
+
+
+def build_index(dump_paths: list, out_dir: str, k1=1.2, b=0.75, chunk_postings=5_000_000) -> dict:
+    """
+    Ingests bulk dumps and writes an index directory. Memory use is bounded whatever the size
+    of the dumps: records are merged in a staging database on disk, documents are streamed to
+    the document store, and postings are spilled in sorted chunks that are merged at the end.
+    Args:
+        dump_paths (list): Paths of TSV/JSON/JSONL dumps.
+        out_dir (str): Directory to write the index files to.
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalization.
+        chunk_postings (int): Postings held in memory before a chunk is spilled to disk.
+    Returns:
+        dict: The index metadata.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="build-", dir=out_dir)
+    try:
+        conn = _stage_records(dump_paths, os.path.join(work_dir, "staging.db"))
+        num_docs, total_length, chunks = 0, 0, []
+        postings, in_memory = {}, 0  # term -> (doc ids, tfs) of the current chunk
+        offset = 0
+        with open(os.path.join(out_dir, "docs.jsonl"), "wb") as store, \
+                _ArrayWriter(os.path.join(out_dir, "doc_lengths.bin"), "I") as lengths, \
+                _ArrayWriter(os.path.join(out_dir, "doc_offsets.bin"), "Q") as offsets:
+            offsets.append(0)
+            rows = conn.execute(f"SELECT patent_number, {', '.join(_DOC_FIELDS)} FROM docs ORDER BY rowid")
+            for doc_id, row in enumerate(rows):
+                doc = {"patent_number": row[0]}
+                doc.update((field, value) for field, value in zip(_DOC_FIELDS, row[1:]) if value)
+                terms = tokenize(f"{doc.get('patent_title', '')} {doc.get('patent_abstract', '')}")
+                counts = Counter(terms)
+                for term, tf in counts.items():
+                    entry = postings.get(term)
+                    if entry is None:
+                        entry = postings[term] = (array("I"), array("I"))
+                    entry[0].append(doc_id)
+                    entry[1].append(tf)
+                in_memory += len(counts)
+                if in_memory >= chunk_postings:
+                    chunks.append(_spill(postings, work_dir, len(chunks)))
+                    postings, in_memory = {}, 0
+
+                line = (json.dumps(doc, separators=(",", ":")) + "\n").encode("utf-8")
+                store.write(line)
+                offset += len(line)
+                lengths.append(len(terms))
+                offsets.append(offset)
+                num_docs += 1
+                total_length += len(terms)
+        conn.close()
+        if postings:
+            chunks.append(_spill(postings, work_dir, len(chunks)))
+        del postings
+
+        # Chunks cover consecutive document ranges, so merging them by term (and chunk number)
+        # keeps every posting list sorted by document id
+        num_terms, total = _merge_chunks(chunks, out_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    meta = {
+        "version": INDEX_VERSION,
+        "num_docs": num_docs,
+        "num_terms": num_terms,
+        "num_postings": total,
+        "avg_doc_length": total_length / num_docs if num_docs else 0.0,
+        "k1": k1,
+        "b": b,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    print(f"   - Indexed {num_docs} patents, {num_terms} terms, {total} postings.")
+    return meta
+
+
+def _memmap(path: str, dtype):
+    # np.memmap cannot map an empty file
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+class LocalPatentIndex:
+    """
+    A read-only, memory-mapped BM25 index built by build_index(). Safe to share across threads.
+    """
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(
+                f"Unsupported local index version in {index_dir}: {self.meta.get('version')}; rebuild it with 'build'."
+            )
+
+        self.num_docs = self.meta["num_docs"]
+        self.num_terms = self.meta["num_terms"]
+        self.avg_doc_length = self.meta["avg_doc_length"] or 1.0
+        self.k1 = self.meta["k1"]
+        self.b = self.meta["b"]
+
+        self._terms = _memmap(os.path.join(index_dir, "terms.bin"), np.uint8)
+        self._term_offsets = _memmap(os.path.join(index_dir, "term_offsets.bin"), np.uint64)
+        self._term_postings = _memmap(os.path.join(index_dir, "term_postings.bin"), np.uint64)
+        self._post_docs = _memmap(os.path.join(index_dir, "postings_docs.bin"), np.uint32)
+        self._post_tfs = _memmap(os.path.join(index_dir, "postings_tfs.bin"), np.uint32)
+        self._doc_lengths = _memmap(os.path.join(index_dir, "doc_lengths.bin"), np.uint32)
+        self._doc_offsets = _memmap(os.path.join(index_dir, "doc_offsets.bin"), np.uint64)
+        self._store = _memmap(os.path.join(index_dir, "docs.jsonl"), np.uint8)
+
+    def _term(self, i: int) -> bytes:
+        return self._terms[int(self._term_offsets[i]):int(self._term_offsets[i + 1])].tobytes()
+
+    def lookup(self, term: str):
+        """
+        Binary-searches the sorted term table.
+        Returns:
+            tuple: (offset, document frequency) of the term's postings, or None if it is not indexed.
+        """
+        key = term.encode("utf-8")
+        lo, hi = 0, self.num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.num_terms or self._term(lo) != key:
+            return None
+        start = int(self._term_postings[lo])
+        return start, int(self._term_postings[lo + 1]) - start
+
+    def get_document(self, doc_id: int) -> dict:
+        start, end = int(self._doc_offsets[doc_id]), int(self._doc_offsets[doc_id + 1])
+        return json.loads(self._store[start:end].tobytes())
+
+    def search(self, query: str, max_results=3, before=None) -> list:
+        """
+        Ranks documents against the query with BM25.
+        Args:
+            before (str): Optional YYYY-MM-DD date; only documents with an earlier patent_date
+                are returned, as with the PatentsView date filter.
+        Returns:
+            list: Up to max_results records in the PatentsView response format
+            (patent_number, patent_title, patent_date, patent_abstract).
+        """
+        doc_ids, weights = [], []
+        for term in set(tokenize(query)):
+            entry = self.lookup(term)
+            if entry is None:
+                continue
+            offset, df = entry
+            ids = np.asarray(self._post_docs[offset:offset + df])
+            tfs = np.asarray(self._post_tfs[offset:offset + df], dtype=np.float32)
+            lengths = np.asarray(self._doc_lengths[ids], dtype=np.float32)
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths / self.avg_doc_length)
+            doc_ids.append(ids)
+            weights.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not doc_ids:
+            return []
+
+        # Sum the per-term contributions of every matching document
+        unique_ids, inverse = np.unique(np.concatenate(doc_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights))
+        if before:
+            return self._top_before(unique_ids, scores, max_results, before)
+        k = min(max_results, len(unique_ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self.get_document(int(unique_ids[i])) for i in top]
+
+    def _top_before(self, unique_ids, scores, max_results, before):
+        # Dates live in the document store, so documents are read in score order until enough pass
+        found = []
+        for i in np.argsort(-scores, kind="stable"):
+            doc = self.get_document(int(unique_ids[i]))
+            if doc.get("patent_date") and doc["patent_date"] < before:
+                found.append(doc)
+                if len(found) == max_results:
+                    break
+        return found
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_backend() -> str:
+    """Returns the configured search backend: 'patentsview' (default) or 'local'."""
+    return os.environ.get("PATENT_SEARCH_BACKEND", "patentsview").lower()
+
+
+def get_local_index(index_dir=None) -> LocalPatentIndex:
+    """
+    Returns the process-wide index for a directory (default PATENT_LOCAL_INDEX_DIR),
+    opening it on first use.
+    """
+    index_dir = index_dir or os.environ.get("PATENT_LOCAL_INDEX_DIR")
+    if not index_dir:
+        raise ValueError("PATENT_LOCAL_INDEX_DIR must be set to use the local search backend.")
+    with _indexes_lock:
+        index = _indexes.get(index_dir)
+        if index is None:
+            index = LocalPatentIndex(index_dir)
+            _indexes[index_dir] = index
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the offline patent index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Ingest bulk dumps into an index directory.")
+    build.add_argument("--out", required=True, help="Index directory to write.")
+    build.add_argument("dumps", nargs="+", help="PatentsView TSV/JSON/JSONL dump files.")
+    search = commands.add_parser("search", help="Run a query against an index.")
+    search.add_argument("--index", required=True, help="Index directory to read.")
+    search.add_argument("--max-results", type=int, default=10)
+    search.add_argument("--before", help="Only return patents dated before this YYYY-MM-DD date.")
+    search.add_argument("query")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.dumps, args.out)
+    else:
+        for doc in LocalPatentIndex(args.index).search(args.query, args.max_results, before=args.before):
+            print(f"{doc['patent_number']}  {doc.get('patent_date', '')}  {doc.get('patent_title', '')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# src/tools/patent_record.py
+"""
+Compact in-memory representations of patent search results.
+
+PatentRecord is a slotted dataclass holding one result: no per-record __dict__ and no repeated
+key strings. Its Google Patents `url` is derived from the patent number on access instead of
+being stored. It also answers `get(key)` and `record[key]` with the keys of the dict format
+('title', 'patent_number', 'publication_date', 'abstract', 'url'), so the re-ranker and result
+merging take records and dicts alike; the report prompt builder converts records with as_dict().
+
+PatentBatch stores a large result set column by column: one list per text field and publication
+dates packed as integers in an array. Records are materialized only when indexed or iterated.
+
+Dicts remain the format of the graph state, checkpoints and caches (they must be JSON); convert
+at those boundaries with to_dict() / from_dict().
+"""
+from array import array
+from dataclasses import dataclass
+
+GOOGLE_PATENTS_URL = "https://patents.google.com/patent/US{}"
+
+# Keys of the dict format, in its order
+FIELDS = ("title", "patent_number", "publication_date", "abstract", "url")
+
+
+def patent_url(patent_number):
+    """Returns the Google Patents URL of a US patent number, or None without a number."""
+    return GOOGLE_PATENTS_URL.format(patent_number) if patent_number else None
+
+
+@dataclass(slots=True)
+class PatentRecord:
+    """One patent search result."""
+    patent_number: str = None
+    title: str = None
+    publication_date: str = None  # YYYY-MM-DD
+    abstract: str = None
+
+    @property
+    def url(self):
+        return patent_url(self.patent_number)
+
+    @classmethod
+    def from_api(cls, result: dict):
+        """Creates a record from a PatentsView (or local index) response record."""
+        return cls(
+            result.get("patent_number"),
+            result.get("patent_title"),
+            result.get("patent_date"),
+            result.get("patent_abstract"),
+        )
+
+    @classmethod
+    def from_dict(cls, patent: dict):
+        """Creates a record from the dict format; a stored 'url' is dropped, as it is derived."""
+        return cls(patent.get("patent_number"), patent.get("title"), patent.get("publication_date"), patent.get("abstract"))
+
+    def to_dict(self) -> dict:
+        """Returns the dict format used in the graph state, caches and prompts."""
+        return {
+            "title": self.title,
+            "patent_number": self.patent_number,
+            "publication_date": self.publication_date,
+            "abstract": self.abstract,
+            "url": self.url,
+        }
+
+    def get(self, key, default=None):
+        """Reads a field by its dict-format key, like dict.get()."""
+        return getattr(self, key) if key in FIELDS else default
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+
+def as_dict(patent) -> dict:
+    """Returns a patent in the dict format, whether it is a PatentRecord or already a dict."""
+    return patent.to_dict() if isinstance(patent, PatentRecord) else patent
+
+
+def _pack_date(date) -> int:
+    # "2019-03-14" -> 20190314; 0 means no date, -1 a date in another format
+    if not date:
+        return 0
+    if len(date) == 10 and date[4] == date[7] == "-" and date[0] != "0" and date.replace("-", "").isdigit():
+        return int(date[:4] + date[5:7] + date[8:])
+    return -1
+
+
+def _unpack_date(packed: int):
+    if not packed:
+        return None
+    digits = str(packed)  # Packed dates always have four-digit years, so eight digits
+    return f"{digits[:4]}-{digits[4:6]}-{digits[6:]}"
+
+
+class PatentBatch:
+    """
+    A columnar, append-only collection of patent search results, for result sets of hundreds
+    or thousands of patents (e.g. from iter_patent_search()). Indexing returns a PatentRecord;
+    slicing and take() return a new batch.
+    """
+
+    __slots__ = ("patent_numbers", "titles", "abstracts", "_dates", "_odd_dates")
+
+    def __init__(self):
+        self.patent_numbers = []
+        self.titles = []
+        self.abstracts = []
+        self._dates = array("i")  # Packed YYYYMMDD, 0 for none, -1 for a non-ISO date
+        self._odd_dates = {}  # position -> date string that could not be packed
+
+    @classmethod
+    def from_records(cls, records):
+        """Builds a batch from an iterable of PatentRecords, consuming it one record at a time."""
+        batch = cls()
+        for record in records:
+            batch.append(record.patent_number, record.title, record.publication_date, record.abstract)
+        return batch
+
+    @classmethod
+    def from_api(cls, results):
+        """Builds a batch from PatentsView response records without creating a record per result."""
+        batch = cls()
+        for result in results:
+            batch.append(result.get("patent_number"), result.get("patent_title"), result.get("patent_date"), result.get("patent_abstract"))
+        return batch
+
+    @classmethod
+    def from_dicts(cls, patents):
+        """Builds a batch from patents in the dict format."""
+        batch = cls()
+        for patent in patents:
+            batch.append(patent.get("patent_number"), patent.get("title"), patent.get("publication_date"), patent.get("abstract"))
+        return batch
+
+    def append(self, patent_number, title, publication_date, abstract):
+        packed = _pack_date(publication_date)
+        if packed < 0:
+            self._odd_dates[len(self._dates)] = publication_date
+        self.patent_numbers.append(patent_number)
+        self.titles.append(title)
+        self.abstracts.append(abstract)
+        self._dates.append(packed)
+
+    def publication_date(self, i: int):
+        packed = self._dates[i]
+        return self._odd_dates.get(i % len(self)) if packed < 0 else _unpack_date(packed)
+
+    def publication_dates(self):
+        """Yields the publication dates in order."""
+        odd = self._odd_dates
+        for i, packed in enumerate(self._dates):
+            yield odd.get(i) if packed < 0 else _unpack_date(packed)
+
+    def url(self, i: int):
+        """The Google Patents URL of the i-th patent, computed on access."""
+        return patent_url(self.patent_numbers[i])
+
+    def take(self, indices):
+        """Returns a new batch with the patents at the given positions, in that order."""
+        batch = PatentBatch()
+        for i in indices:
+            batch.append(self.patent_numbers[i], self.titles[i], self.publication_date(i), self.abstracts[i])
+        return batch
+
+    def to_records(self) -> list:
+        return list(self)
+
+    def to_dicts(self) -> list:
+        """Returns the patents in the dict format."""
+        return [
+            {
+                "title": title,
+                "patent_number": number,
+                "publication_date": date,
+                "abstract": abstract,
+                "url": patent_url(number),
+            }
+            for number, title, date, abstract in zip(self.patent_numbers, self.titles, self.publication_dates(), self.abstracts)
+        ]
+
+    def __len__(self):
+        return len(self._dates)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.take(range(*i.indices(len(self))))
+        return PatentRecord(self.patent_numbers[i], self.titles[i], self.publication_date(i), self.abstracts[i])
+
+    def __iter__(self):
+        columns = zip(self.patent_numbers, self.titles, self.publication_dates(), self.abstracts)
+        for number, title, date, abstract in columns:
+            yield PatentRecord(number, title, date, abstract)
+
+    def __repr__(self):
+        return f"<PatentBatch({len(self)} patents)>"
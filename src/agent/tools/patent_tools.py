@@ -1,13 +1,28 @@
 # src/tools.py
-import json
+import asyncio
+import contextvars
 import logging
-import re
-import requests
 import os
-import tenacity
-from requests.exceptions import ConnectionError, ReadTimeout, ConnectTimeout, HTTPError
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from ..prompts import react_prompts as prompts
+from ..prompts.report_builder import build_report_prompt
+from ..cache.search_cache import SearchCache, get_search_cache
+from ..cache.llm_cache import CachedResponse, supports_streaming
+from ..tracing.tracer import llm_span, span
+from ..utils.dates import before_priority_date
+from .patentsview_client import get_patentsview_client
+from .local_index import get_local_index, get_search_backend
+from .patent_record import PatentBatch, PatentRecord
+
+# Fields requested from PatentsView for every search
+PATENT_FIELDS = [
+    "patent_number",
+    "patent_title",
+    "patent_date",
+    "patent_abstract"
+]
 
 def _clean_query(query: str) -> str:
     """
@@ -21,102 +36,364 @@ def _clean_query(query: str) -> str:
     return query
 
 
-def _should_retry_http_error(exception):
+def _build_search_query(cleaned_query: str, priority_date=None) -> dict:
     """
-    Return True if the HTTPError is a temporary server error worth retrying.
-    Used by tenacity for retry logic on network errors.
+    Builds the PatentsView 'q' object for a cleaned keyword query. With a priority date
+    (YYYY-MM-DD) only patents dated before it are matched, so no result slot is spent on
+    documents that cannot be prior art.
     """
-    return isinstance(exception, HTTPError) and exception.response.status_code in [
-        502,
-        503,
-        504,
-    ]
+    text_query = {
+        "_text_any": {
+            "patent_title": cleaned_query,
+            "patent_abstract": cleaned_query
+        }
+    }
+    if not priority_date:
+        return text_query
+    return {"_and": [text_query, {"_lt": {"patent_date": priority_date}}]}
 
 
-# Decorator for retrying network requests and handling transient errors
-@tenacity.retry(
-    retry=(
-        tenacity.retry_if_exception_type((ConnectionError, ReadTimeout, ConnectTimeout))
-        | tenacity.retry_if_exception(_should_retry_http_error)
-    ),
-    wait=tenacity.wait_exponential(multiplier=1, min=2, max=30),
-    stop=tenacity.stop_after_attempt(3),
-    before_sleep=tenacity.before_sleep_log(logging.getLogger(__name__), logging.INFO),
-)
-def patent_search(query: str, max_results=3) -> list:
+def _before(result: dict, priority_date) -> bool:
+    return not priority_date or bool(result.get("patent_date") and result["patent_date"] < priority_date)
+
+
+def _format_results(results: list, max_results: int, priority_date=None):
     """
-    Perform a patent search using the PatentsView API, sending the query in the URL.
+    Converts PatentsView records into a list of PatentRecords, keeping only patents
+    dated before priority_date when one is given.
+    Returns an info string when there are no patents.
     """
-    print("--- TOOL: Executing PatentsView Search API (query string) ---")
-    PATENTSVIEW_API_KEY = os.environ.get("PATENTSVIEW_API_KEY")
-    if not PATENTSVIEW_API_KEY:
+    results = [r for r in results if _before(r, priority_date)]
+    if not results:
+        return "No patents found for this query on PatentsView."
+
+    print(f"   - Found {len(results)} results. Processing top {max_results}...")
+    return [PatentRecord.from_api(result) for result in results[:max_results]]
+
+
+def _page_size(limit=None) -> int:
+    """Patents per PatentsView request: PATENTSVIEW_PAGE_SIZE (default 100), or less for a smaller limit."""
+    page_size = int(os.environ.get("PATENTSVIEW_PAGE_SIZE", 100))
+    return min(page_size, limit) if limit else page_size
+
+
+def iter_patent_search(query: str, limit=None, priority_date=None):
+    """
+    Yields the PatentRecords matching a query one by one, for result sets too deep for one page
+    (e.g. landscape analyses). PatentsView pages are fetched lazily, following the API's
+    cursor, with the next page prefetched while the current one is consumed; stop iterating
+    (or pass a limit) and no further pages are requested. Memory use stays at two pages
+    however many patents match; collect large result sets with search_patent_batch().
+    Results are not cached.
+    Args:
+        query (str): The search query.
+        limit (int): Maximum number of patents to yield; None yields every match.
+        priority_date (str): Optional YYYY-MM-DD date; only patents dated before it are yielded.
+    Raises:
+        ValueError: If the query is empty after cleaning.
+    """
+    cleaned_query = _clean_query(query)
+    if not cleaned_query:
+        raise ValueError("Patent search query is empty after cleaning.")
+    if get_search_backend() == "local":
+        index = get_local_index()
+        for result in index.search(cleaned_query, limit or index.num_docs, before=priority_date):
+            yield PatentRecord.from_api(result)
+        return
+    results = get_patentsview_client().iter_patents(
+        _build_search_query(cleaned_query, priority_date), PATENT_FIELDS, page_size=_page_size(limit), limit=limit
+    )
+    for result in results:
+        if _before(result, priority_date):
+            yield PatentRecord.from_api(result)
+
+
+def search_patent_batch(query: str, limit=None, priority_date=None) -> PatentBatch:
+    """
+    Collects the results of iter_patent_search() into a columnar PatentBatch, which holds
+    thousands of patents in a fraction of the memory of a list of dicts. Takes the same arguments.
+    """
+    return PatentBatch.from_records(iter_patent_search(query, limit=limit, priority_date=priority_date))
+
+
+async def aiter_patent_search(query: str, limit=None, priority_date=None):
+    """
+    Async generator version of iter_patent_search(); takes the same arguments.
+    """
+    cleaned_query = _clean_query(query)
+    if not cleaned_query:
+        raise ValueError("Patent search query is empty after cleaning.")
+    if get_search_backend() == "local":
+        # Loading the index and scoring the query block; run them in a worker thread
+        index = await asyncio.to_thread(get_local_index)
+        results = await asyncio.to_thread(index.search, cleaned_query, limit or index.num_docs, before=priority_date)
+        for result in results:
+            yield PatentRecord.from_api(result)
+        return
+    results = get_patentsview_client().aiter_patents(
+        _build_search_query(cleaned_query, priority_date), PATENT_FIELDS, page_size=_page_size(limit), limit=limit
+    )
+    async for result in results:
+        if _before(result, priority_date):
+            yield PatentRecord.from_api(result)
+
+
+def _prepare_search(query: str, max_results: int, refresh: bool, priority_date=None):
+    """
+    Shared front half of patent_search/apatent_search: cleans the query and checks the cache.
+    Returns:
+        tuple: (cleaned_query, cache, cache_key, early_result). early_result is a cached
+        list or an error string when no request needs to be made, otherwise None.
+    """
+    cleaned_query = _clean_query(query)
+    if not cleaned_query:
+        return cleaned_query, None, None, "Error: Patent search query is empty after cleaning."
+
+    cache = get_search_cache()
+    cache_key = SearchCache.make_key(cleaned_query, PATENT_FIELDS, max_results, priority_date)
+    if cache is not None and not refresh:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            # Entries may come from a shared cache tier; never let a later document through
+            cached = [PatentRecord.from_dict(p) for p in before_priority_date(cached, priority_date)]
+            print(f"   - Cache hit. Returning {len(cached)} cached results.")
+            return cleaned_query, cache, cache_key, cached
+
+    if not get_patentsview_client().api_key:
         error_msg = "Error: PatentsView API key is not set. Please set the 'PATENTSVIEW_API_KEY' environment variable."
         logging.error(error_msg)
-        return error_msg
+        return cleaned_query, cache, cache_key, error_msg
+
+    return cleaned_query, cache, cache_key, None
 
+
+def _local_search(query: str, max_results: int, priority_date=None):
+    """
+    Runs a search against the offline BM25 index (see tools/local_index.py).
+    Returns the same values as patent_search().
+    """
+    print("--- TOOL: Executing local patent index search ---")
     cleaned_query = _clean_query(query)
     if not cleaned_query:
         return "Error: Patent search query is empty after cleaning."
+    try:
+        with span("local_index.search", kind="index", query_chars=len(cleaned_query), max_results=max_results) as current:
+            patents = get_local_index().search(cleaned_query, max_results, before=priority_date)
+            current.set(results=len(patents))
+        return _format_results(patents, max_results, priority_date)
+    except Exception as e:
+        logging.error(f"Error during local patent index search: {e}", exc_info=True)
+        return f"An error occurred during patent search: {e}"
 
-    # Build the query and fields for the URL
-    q_param = json.dumps({
-        "_text_any": {
-            "patent_title": cleaned_query,
-            "patent_abstract": cleaned_query
-        }
-    })
-    f_param = json.dumps([
-        "patent_number",
-        "patent_title",
-        "patent_date",
-        "patent_abstract"
-    ])
-    url = (
-        f"https://search.patentsview.org/api/v1/patent"
-        f"?q={requests.utils.quote(q_param)}"
-        f"&f={requests.utils.quote(f_param)}"
-        f"&o={json.dumps({'per_page': max_results})}"
-    )
 
-    headers = {
-        "X-Api-Key": PATENTSVIEW_API_KEY
-    }
+def patent_search(query: str, max_results=3, refresh=False, priority_date=None) -> list:
+    """
+    Perform a patent search using the PatentsView API, sending the query in the URL.
+    Collects the first max_results patents of iter_patent_search(), so larger values are
+    served from several pages. Requests go through the shared, connection-pooled PatentsView client.
+    Successful results are cached on the cleaned query (see cache/search_cache.py).
+    With PATENT_SEARCH_BACKEND=local the offline index in PATENT_LOCAL_INDEX_DIR is
+    searched instead, without the cache.
+    Args:
+        query (str): The search query.
+        max_results (int): Maximum number of patents to return.
+        refresh (bool): If True, bypass the cache lookup and overwrite the cached entry.
+        priority_date (str): Optional YYYY-MM-DD date; only patents dated before it are
+            returned, whichever backend or cache answers the search.
+    Returns:
+        list: PatentRecords (see tools/patent_record.py; readable like the dict format with
+        get()), or an error/info string when nothing was found.
+    """
+    if get_search_backend() == "local":
+        return _local_search(query, max_results, priority_date)
+    print("--- TOOL: Executing PatentsView Search API (query string) ---")
+    cleaned_query, cache, cache_key, early_result = _prepare_search(query, max_results, refresh, priority_date)
+    if early_result is not None:
+        return early_result
 
     try:
-        response = requests.get(
-            url,
-            headers=headers,
-            timeout=20,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        results = data.get("patents", [])
-        if not results:
+        with span("patentsview.search", kind="http", query_chars=len(cleaned_query), max_results=max_results, priority_date=priority_date) as current:
+            found_patents = list(iter_patent_search(cleaned_query, limit=max_results, priority_date=priority_date))
+            current.set(results=len(found_patents))
+        if not found_patents:
             return "No patents found for this query on PatentsView."
+        print(f"   - Found {len(found_patents)} results.")
+        if cache is not None:
+            # The cache stores the JSON-friendly dict format
+            cache.set(cache_key, [patent.to_dict() for patent in found_patents])
+        return found_patents
 
-        print(f"   - Found {len(results)} results. Processing top {max_results}...")
+    except Exception as e:
+        logging.error(f"Error during patent search via PatentsView: {e}", exc_info=True)
+        return f"An error occurred during patent search: {e}"
 
-        found_patents = []
-        for result in results[:max_results]:
-            patent_number = result.get("patent_number")
-            patent_url = f"https://patents.google.com/patent/US{patent_number}" if patent_number else None
 
-            found_patents.append({
-                "title": result.get("patent_title"),
-                "patent_number": patent_number,
-                "publication_date": result.get("patent_date"),
-                "abstract": result.get("patent_abstract"),
-                "url": patent_url
-            })
+async def apatent_search(query: str, max_results=3, refresh=False, priority_date=None) -> list:
+    """
+    Async version of patent_search() using the client's pooled async HTTP connections.
+    Takes the same arguments and returns the same values.
+    """
+    # The BM25 query and the SQLite cache tier block, so they run in worker threads: one
+    # blocked call would otherwise stall every analysis sharing the event loop
+    if get_search_backend() == "local":
+        return await asyncio.to_thread(_local_search, query, max_results, priority_date)
+    print("--- TOOL: Executing PatentsView Search API (async) ---")
+    cleaned_query, cache, cache_key, early_result = await asyncio.to_thread(
+        _prepare_search, query, max_results, refresh, priority_date
+    )
+    if early_result is not None:
+        return early_result
 
+    try:
+        with span("patentsview.search", kind="http", query_chars=len(cleaned_query), max_results=max_results, priority_date=priority_date) as current:
+            found_patents = [patent async for patent in aiter_patent_search(cleaned_query, limit=max_results, priority_date=priority_date)]
+            current.set(results=len(found_patents))
+        if not found_patents:
+            return "No patents found for this query on PatentsView."
+        print(f"   - Found {len(found_patents)} results.")
+        if cache is not None:
+            # The cache stores the JSON-friendly dict format
+            await asyncio.to_thread(cache.set, cache_key, [patent.to_dict() for patent in found_patents])
         return found_patents
 
     except Exception as e:
         logging.error(f"Error during patent search via PatentsView: {e}", exc_info=True)
         return f"An error occurred during patent search: {e}"
 
-def final_report(model, invention_text: str, search_results: list) -> str:
+def _merge_results(result_lists: list) -> list:
+    """
+    Merges the result lists of several searches into one list, deduplicated by patent_number.
+    Patents returned by more queries rank first; ties are broken by their best position in any list.
+    """
+    merged = {}
+    for results in result_lists:
+        # patent_search returns an error/info string instead of a list when nothing was found
+        if not isinstance(results, list):
+            continue
+        for position, patent in enumerate(results):
+            key = patent.get("patent_number") or patent.get("title")
+            if key not in merged:
+                merged[key] = {"patent": patent, "hits": 0, "best_position": position, "order": len(merged)}
+            entry = merged[key]
+            entry["hits"] += 1
+            entry["best_position"] = min(entry["best_position"], position)
+
+    ranked = sorted(merged.values(), key=lambda e: (-e["hits"], e["best_position"], e["order"]))
+    return [entry["patent"] for entry in ranked]
+
+
+def multi_search(queries: list, max_results=3, max_concurrency=None, priority_date=None, refresh=False) -> list:
+    """
+    Runs several patent searches concurrently and merges them into one ranked,
+    deduplicated list. Wall-clock time is close to the slowest single query.
+    Args:
+        queries (list): The search query strings, e.g. one per claim-1 feature.
+        max_results (int): Maximum number of patents per query.
+        max_concurrency (int): Maximum number of searches in flight at once.
+            Defaults to the PATENT_SEARCH_CONCURRENCY environment variable (4).
+        priority_date (str): Optional YYYY-MM-DD date passed to every patent_search().
+        refresh (bool): If True, every search bypasses the cache lookup (see patent_search()).
+    Returns:
+        list: The merged results, or an error string if no query returned patents.
+    """
+    queries = [q for q in dict.fromkeys(queries) if q and q.strip()]
+    if not queries:
+        return "Error: No search queries were provided."
+    print(f"--- TOOL: Executing {len(queries)} PatentsView searches concurrently ---")
+
+    if max_concurrency is None:
+        max_concurrency = int(os.environ.get("PATENT_SEARCH_CONCURRENCY", 4))
+    workers = max(1, min(max_concurrency, len(queries)))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Each search runs in a copy of this context so its spans keep the run id
+        futures = [
+            pool.submit(
+                contextvars.copy_context().run, patent_search, q,
+                max_results=max_results, refresh=refresh, priority_date=priority_date,
+            )
+            for q in queries
+        ]
+        result_lists = [f.result() for f in futures]
+
+    merged = _merge_results(result_lists)
+    if not merged:
+        return "No patents found for these queries on PatentsView."
+    print(f"   - Merged {sum(len(r) for r in result_lists if isinstance(r, list))} results into {len(merged)} unique patents.")
+    return merged
+
+
+async def amulti_search(queries: list, max_results=3, max_concurrency=None, priority_date=None, refresh=False) -> list:
+    """
+    Async version of multi_search(); the searches run as coroutines bounded by a semaphore.
+    Takes the same arguments and returns the same values.
+    """
+    queries = [q for q in dict.fromkeys(queries) if q and q.strip()]
+    if not queries:
+        return "Error: No search queries were provided."
+    print(f"--- TOOL: Executing {len(queries)} PatentsView searches concurrently (async) ---")
+
+    if max_concurrency is None:
+        max_concurrency = int(os.environ.get("PATENT_SEARCH_CONCURRENCY", 4))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _bounded_search(q):
+        async with semaphore:
+            return await apatent_search(q, max_results=max_results, refresh=refresh, priority_date=priority_date)
+
+    result_lists = await asyncio.gather(*(_bounded_search(q) for q in queries))
+
+    merged = _merge_results(result_lists)
+    if not merged:
+        return "No patents found for these queries on PatentsView."
+    print(f"   - Merged {sum(len(r) for r in result_lists if isinstance(r, list))} results into {len(merged)} unique patents.")
+    return merged
+
+
+async def agenerate_content(model, prompt: str, span_name="gemini.generate_content", **span_attributes):
+    """
+    Calls the model from a coroutine. Uses the model's native generate_content_async
+    (e.g. the async Gemini client) when available, otherwise runs the blocking
+    generate_content in a worker thread so the event loop is never blocked.
+    The call is traced as an 'llm' span named span_name, with any span_attributes added.
+    """
+    with llm_span(span_name, prompt, **span_attributes) as current:
+        if hasattr(model, "generate_content_async"):
+            response = await model.generate_content_async(prompt)
+        else:
+            response = await asyncio.to_thread(model.generate_content, prompt)
+        current.set(response_chars=len(_chunk_text(response) or ""), cache_hit=isinstance(response, CachedResponse))
+        return response
+
+
+def _build_report_prompt(invention_text: str, search_results):
+    """
+    Builds the final report prompt within the token budget (see prompts/report_builder.py)
+    and logs its size before and after compaction.
+    Returns:
+        tuple: (prompt text, dict of span attributes describing the compaction)
+    """
+    report_prompt = build_report_prompt(invention_text, search_results)
+    print(
+        f"   - Report prompt: ~{report_prompt.raw_tokens} tokens before compaction, ~{report_prompt.tokens} after "
+        f"({report_prompt.references} references, {report_prompt.dropped} dropped)"
+    )
+    return report_prompt.text, {
+        "raw_prompt_tokens": report_prompt.raw_tokens,
+        "references": report_prompt.references,
+        "references_dropped": report_prompt.dropped,
+    }
+
+
+def _chunk_text(chunk) -> str:
+    # Gemini raises ValueError for chunks without text parts (e.g. a finish-reason-only chunk)
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def final_report(model, invention_text: str, search_results: list, on_chunk=None) -> str:
     """
     This tool takes the original invention and the search results,
     then calls the generative AI model with a specific prompt to generate
@@ -125,23 +402,83 @@ def final_report(model, invention_text: str, search_results: list) -> str:
         model: The LLM model to use for report generation
         invention_text (str): The original invention disclosure
         search_results (list): List of prior art found
+        on_chunk: Optional callback receiving each piece of report text as it is
+            generated. When set, the report is generated with streaming.
     Returns:
         str: The generated patentability analysis report
     """
     print("--- TOOL: Executing Final Report Generation ---")
+    final_prompt, prompt_stats = _build_report_prompt(invention_text, search_results)
 
-    # Format search results for the prompt
-    if isinstance(search_results, list):
-        formatted_results = json.dumps(search_results, indent=2)
-    else:
-        formatted_results = str(search_results)
+    print("   - Calling Gemini to write the final analysis...")
+    with llm_span("gemini.report", final_prompt, **prompt_stats) as current:
+        if on_chunk is None:
+            response = model.generate_content(final_prompt)
+            current.set(response_chars=len(response.text or ""), cache_hit=isinstance(response, CachedResponse))
+            return response.text
 
-    # Build the final report prompt
-    final_prompt = prompts.FINAL_REPORT_PROMPT.format(
-        invention_text=invention_text, search_results=formatted_results
-    )
+        start = time.perf_counter()
+        if supports_streaming(model.generate_content):
+            responses = model.generate_content(final_prompt, stream=True)
+        else:
+            # Model cannot stream: deliver the whole report as a single chunk
+            responses = [model.generate_content(final_prompt)]
+
+        parts = []
+        for response in responses:
+            text = _chunk_text(response)
+            if not text:
+                continue
+            if not parts:
+                ttft = time.perf_counter() - start
+                print(f"   - Time to first token: {ttft:.2f}s")
+                current.set(time_to_first_token_ms=round(ttft * 1000, 3), cache_hit=isinstance(response, CachedResponse))
+            parts.append(text)
+            on_chunk(text)
+        report = "".join(parts)
+        current.set(response_chars=len(report), streamed=True)
+        return report
+
+
+async def afinal_report(model, invention_text: str, search_results: list, on_chunk=None) -> str:
+    """
+    Async version of final_report() using the async Gemini client.
+    Takes the same arguments and returns the same value.
+    """
+    print("--- TOOL: Executing Final Report Generation (async) ---")
+    final_prompt, prompt_stats = _build_report_prompt(invention_text, search_results)
 
     print("   - Calling Gemini to write the final analysis...")
-    report = model.generate_content(final_prompt).text
+    if on_chunk is None:
+        response = await agenerate_content(model, final_prompt, span_name="gemini.report", **prompt_stats)
+        return response.text
+
+    with llm_span("gemini.report", final_prompt, **prompt_stats) as current:
+        start = time.perf_counter()
+        parts = []
+
+        def _emit(text, response):
+            if not parts:
+                ttft = time.perf_counter() - start
+                print(f"   - Time to first token: {ttft:.2f}s")
+                current.set(time_to_first_token_ms=round(ttft * 1000, 3), cache_hit=isinstance(response, CachedResponse))
+            parts.append(text)
+            on_chunk(text)
 
-    return report
\ No newline at end of file
+        if hasattr(model, "generate_content_async") and supports_streaming(model.generate_content_async):
+            response = await model.generate_content_async(final_prompt, stream=True)
+            async for chunk in response:
+                text = _chunk_text(chunk)
+                if text:
+                    _emit(text, chunk)
+        else:
+            # Model cannot stream: deliver the whole report as a single chunk
+            if hasattr(model, "generate_content_async"):
+                response = await model.generate_content_async(final_prompt)
+            else:
+                response = await asyncio.to_thread(model.generate_content, final_prompt)
+            if response.text:
+                _emit(response.text, response)
+        report = "".join(parts)
+        current.set(response_chars=len(report), streamed=True)
+        return report
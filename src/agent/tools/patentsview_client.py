@@ -0,0 +1,342 @@
+# src/tools/patentsview_client.py
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+import tenacity
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, ReadTimeout, ConnectTimeout, HTTPError
+
+from ..limits.rate_limiter import get_limiter
+from ..tracing.tracer import record_retry
+
+DEFAULT_BASE_URL = "https://search.patentsview.org/api/v1"
+
+# Largest page the PatentsView API serves
+MAX_PAGE_SIZE = 1000
+
+
+def _should_retry_http_error(exception):
+    """
+    Return True if the HTTPError is a temporary server error worth retrying.
+    Used by tenacity for retry logic on network errors.
+    """
+    return isinstance(exception, HTTPError) and exception.response.status_code in [
+        502,
+        503,
+        504,
+    ]
+
+
+def _should_retry_async_error(exception):
+    """
+    Return True if an httpx error raised by the async client is worth retrying,
+    mirroring the sync retry policy.
+    """
+    if isinstance(exception, (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError)):
+        return True
+    return isinstance(exception, httpx.HTTPStatusError) and exception.response.status_code in [
+        502,
+        503,
+        504,
+    ]
+
+
+_log_retry = tenacity.before_sleep_log(logging.getLogger(__name__), logging.INFO)
+
+
+def _before_retry(retry_state):
+    """Logs a retry and counts it in the tracing metrics and the current span."""
+    _log_retry(retry_state)
+    record_retry("patentsview")
+
+
+class PatentsViewClient:
+    """
+    A reusable PatentsView API client that owns a connection-pooled requests.Session,
+    so consecutive searches reuse keep-alive TCP/TLS connections instead of reconnecting.
+    A single instance is safe to share across threads. Coroutines use asearch_patents(),
+    which is backed by one pooled httpx.AsyncClient per event loop.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        base_url=DEFAULT_BASE_URL,
+        pool_connections=4,
+        pool_maxsize=16,
+        pool_block=False,
+        connect_timeout=5.0,
+        read_timeout=20.0,
+    ):
+        """
+        Args:
+            api_key (str): PatentsView API key. If None, PATENTSVIEW_API_KEY is read at request time.
+            base_url (str): Base URL of the PatentsView search API.
+            pool_connections (int): Number of per-host connection pools to keep.
+            pool_maxsize (int): Maximum number of kept-alive connections per host.
+            pool_block (bool): If True, block when all pooled connections to a host are in use.
+            connect_timeout (float): Seconds to wait for a connection to be established.
+            read_timeout (float): Seconds to wait for the server to send a response.
+        """
+        self._api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_maxsize = pool_maxsize
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Creates a client configured from environment variables:
+        PATENTSVIEW_BASE_URL, PATENTSVIEW_POOL_CONNECTIONS, PATENTSVIEW_POOL_MAXSIZE,
+        PATENTSVIEW_POOL_BLOCK, PATENTSVIEW_CONNECT_TIMEOUT and PATENTSVIEW_READ_TIMEOUT.
+        """
+        return cls(
+            base_url=os.environ.get("PATENTSVIEW_BASE_URL", DEFAULT_BASE_URL),
+            pool_connections=int(os.environ.get("PATENTSVIEW_POOL_CONNECTIONS", 4)),
+            pool_maxsize=int(os.environ.get("PATENTSVIEW_POOL_MAXSIZE", 16)),
+            pool_block=os.environ.get("PATENTSVIEW_POOL_BLOCK", "0") == "1",
+            connect_timeout=float(os.environ.get("PATENTSVIEW_CONNECT_TIMEOUT", 5)),
+            read_timeout=float(os.environ.get("PATENTSVIEW_READ_TIMEOUT", 20)),
+        )
+
+    @property
+    def api_key(self):
+        return self._api_key or os.environ.get("PATENTSVIEW_API_KEY")
+
+    # Retry transient network errors and temporary server errors
+    @tenacity.retry(
+        retry=(
+            tenacity.retry_if_exception_type((ConnectionError, ReadTimeout, ConnectTimeout))
+            | tenacity.retry_if_exception(_should_retry_http_error)
+        ),
+        wait=tenacity.wait_exponential(multiplier=1, min=2, max=30),
+        stop=tenacity.stop_after_attempt(3),
+        reraise=True,
+        before_sleep=_before_retry,
+    )
+    def search_patents(self, query: dict, fields: list, options: dict, sort=None) -> dict:
+        """
+        Calls the /patent endpoint.
+        Args:
+            query (dict): The PatentsView query object ('q').
+            fields (list): The fields to return ('f').
+            options (dict): Paging and other options ('o').
+            sort (list): Optional sort order ('s'), e.g. [{"patent_number": "asc"}].
+        Returns:
+            dict: The decoded JSON response.
+        """
+        # Every attempt, including retries, counts against the shared PatentsView budget
+        with get_limiter("patentsview").limit():
+            response = self.session.get(
+                f"{self.base_url}/patent",
+                params=_params(query, fields, options, sort),
+                headers={"X-Api-Key": self.api_key or ""},
+                timeout=self.timeout,
+            )
+        response.raise_for_status()
+        return response.json()
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # httpx connection pools are bound to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            connect_timeout, read_timeout = self.timeout
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_maxsize,
+                    max_keepalive_connections=self.pool_maxsize,
+                ),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    @tenacity.retry(
+        retry=tenacity.retry_if_exception(_should_retry_async_error),
+        wait=tenacity.wait_exponential(multiplier=1, min=2, max=30),
+        stop=tenacity.stop_after_attempt(3),
+        reraise=True,
+        before_sleep=_before_retry,
+    )
+    async def asearch_patents(self, query: dict, fields: list, options: dict, sort=None) -> dict:
+        """
+        Async version of search_patents() for use from coroutines.
+        Returns:
+            dict: The decoded JSON response.
+        """
+        async with get_limiter("patentsview").alimit():
+            response = await self._get_async_client().get(
+                f"{self.base_url}/patent",
+                params=_params(query, fields, options, sort),
+                headers={"X-Api-Key": self.api_key or ""},
+            )
+        response.raise_for_status()
+        return response.json()
+
+    def iter_patents(self, query: dict, fields: list, page_size=100, limit=None, sort_field="patent_number", prefetch=True):
+        """
+        Yields the patents matching a query one by one, following the PatentsView 'after' cursor
+        from page to page. Pages are only requested as the consumer gets to them, and while one
+        page is being consumed the next is fetched on a background thread. At most two pages are
+        held at a time, however many patents match. Closing the generator stops the paging.
+        Args:
+            query (dict): The PatentsView query object ('q').
+            fields (list): The fields to return; sort_field is added if missing and the
+                results span more than one page.
+            page_size (int): Patents per request (at most MAX_PAGE_SIZE).
+            limit (int): Maximum number of patents to yield; None follows the cursor to the end.
+            sort_field (str): Unique field the results are sorted and paged by when they span
+                more than one page. A limit that fits in one page keeps the API's own order.
+            prefetch (bool): Fetch the next page while the current one is consumed.
+        """
+        pager = _Pager(fields, page_size, limit, sort_field)
+        fetch = lambda after, size: self.search_patents(query, pager.fields, pager.options(after, size), sort=pager.sort)
+        # A thread is only started once a second page is needed
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="patentsview-prefetch") if prefetch else None
+        pending = None
+        try:
+            page = fetch(None, pager.first_size)
+            while True:
+                patents, cursor = pager.take(page)
+                if cursor is not None and executor is not None:
+                    # The copied context keeps the prefetch in the caller's tracing run
+                    pending = executor.submit(contextvars.copy_context().run, fetch, *cursor)
+                yield from patents
+                if cursor is None:
+                    return
+                page = pending.result() if pending is not None else fetch(*cursor)
+                pending = None
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aiter_patents(self, query: dict, fields: list, page_size=100, limit=None, sort_field="patent_number", prefetch=True):
+        """
+        Async generator version of iter_patents(); the next page is prefetched as a task.
+        Takes the same arguments.
+        """
+        pager = _Pager(fields, page_size, limit, sort_field)
+        fetch = lambda after, size: self.asearch_patents(query, pager.fields, pager.options(after, size), sort=pager.sort)
+        pending = None
+        try:
+            page = await fetch(None, pager.first_size)
+            while True:
+                patents, cursor = pager.take(page)
+                if cursor is not None and prefetch:
+                    pending = asyncio.ensure_future(fetch(*cursor))
+                for patent in patents:
+                    yield patent
+                if cursor is None:
+                    return
+                page = await (pending if pending is not None else fetch(*cursor))
+                pending = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def aclose(self):
+        """Closes the async connection pool of the running event loop."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        """Closes all pooled connections."""
+        self.session.close()
+
+
+def _params(query: dict, fields: list, options: dict, sort=None) -> dict:
+    params = {
+        "q": json.dumps(query),
+        "f": json.dumps(fields),
+        "o": json.dumps(options),
+    }
+    if sort:
+        params["s"] = json.dumps(sort)
+    return params
+
+
+class _Pager:
+    """Cursor bookkeeping shared by iter_patents() and aiter_patents()."""
+
+    def __init__(self, fields, page_size, limit, sort_field):
+        self.sort_field = sort_field
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        self.remaining = limit
+        self.first_size = self._size()
+        if limit is not None and limit <= self.page_size:
+            # A single page: keep the API's relevance order, as before cursor paging
+            self.fields, self.sort = list(fields), None
+        else:
+            # The cursor needs a stable order over a unique field
+            self.fields = list(fields) if sort_field in fields else [*fields, sort_field]
+            self.sort = [{sort_field: "asc"}]
+
+    def _size(self):
+        return self.page_size if self.remaining is None else min(self.page_size, self.remaining)
+
+    @staticmethod
+    def options(after, size) -> dict:
+        options = {"size": size}
+        if after is not None:
+            options["after"] = after
+        return options
+
+    def take(self, page: dict):
+        """
+        Returns the patents of a page to yield and the (after, size) cursor of the next page,
+        or None when this was the last page or the limit is reached.
+        """
+        patents = page.get("patents") or []
+        requested = self._size()
+        if self.remaining is not None:
+            patents = patents[:self.remaining]
+            self.remaining -= len(patents)
+        # A short page is the last one
+        if not patents or len(page.get("patents") or []) < requested or self.remaining == 0:
+            return patents, None
+        return patents, (patents[-1].get(self.sort_field), self._size())
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_patentsview_client() -> PatentsViewClient:
+    """
+    Returns the process-wide PatentsView client shared by all patent tools,
+    creating it from environment variables on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PatentsViewClient.from_env()
+        return _client
+
+
+def set_patentsview_client(client: PatentsViewClient):
+    """Replaces the process-wide PatentsView client, closing the previous one."""
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
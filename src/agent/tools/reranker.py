@@ -0,0 +1,271 @@
+# src/tools/reranker.py
+"""
+Re-ranks over-fetched patent search candidates by cosine similarity to the claim text.
+
+Searches fetch PATENT_RERANK_CANDIDATES results per query instead of the final top-k; the
+candidates are embedded, scored against the claim with one batched matrix product, and only the
+best top-k are passed on to the final report. Candidate embeddings are cached per patent_number
+in a float32 memory-mapped matrix, so a patent is embedded once no matter how often it comes back.
+"""
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: the store is then only safe within one process
+    fcntl = None
+
+from .local_index import tokenize
+
+DEFAULT_STORE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "embeddings"
+)
+
+# Number of results kept after re-ranking when the caller does not ask for a specific count
+DEFAULT_TOP_K = 3
+
+
+def _patent_text(patent: dict) -> str:
+    return f"{patent.get('title') or ''} {patent.get('abstract') or ''}"
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder: unigrams and bigrams are hashed into `dim` signed
+    buckets, log-scaled and L2-normalized. Needs no model download or API call.
+
+    Any object with `name`, `dim` and `embed(texts) -> np.ndarray` (rows L2-normalized)
+    can be used instead, e.g. a wrapper around a hosted embedding model.
+    """
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list:
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: list) -> np.ndarray:
+        """Returns a (len(texts), dim) float32 matrix of unit-length rows."""
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 is stable across processes, unlike hash()
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                cols.append(h % self.dim)
+                signs.append(1.0 if (h >> 31) & 1 else -1.0)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), signs)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class EmbeddingStore:
+    """
+    Append-only cache of embeddings keyed by patent_number. Vectors live in a raw float32 file
+    read through np.memmap and keys in a parallel text file, one per row.
+    Thread-safe, and on POSIX also safe to share between processes: writes take an exclusive
+    lock on a lock file and first catch up with the rows other processes appended.
+    """
+
+    def __init__(self, directory: str, dim: int):
+        self.dim = dim
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._keys_path = os.path.join(directory, "keys.txt")
+        self._lock_path = os.path.join(directory, "store.lock")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._count = 0
+        self._keys_bytes = 0  # Length of the keys file prefix already loaded into _rows
+        self._rows = {}
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        with self._lock, self._file_lock():
+            self._load()
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self):
+        # Catches up with the rows appended since the last load, by this or another process.
+        # Called with both locks held, so no writer is between the two writes of add().
+        lines = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "rb") as f:
+                f.seek(self._keys_bytes)
+                lines = f.read().split(b"\n")[:-1]  # Without an unterminated last line
+        stored_rows = os.path.getsize(self._vectors_path) // (4 * self.dim) if os.path.exists(self._vectors_path) else 0
+        lines = lines[:max(0, stored_rows - self._count)]
+        self._keys_bytes += sum(len(line) + 1 for line in lines)
+        if os.path.exists(self._keys_path) and os.path.getsize(self._keys_path) > self._keys_bytes:
+            # A crash between the two writes in add() left the keys file ahead of the vectors
+            with open(self._keys_path, "r+b") as f:
+                f.truncate(self._keys_bytes)
+        for line in lines:
+            self._rows.setdefault(line.decode("utf-8").rstrip("\r"), self._count)
+            self._count += 1
+        if lines:
+            self._remap()
+
+    def _remap(self):
+        self._matrix = (
+            np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._count, self.dim))
+            if self._count else np.zeros((0, self.dim), dtype=np.float32)
+        )
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, keys: list):
+        """
+        Returns (rows, missing): the row index of each stored key (-1 if missing)
+        and the list of keys that are not stored yet.
+        """
+        with self._lock:
+            rows = np.array([self._rows.get(k, -1) for k in keys], dtype=np.int64)
+        missing = [k for k, row in zip(keys, rows) if row < 0]
+        return rows, missing
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        with self._lock:
+            return np.asarray(self._matrix[rows])
+
+    def add(self, keys: list, vectors: np.ndarray):
+        """Appends embeddings for keys that are not stored yet."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            self._load()
+            new = [(k, v) for k, v in zip(keys, vectors) if k not in self._rows]
+            new = list(dict((k, v) for k, v in new).items())
+            if not new:
+                return
+            # Truncate any partial tail left by an interrupted write before appending
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(self._count * self.dim * 4)
+                f.write(np.stack([v for _, v in new]).tobytes())
+            lines = "".join(f"{k}\n" for k, _ in new)
+            with open(self._keys_path, "a", encoding="utf-8", newline="\n") as f:
+                f.write(lines)
+            self._keys_bytes += len(lines.encode("utf-8"))
+            for key, _ in new:
+                self._rows[key] = self._count
+                self._count += 1
+            self._remap()
+
+
+class Reranker:
+    """Scores candidate patents against a claim and keeps the most similar ones."""
+
+    def __init__(self, embedder=None, store=None):
+        """
+        Args:
+            embedder: Defaults to HashingEmbedder().
+            store (EmbeddingStore): Embedding cache, or None to embed candidates on every call.
+        """
+        self.embedder = embedder or HashingEmbedder()
+        self.store = store
+
+    def _candidate_vectors(self, candidates: list) -> np.ndarray:
+        keys = [str(p.get("patent_number") or "") for p in candidates]
+        if self.store is None:
+            return self.embedder.embed([_patent_text(p) for p in candidates])
+
+        cacheable = [k for k in keys if k]
+        rows, missing = self.store.lookup(cacheable)
+        if missing:
+            texts = {str(p.get("patent_number")): _patent_text(p) for p in candidates if p.get("patent_number")}
+            self.store.add(missing, self.embedder.embed([texts[k] for k in missing]))
+            rows, _ = self.store.lookup(cacheable)
+
+        matrix = np.empty((len(candidates), self.embedder.dim), dtype=np.float32)
+        has_key = np.array([bool(k) for k in keys])
+        if has_key.any():
+            matrix[has_key] = self.store.vectors(rows)
+        if not has_key.all():
+            uncached = [p for p, k in zip(candidates, keys) if not k]
+            matrix[~has_key] = self.embedder.embed([_patent_text(p) for p in uncached])
+        return matrix
+
+    def rerank(self, claim_text: str, candidates: list, top_k=DEFAULT_TOP_K, min_score=None) -> list:
+        """
+        Returns the top_k candidates ordered by cosine similarity to claim_text.
+        Ties keep the original search order. With min_score, less similar candidates are dropped.
+        """
+        if not candidates:
+            return []
+        claim = self.embedder.embed([claim_text])[0]
+        scores = self._candidate_vectors(candidates) @ claim
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        if min_score is not None:
+            order = order[scores[order] >= min_score]
+        return [candidates[i] for i in order]
+
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+
+def rerank_enabled() -> bool:
+    """Re-ranking is on unless PATENT_RERANK=0."""
+    return os.environ.get("PATENT_RERANK", "1") != "0"
+
+
+def candidate_count(top_k=DEFAULT_TOP_K) -> int:
+    """Number of results to fetch per search so top_k survive re-ranking (PATENT_RERANK_CANDIDATES, default 25)."""
+    if not rerank_enabled():
+        return top_k
+    return max(top_k, int(os.environ.get("PATENT_RERANK_CANDIDATES", 25)))
+
+
+def get_reranker() -> Reranker:
+    """
+    Returns the process-wide re-ranker, creating it on first use. Embeddings are cached under
+    PATENT_RERANK_STORE (default src/data/embeddings; empty for no cache) in one subdirectory
+    per embedder, with PATENT_RERANK_DIM dimensions (default 512).
+    """
+    global _reranker
+    with _reranker_lock:
+        if _reranker is None:
+            embedder = HashingEmbedder(dim=int(os.environ.get("PATENT_RERANK_DIM", 512)))
+            store_dir = os.environ.get("PATENT_RERANK_STORE", DEFAULT_STORE_DIR)
+            store = EmbeddingStore(os.path.join(store_dir, embedder.name), embedder.dim) if store_dir else None
+            _reranker = Reranker(embedder, store)
+        return _reranker
+
+
+def set_reranker(reranker):
+    """Replaces the process-wide re-ranker, e.g. with one using a different embedder."""
+    global _reranker
+    with _reranker_lock:
+        _reranker = reranker
+
+
+def rerank_results(claim_text: str, results, top_k=DEFAULT_TOP_K, min_score=None):
+    """
+    Re-ranks search results against the claim when re-ranking is enabled, otherwise just cuts them
+    to top_k. Error strings returned by the search tools are passed through unchanged.
+    min_score (a cosine similarity) drops weakly related results; it only applies when re-ranking.
+    """
+    if not isinstance(results, list):
+        return results
+    if not rerank_enabled() or not claim_text or not results:
+        return results[:top_k]
+    print(f"   - Re-ranking {len(results)} candidates against the claim...")
+    return get_reranker().rerank(claim_text, results, top_k, min_score=min_score)
@@ -0,0 +1,103 @@
+# src/tracing/metrics.py
+"""
+Prometheus metrics for the agent, served by the web app's /metrics endpoint.
+
+Metrics live in a dedicated registry (not prometheus_client's global one), so importing
+this module more than once, e.g. as both 'src.agent...' and 'agent...', never registers
+duplicate collectors.
+"""
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REGISTRY = CollectorRegistry()
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_TOKEN_BUCKETS = (100, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+SPAN_DURATION = Histogram(
+    "claimforge_span_duration_seconds",
+    "Duration of traced graph nodes and external calls.",
+    ["kind", "name"],
+    buckets=_DURATION_BUCKETS,
+    registry=REGISTRY,
+)
+SPAN_ERRORS = Counter(
+    "claimforge_span_errors_total",
+    "Traced graph nodes and external calls that raised an exception.",
+    ["kind", "name"],
+    registry=REGISTRY,
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "claimforge_llm_prompt_tokens",
+    "Estimated prompt size of LLM calls.",
+    ["name"],
+    buckets=_TOKEN_BUCKETS,
+    registry=REGISTRY,
+)
+LLM_RESPONSE_TOKENS = Histogram(
+    "claimforge_llm_response_tokens",
+    "Estimated response size of LLM calls.",
+    ["name"],
+    buckets=_TOKEN_BUCKETS,
+    registry=REGISTRY,
+)
+RETRIES = Counter(
+    "claimforge_retries_total",
+    "Retried external calls.",
+    ["name"],
+    registry=REGISTRY,
+)
+COALESCED_REQUESTS = Counter(
+    "claimforge_coalesced_requests_total",
+    "Requests by coalescing outcome: executed (ran the work), coalesced (joined an identical "
+    "in-flight request) or cached (served a recent identical result).",
+    ["name", "outcome"],
+    registry=REGISTRY,
+)
+CACHE_LOOKUPS = Counter(
+    "claimforge_cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"],
+    registry=REGISTRY,
+)
+
+
+class _RateLimiterCollector:
+    """Exports the shared rate limiters' queue depth, in-flight calls and wait time at scrape time."""
+
+    def collect(self):
+        # Imported here: the rate limiter imports the caches, which import this module
+        from ..limits.rate_limiter import limiter_metrics
+
+        queue_depth = GaugeMetricFamily(
+            "claimforge_rate_limiter_queue_depth", "Calls waiting for rate limit budget.", labels=["api"]
+        )
+        in_flight = GaugeMetricFamily(
+            "claimforge_rate_limiter_in_flight", "Calls currently holding a rate limiter slot.", labels=["api"]
+        )
+        acquired = CounterMetricFamily(
+            "claimforge_rate_limiter_acquired", "Calls admitted by the rate limiter.", labels=["api"]
+        )
+        waited = CounterMetricFamily(
+            "claimforge_rate_limiter_wait_seconds", "Total time calls spent waiting for budget.", labels=["api"]
+        )
+        for m in limiter_metrics():
+            queue_depth.add_metric([m["name"]], m["queue_depth"])
+            in_flight.add_metric([m["name"]], m["in_flight"])
+            acquired.add_metric([m["name"]], m["acquired_total"])
+            waited.add_metric([m["name"]], m["wait_seconds_total"])
+        yield from (queue_depth, in_flight, acquired, waited)
+
+
+REGISTRY.register(_RateLimiterCollector())
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_metrics() -> bytes:
+    """Returns all metrics in the Prometheus text exposition format."""
+    return generate_latest(REGISTRY)
@@ -0,0 +1,187 @@
+# src/tracing/tracer.py
+"""
+Lightweight tracing for the patent workflow.
+
+Each graph node and external call (Gemini, PatentsView, the local index) runs inside a span.
+A finished span is written as one JSON line to the 'claimforge.trace' logger and feeds the
+Prometheus metrics in metrics.py. Spans carry the run id of the agent run they belong to,
+held in a context variable so it follows the run across coroutines and asyncio.to_thread.
+
+Configuration: TRACE_LOG=0 disables the JSON span logs (metrics are still recorded) and
+TRACE_LOG_PATH writes them to a file instead of stderr.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from ..utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+from . import metrics
+
+logger = logging.getLogger("claimforge.trace")
+
+_run_id = contextvars.ContextVar("claimforge_run_id", default=None)
+_current_span = contextvars.ContextVar("claimforge_span", default=None)
+
+_logging_configured = False
+_logging_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON, merging in the dict passed as extra={'fields': ...}."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+def _configure_logging():
+    global _logging_configured
+    with _logging_lock:
+        if _logging_configured:
+            return
+        _logging_configured = True
+        if os.environ.get("TRACE_LOG", "1") == "0":
+            logger.disabled = True
+            return
+        if not logger.handlers:
+            path = os.environ.get("TRACE_LOG_PATH")
+            handler = logging.FileHandler(path) if path else logging.StreamHandler()
+            handler.setFormatter(JsonFormatter())
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_run_id():
+    """Returns the run id of the current agent run, or None outside of a run."""
+    return _run_id.get()
+
+
+@contextmanager
+def run_context(run_id=None):
+    """Sets the run id for spans created inside the block. Yields the run id."""
+    run_id = run_id or new_run_id()
+    token = _run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _run_id.reset(token)
+
+
+class Span:
+    """A timed operation. Attributes set on it end up in its JSON log line."""
+
+    def __init__(self, name: str, kind: str, attributes: dict):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:8]
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+@contextmanager
+def span(name: str, kind="internal", **attributes):
+    """
+    Traces the block as a span.
+    Args:
+        name (str): Span name, e.g. 'search' or 'patentsview.search'.
+        kind (str): 'node', 'llm', 'http', 'index' or 'internal'; a metrics label.
+        **attributes: Initial attributes, e.g. query sizes.
+    Yields:
+        Span: Call span.set(...) to add attributes such as response sizes or cache hits.
+    """
+    _configure_logging()
+    current = Span(name, kind, attributes)
+    token = _current_span.set(current)
+    status = "ok"
+    try:
+        yield current
+    except BaseException as e:
+        status = "error"
+        current.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        duration = time.perf_counter() - current.start
+        metrics.SPAN_DURATION.labels(kind=kind, name=name).observe(duration)
+        if status == "error":
+            metrics.SPAN_ERRORS.labels(kind=kind, name=name).inc()
+        logger.info(
+            "span",
+            extra={"fields": {
+                "run_id": _run_id.get(),
+                "span": name,
+                "kind": kind,
+                "span_id": current.span_id,
+                "parent_id": current.parent_id,
+                "duration_ms": round(duration * 1000, 3),
+                "status": status,
+                **current.attributes,
+            }},
+        )
+
+
+@contextmanager
+def llm_span(name: str, prompt: str, **attributes):
+    """
+    Span for an LLM call that records the prompt size, plus any initial attributes. Callers report
+    the response with span.set(response_chars=..., cache_hit=...); the token histograms are updated on exit.
+    """
+    prompt_tokens = estimate_tokens(prompt)
+    with span(name, kind="llm", prompt_chars=len(prompt), prompt_tokens=prompt_tokens, **attributes) as current:
+        try:
+            yield current
+        finally:
+            metrics.LLM_PROMPT_TOKENS.labels(name=name).observe(prompt_tokens)
+            response_chars = current.attributes.get("response_chars")
+            if response_chars is not None:
+                response_tokens = response_chars // CHARS_PER_TOKEN
+                current.set(response_tokens=response_tokens)
+                metrics.LLM_RESPONSE_TOKENS.labels(name=name).observe(response_tokens)
+
+
+def record_retry(name: str):
+    """Counts a retry of an external call and adds it to the current span's 'retries'."""
+    metrics.RETRIES.labels(name=name).inc()
+    current = _current_span.get()
+    if current is not None:
+        current.set(retries=current.attributes.get("retries", 0) + 1)
+
+
+def traced_node(name: str, node):
+    """Wraps a sync or async LangGraph node function so each invocation runs in a 'node' span."""
+    if asyncio.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def _async_node(state, config):
+            with span(name, kind="node"):
+                return await node(state, config)
+        return _async_node
+
+    @functools.wraps(node)
+    def _node(state, config):
+        with span(name, kind="node"):
+            return node(state, config)
+    return _node
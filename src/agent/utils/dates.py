@@ -0,0 +1,52 @@
+# src/utils/dates.py
+import re
+from datetime import datetime
+
+# "Priority Date: 2019-03-14", "priority date - March 14, 2019", ...
+_PRIORITY_DATE_RE = re.compile(r"priority\s+date\s*[:\-]?\s*([^\n]+)", re.IGNORECASE)
+
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%B %d, %Y", "%B %d %Y", "%b %d, %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y")
+
+
+def parse_date(text: str):
+    """
+    Parses a date written in one of the common formats (ISO, US numeric, or with a month name).
+    Returns:
+        str: The date as YYYY-MM-DD, or None if the text is not a recognized date.
+    """
+    text = " ".join((text or "").replace(".", " ").split()).rstrip(",;")
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_priority_date(disclosure: str):
+    """
+    Finds the 'Priority Date: ...' line of an invention disclosure.
+    Returns:
+        str: The priority date as YYYY-MM-DD, or None if the disclosure states none.
+    """
+    match = _PRIORITY_DATE_RE.search(disclosure or "")
+    if not match:
+        return None
+    # The date may be followed by a note, e.g. "2019-03-14 (US provisional)"
+    words = match.group(1).split()
+    for count in range(min(len(words), 3), 0, -1):
+        date = parse_date(" ".join(words[:count]))
+        if date:
+            return date
+    return None
+
+
+def before_priority_date(patents: list, priority_date) -> list:
+    """
+    Keeps the patents published before the priority date, i.e. those that can count as prior art.
+    Patents without a publication date are dropped too, matching the PatentsView date filter.
+    Returns the list unchanged when priority_date is None.
+    """
+    if not priority_date:
+        return patents
+    return [p for p in patents if p.get("publication_date") and p["publication_date"] < priority_date]
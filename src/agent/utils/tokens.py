@@ -0,0 +1,20 @@
+# src/utils/tokens.py
+import math
+
+# Rough average for English prose with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text) -> int:
+    """
+    Estimates the number of LLM tokens in a piece of text without calling the API.
+    Args:
+        text: A string, or any object (converted with str()).
+    Returns:
+        int: The estimated token count.
+    """
+    if not text:
+        return 0
+    if not isinstance(text, str):
+        text = str(text)
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
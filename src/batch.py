@@ -0,0 +1,228 @@
+# batch.py
+"""
+Batch mode: analyzes many invention disclosures in parallel.
+
+    python -m src.batch disclosures/ --output results.jsonl --workers 8
+    python -m src.batch manifest.jsonl --output results.jsonl --mode process
+
+The input is either a directory of .txt disclosures (the file name is the id) or a JSONL
+manifest whose lines hold an "id" and either the "text" or a "path" to it. Each result is
+appended to the output JSONL as soon as it finishes. The output doubles as the checkpoint:
+re-running the same command after a crash skips every id that already has a result line.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from .agent.GeminiPatentAgent import GeminiPatentAgent
+from .main import create_model, read_invention_disclosure
+
+# Stage boundaries: a stage ends at its event and starts where the previous stage ended. The agent
+# plans and searches several times per run, so each stage's time is summed over its iterations.
+STAGE_EVENTS = {"llm_done": "llm", "search_done": "search", "report_done": "report"}
+
+# The agent of this worker process (or of the whole batch in thread mode)
+_agent = None
+
+
+def _init_worker(slots=None):
+    global _agent
+    if slots is not None:
+        from .agent.tools.reranker import DEFAULT_STORE_DIR  # numpy; keep it out of the CLI's startup
+        # Process mode: each worker caches embeddings in its own re-ranker store, numbered by
+        # worker slot so the next batch reuses the same directories
+        with slots.get_lock():
+            slot = slots.value
+            slots.value += 1
+        store_dir = os.environ.get("PATENT_RERANK_STORE", DEFAULT_STORE_DIR)
+        if store_dir:
+            os.environ["PATENT_RERANK_STORE"] = os.path.join(store_dir, f"worker-{slot}")
+    _agent = GeminiPatentAgent(create_model())
+
+
+def load_disclosures(source: str) -> list:
+    """
+    Reads the disclosures to analyze.
+    Args:
+        source (str): A directory of .txt files or a JSONL manifest.
+    Returns:
+        list: (id, text) tuples, in file name or manifest order.
+    """
+    if os.path.isdir(source):
+        items = []
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".txt"):
+                items.append((os.path.splitext(name)[0], read_invention_disclosure(os.path.join(source, name))))
+        return items
+
+    items = []
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            text = entry.get("text")
+            if text is None and entry.get("path"):
+                text = read_invention_disclosure(os.path.join(base_dir, entry["path"]))
+            items.append((str(entry.get("id", line_number)), text))
+    return items
+
+
+def load_checkpoint(output_path: str, retry_failed=False) -> set:
+    """
+    Returns the ids that already have a result in the output file. A line cut off by a crash is ignored.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get("status") == "ok" or not retry_failed:
+                done.add(result.get("id"))
+    return done
+
+
+def analyze_disclosure(item) -> dict:
+    """
+    Worker task: runs the agent on one disclosure and times each stage from its progress events.
+    Returns:
+        dict: The result line: id, status, report or error, and timings in seconds.
+    """
+    disclosure_id, text = item
+    result = {"id": disclosure_id, "pid": os.getpid()}
+    if not text:
+        return {**result, "status": "error", "error": "Disclosure is empty or could not be read."}
+
+    start = previous = time.perf_counter()
+    stages = {}
+    for event, data in _agent.stream(text):
+        stage = STAGE_EVENTS.get(event)
+        if stage is not None:
+            now = time.perf_counter()
+            stages[stage] = stages.get(stage, 0.0) + now - previous
+            previous = now
+        if event == "done":
+            result.update(status="ok", report=data["response"])
+        elif event == "error":
+            result.update(status="error", error=data["error"])
+
+    result["stages"] = stages
+    result["duration"] = time.perf_counter() - start
+    return result
+
+
+def _percentiles(values: list) -> dict:
+    import numpy as np
+
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"count": len(values), "p50": p50, "p90": p90, "p99": p99, "max": max(values)}
+
+
+def summarize(results: list, wall_seconds: float) -> dict:
+    """Computes throughput and per-stage latency percentiles for the results of this run."""
+    summary = {
+        "completed": len(results),
+        "failed": sum(1 for r in results if r.get("status") != "ok"),
+        "wall_seconds": wall_seconds,
+        "per_minute": len(results) / wall_seconds * 60 if wall_seconds else 0.0,
+        "latency": {},
+    }
+    durations = [r["duration"] for r in results if "duration" in r]
+    if durations:
+        summary["latency"]["total"] = _percentiles(durations)
+    for stage in STAGE_EVENTS.values():
+        values = [r["stages"][stage] for r in results if stage in r.get("stages", {})]
+        if values:
+            summary["latency"][stage] = _percentiles(values)
+    return summary
+
+
+def print_summary(summary: dict):
+    print("\n=== Batch Summary ===")
+    print(f"   - Completed: {summary['completed']} ({summary['failed']} failed) in {summary['wall_seconds']:.1f}s")
+    print(f"   - Throughput: {summary['per_minute']:.1f} disclosures/minute")
+    for stage, stats in summary["latency"].items():
+        print(
+            f"   - {stage:<7} p50 {stats['p50']:.2f}s  p90 {stats['p90']:.2f}s  "
+            f"p99 {stats['p99']:.2f}s  max {stats['max']:.2f}s  (n={stats['count']})"
+        )
+
+
+def run_batch(source: str, output_path: str, workers=4, mode="thread", retry_failed=False) -> dict:
+    """
+    Analyzes every disclosure in source that has no result in output_path yet.
+    Args:
+        source (str): A directory of .txt files or a JSONL manifest.
+        output_path (str): JSONL file the results are appended to.
+        workers (int): Number of disclosures analyzed concurrently.
+        mode (str): 'thread' to share one agent across threads, or 'process' for one agent per process.
+        retry_failed (bool): Re-run disclosures whose earlier result was an error.
+    Returns:
+        dict: The summary printed at the end.
+    """
+    if mode not in ("thread", "process"):
+        raise ValueError(f"Unknown batch mode: {mode!r}")
+    items = load_disclosures(source)
+    done = load_checkpoint(output_path, retry_failed=retry_failed)
+    pending = [item for item in items if item[0] not in done]
+    print(f"--- Batch: {len(items)} disclosures, {len(items) - len(pending)} already done, {len(pending)} to run ---")
+
+    if mode == "thread":
+        _init_worker()
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(multiprocessing.Value("i", 0),)
+        )
+
+    results = []
+    start = time.perf_counter()
+    with executor, open(output_path, "a+", encoding="utf-8") as out:
+        # Terminate a line cut off by a crash so the next result starts on its own line
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+        futures = {executor.submit(analyze_disclosure, item): item[0] for item in pending}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"id": futures[future], "status": "error", "error": str(e)}
+            results.append(result)
+            # One flushed line per result, so a crash loses at most the runs still in flight
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            print(f"   - [{len(results)}/{len(pending)}] {result['id']}: {result['status']}")
+
+    summary = summarize(results, time.perf_counter() - start)
+    print_summary(summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many invention disclosures in parallel.")
+    parser.add_argument("source", help="Directory of .txt disclosures or a JSONL manifest.")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results file (also the resume checkpoint).")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("BATCH_WORKERS", 4)))
+    parser.add_argument("--mode", choices=("thread", "process"), default=os.environ.get("BATCH_MODE", "thread"))
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run disclosures that failed previously.")
+    parser.add_argument("--summary", help="Optional path to write the summary as JSON.")
+    args = parser.parse_args()
+
+    summary = run_batch(args.source, args.output, workers=args.workers, mode=args.mode, retry_failed=args.retry_failed)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# history.py
+"""
+Analysis history: every /analyze request is stored with its report, the searches it ran and
+the references the report was written from.
+
+Claims are looked up by a hash of their whitespace-normalized text, so re-running a claim
+from last week can return the stored report immediately. A stored report is only reused
+within the same data version (ANALYSIS_DATA_VERSION plus the patent search backend); bump
+ANALYSIS_DATA_VERSION after changing prompts or models, or to force fresh analyses.
+"""
+import logging
+import os
+from datetime import datetime, timezone
+
+from .db_client import Analysis, Reference, SearchResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 20
+
+
+def current_data_version() -> str:
+    """Returns the version stored with new analyses; reports of other versions are never reused."""
+    version = os.environ.get("ANALYSIS_DATA_VERSION", "1")
+    return f"{version}:{os.environ.get('PATENT_SEARCH_BACKEND', 'patentsview')}"
+
+
+def find_stored_analysis(db_session, claim_hash: str, data_version=None):
+    """Returns the latest succeeded analysis of a claim in the data version, or None."""
+    return (
+        db_session.query(Analysis)
+        .filter(
+            Analysis.claim_hash == claim_hash,
+            Analysis.data_version == (data_version or current_data_version()),
+            Analysis.status == "succeeded",
+        )
+        .order_by(Analysis.id.desc())
+        .first()
+    )
+
+
+def start_analysis(db_session, claim: str, claim_hash: str, job_id: str, user_id=None):
+    """Records a newly queued analysis; finish_analysis() fills in its report."""
+    analysis = Analysis(
+        user_id=user_id,
+        job_id=job_id,
+        claim_hash=claim_hash,
+        data_version=current_data_version(),
+        claim=claim,
+        status="pending",
+    )
+    db_session.add(analysis)
+    db_session.commit()
+    return analysis
+
+
+def reuse_analysis(db_session, stored: Analysis, claim: str, user_id=None):
+    """Records a request answered with a stored report, so it appears in the user's history too."""
+    analysis = Analysis(
+        user_id=user_id,
+        claim_hash=stored.claim_hash,
+        data_version=stored.data_version,
+        claim=claim,
+        status="succeeded",
+        report=stored.report,
+        reused_from_id=stored.reused_from_id or stored.id,
+        finished_at=datetime.now(timezone.utc),
+    )
+    db_session.add(analysis)
+    db_session.commit()
+    return analysis
+
+
+def finish_analysis(db_session, job_id: str, result=None, error=None):
+    """
+    Stores the outcome of the analysis run by a job.
+    Args:
+        result: The agent's details dict ('report', 'references', 'queries'; see
+            GeminiPatentAgent.run(details=True)) or just the report string.
+        error (str): The error message if the run failed.
+    """
+    analysis = db_session.query(Analysis).filter(Analysis.job_id == job_id).first()
+    if analysis is None:
+        logger.warning("No analysis recorded for job %s", job_id)
+        return None
+    analysis.finished_at = datetime.now(timezone.utc)
+    if error is not None:
+        analysis.status, analysis.error = "failed", error
+    else:
+        details = result if isinstance(result, dict) else {"report": result}
+        analysis.status, analysis.report = "succeeded", details.get("report")
+        analysis.searches = [
+            SearchResult(position=i, query=query) for i, query in enumerate(details.get("queries") or [])
+        ]
+        analysis.references = [
+            Reference(
+                rank=rank,
+                patent_number=patent.get("patent_number"),
+                title=patent.get("title"),
+                publication_date=patent.get("publication_date"),
+                abstract=patent.get("abstract"),
+                url=patent.get("url"),
+            )
+            for rank, patent in enumerate(details.get("references") or [], 1)
+        ]
+    db_session.commit()
+    return analysis
+
+
+def list_analyses(db_session, user_id, before=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Returns one page of a user's history, newest first, by keyset pagination: the page after
+    cursor `before` starts right below that id, so every page costs one index range scan
+    however far back it is.
+    Returns:
+        tuple: (analyses, cursor of the next page or None on the last page)
+    """
+    query = db_session.query(Analysis).filter(Analysis.user_id == user_id)
+    if before is not None:
+        query = query.filter(Analysis.id < before)
+    page = query.order_by(Analysis.id.desc()).limit(limit + 1).all()
+    next_cursor = page[limit - 1].id if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+def analysis_details(db_session, analysis: Analysis) -> dict:
+    """Returns the analysis as a dict with its searches and references (those of the original for reused reports)."""
+    source = db_session.get(Analysis, analysis.reused_from_id) if analysis.reused_from_id else analysis
+    details = analysis.to_dict()
+    details["queries"] = [search.query for search in source.searches]
+    details["references"] = [reference.to_dict() for reference in source.references]
+    return details
@@ -0,0 +1,225 @@
+# jobs.py
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+
+from .db_client import SessionLocal, Job, init_db
+
+PENDING_STATUSES = ("queued", "running")
+
+
+class QueueFullError(Exception):
+    """Raised by JobQueue.submit() when the queue is at capacity."""
+
+
+class JobQueue:
+    """
+    A bounded background job queue for agent runs, backed by the 'jobs' table.
+
+    The table itself is the queue: submit() inserts a 'queued' row and worker threads
+    atomically claim rows in creation order. Because all job state lives in SQLite,
+    queued jobs (and jobs interrupted mid-run) are picked up again after a restart.
+    """
+
+    def __init__(self, runner, workers=4, max_pending=32, mode="thread", poll_interval=1.0, coalescer=None, on_finish=None):
+        """
+        Args:
+            runner: Callable taking the claim text and returning the report string, or a dict
+                with the report under 'report' and any other details for on_finish. Jobs
+                submitted with refresh=True call it as runner(claim, refresh=True).
+                In 'process' mode it must be a picklable module-level function.
+            workers (int): Number of concurrent agent runs.
+            max_pending (int): Maximum number of queued plus running jobs before
+                submit() raises QueueFullError.
+            mode (str): 'thread' to run jobs in worker threads, or 'process' to run
+                them in a process pool.
+            poll_interval (float): Seconds an idle worker waits before re-checking the table.
+            coalescer: Optional RequestCoalescer (agent/limits/coalescing.py). Jobs for the same
+                claim then share one in-flight run, and repeats shortly after reuse its result.
+            on_finish: Optional callback(job_id, result, error) called as each job ends, before it
+                is marked finished, with the runner's return value or the error message, e.g. to
+                store analysis history.
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown job worker mode: {mode!r}")
+        self.runner = runner
+        self.workers = workers
+        self.max_pending = max_pending
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.coalescer = coalescer
+        self.on_finish = on_finish
+
+        self._submit_lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._process_pool = None
+        self._started = False
+
+    @classmethod
+    def from_env(cls, runner, coalescer=None, on_finish=None):
+        """
+        Creates a queue configured from the JOB_WORKERS, JOB_QUEUE_SIZE and
+        JOB_WORKER_MODE environment variables.
+        """
+        return cls(
+            runner,
+            workers=int(os.environ.get("JOB_WORKERS", 4)),
+            max_pending=int(os.environ.get("JOB_QUEUE_SIZE", 32)),
+            mode=os.environ.get("JOB_WORKER_MODE", "thread"),
+            coalescer=coalescer,
+            on_finish=on_finish,
+        )
+
+    def start(self):
+        """Requeues interrupted jobs and starts the worker pool. Calling it again is a no-op."""
+        with self._submit_lock:
+            if self._started:
+                return
+            self._started = True
+
+        init_db()
+        db = SessionLocal()
+        try:
+            interrupted = db.query(Job).filter(Job.status == "running").update(
+                {"status": "queued", "started_at": None}
+            )
+            db.commit()
+            if interrupted:
+                logging.info(f"Requeued {interrupted} job(s) interrupted by a restart.")
+        finally:
+            db.close()
+
+        if self.mode == "process":
+            self._process_pool = ProcessPoolExecutor(max_workers=self.workers)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait=True):
+        """Signals the workers to exit after their current job."""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+
+    def submit(self, claim: str, job_id=None, refresh=False) -> str:
+        """
+        Enqueues an analysis of the given claim.
+        Args:
+            job_id (str): Optional id for the job, for callers that record it before submitting;
+                a new one is generated by default.
+            refresh (bool): If True, the job neither joins nor reuses a coalesced run and asks
+                the runner to bypass its own caches; its result then replaces the coalesced one.
+        Returns:
+            str: The new job id.
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running.
+        """
+        with self._submit_lock:
+            db = SessionLocal()
+            try:
+                pending = db.query(func.count(Job.id)).filter(Job.status.in_(PENDING_STATUSES)).scalar()
+                if pending >= self.max_pending:
+                    raise QueueFullError(f"Job queue is full ({pending} pending jobs).")
+                job_id = job_id or uuid.uuid4().hex
+                db.add(Job(id=job_id, status="queued", claim=claim, refresh=bool(refresh)))
+                db.commit()
+            finally:
+                db.close()
+
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str):
+        """
+        Returns the job row for the given id, or None if it does not exist.
+        The returned object is detached from its session.
+        """
+        db = SessionLocal()
+        try:
+            job = db.get(Job, job_id)
+            if job is not None:
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def _claim_next(self):
+        # Atomically move the oldest queued job to 'running'; the status check in the
+        # UPDATE keeps two processes sharing the database from claiming the same job.
+        with self._claim_lock:
+            db = SessionLocal()
+            try:
+                job = db.query(Job).filter(Job.status == "queued").order_by(Job.created_at).first()
+                if job is None:
+                    return None
+                job_id, claim, refresh = job.id, job.claim, job.refresh
+                claimed = db.query(Job).filter(Job.id == job_id, Job.status == "queued").update(
+                    {"status": "running", "started_at": datetime.now(timezone.utc)}
+                )
+                db.commit()
+                return (job_id, claim, refresh) if claimed else None
+            finally:
+                db.close()
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            job = self._claim_next()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=self.poll_interval)
+                continue
+            self._execute(*job)
+
+    def _run(self, claim: str, refresh=False):
+        # Plain runners never see the refresh argument
+        kwargs = {"refresh": True} if refresh else {}
+        if self._process_pool is not None:
+            return self._process_pool.submit(self.runner, claim, **kwargs).result()
+        return self.runner(claim, **kwargs)
+
+    def _execute(self, job_id: str, claim: str, refresh=False):
+        result = error = None
+        try:
+            # Coalescing happens here, in the parent process, so it also spans process workers
+            if self.coalescer is not None and not refresh:
+                result = self.coalescer.do(claim, lambda: self._run(claim))
+            else:
+                result = self._run(claim, refresh)
+                if self.coalescer is not None:
+                    self.coalescer.remember(claim, result)
+            report = result.get("report") if isinstance(result, dict) else result
+            update = {"status": "succeeded", "result": report}
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {e}", exc_info=True)
+            error = str(e)
+            update = {"status": "failed", "error": error}
+
+        # on_finish runs first, so whatever it stores exists once a poller sees the job finished
+        if self.on_finish is not None:
+            try:
+                self.on_finish(job_id, result, error)
+            except Exception as e:
+                logging.error(f"on_finish failed for job {job_id}: {e}", exc_info=True)
+
+        update["finished_at"] = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(update)
+            db.commit()
+        finally:
+            db.close()
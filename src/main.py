@@ -1,10 +1,12 @@
 # main.py
+import argparse
 import os
 from dotenv import load_dotenv
 
-import google.generativeai as genai
 from .agent.GeminiPatentAgent import GeminiPatentAgent
 
+DEFAULT_DISCLOSURE_PATH = './src/data/invention_disclosure.txt'
+
 
 def read_invention_disclosure(file_path: str):
     """Reads the invention disclosure from a file."""
@@ -15,27 +17,35 @@ def read_invention_disclosure(file_path: str):
         print(f"Error: Invention disclosure file not found at '{file_path}'")
         return None
 
-def main():
+class DummyModel:
+    """Offline stand-in used when GOOGLE_API_KEY is not set."""
+    def generate_content(self, prompt):
+        class Response:
+            # Search once, then ask for the report once the prompt holds search results
+            text = "Action: final_report()" if "returned:" in prompt else "Action: search('test prior art')"
+        return Response()
+
+def create_model():
+    """Creates the Gemini model, or a DummyModel if GOOGLE_API_KEY is not set."""
     load_dotenv()
     api_key = os.environ.get('GOOGLE_API_KEY')
 
-    # For real model
-    model = None
+    # For real model; the Gemini SDK is slow to import, so it is only loaded when needed
     if api_key:
         import google.generativeai as genai
         genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-pro')
-    else:
-        print("[WARNING]: GOOGLE_API_KEY not set. Using DummyModel for testing.")
-        class DummyModel:
-            def generate_content(self, prompt):
-                class Response:
-                    text = "Action: search('test prior art')"
-                return Response()
-        model = DummyModel()
-
-    file_path = './src/data/invention_disclosure.txt'
-    invention_text = read_invention_disclosure(file_path)
+        return genai.GenerativeModel('gemini-2.5-pro')
+    print("[WARNING]: GOOGLE_API_KEY not set. Using DummyModel for testing.")
+    return DummyModel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Gemini patent agent on an invention disclosure.")
+    parser.add_argument("disclosure", nargs="?", default=DEFAULT_DISCLOSURE_PATH, help="Path of the disclosure text file.")
+    args = parser.parse_args()
+
+    model = create_model()
+
+    invention_text = read_invention_disclosure(args.disclosure)
     if not invention_text:
         return
 
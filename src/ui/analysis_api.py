@@ -0,0 +1,221 @@
+# analysis_api.py
+"""
+The analysis API shared by both Flask apps (app.py and src/ui/app.py): background /analyze
+jobs, their status and result, the Server-Sent Events stream, analysis history and /metrics.
+
+Register it on an app with register_analysis_api(app); each app passes its own way of finding
+the logged-in user, if it has one. start_services() creates the database tables and starts the
+job workers; call it when the server starts (it is also run before every request, as a no-op
+once started).
+"""
+import json
+import os
+import threading
+import uuid
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
+
+from ..agent.GeminiPatentAgent import GeminiPatentAgent
+from ..agent.limits.coalescing import RequestCoalescer, request_key
+from ..agent.tracing.metrics import METRICS_CONTENT_TYPE, render_metrics
+from ..data import history
+from ..data.db_client import db_session, init_db, session_scope
+from ..data.jobs import JobQueue, QueueFullError
+
+analysis_api = Blueprint("analysis", __name__)
+
+# The Gemini client is imported and configured on first use, keeping startup fast
+_agent = None
+_agent_lock = threading.Lock()
+
+
+def get_agent():
+    """Returns the shared agent, creating it on the first request."""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"))
+            _agent = GeminiPatentAgent(model=genai.GenerativeModel("gemini-2.5-pro"))
+        return _agent
+
+
+def set_agent(agent):
+    """Replaces the shared agent, e.g. with one using a fake model in benchmarks and tests."""
+    global _agent
+    with _agent_lock:
+        _agent = agent
+
+
+def run_analysis(claim, refresh=False):
+    """Job runner: analyzes a single claim with the shared agent, returning the report with its references."""
+    return get_agent().run(user_input=claim, details=True, refresh=refresh)
+
+
+def record_job_result(job_id, result, error):
+    """Stores a finished job's report, searches and references in the analysis history."""
+    with session_scope() as db:
+        history.finish_analysis(db, job_id, result=result, error=error)
+
+
+# Identical claims submitted at the same time share one agent run, and a repeat within
+# COALESCE_TTL seconds of its completion gets the same report without a new run
+analysis_coalescer = RequestCoalescer.from_env("analyze")
+
+# Background job queue for /analyze (configured via JOB_WORKERS, JOB_QUEUE_SIZE, JOB_WORKER_MODE)
+job_queue = JobQueue.from_env(runner=run_analysis, coalescer=analysis_coalescer, on_finish=record_job_result)
+
+
+def get_job_queue():
+    # Normally already started by start_services(); starting is a no-op then
+    job_queue.start()
+    return job_queue
+
+
+def start_services():
+    """
+    Creates the database tables and starts the job workers, which resume jobs left queued or
+    running by a restart. Called when the server starts, never at import; as a request hook it
+    covers servers that only import the app. Repeated calls are no-ops.
+    """
+    init_db()
+    job_queue.start()
+
+
+def register_analysis_api(app, current_user_id=None):
+    """
+    Adds the analysis routes and services to an app.
+    Args:
+        app (Flask): The app to register the blueprint on.
+        current_user_id: Optional callable returning the logged-in user's id (or None); analyses
+            are stored in that user's history. Without it every analysis is anonymous.
+    """
+    app.extensions["analysis_user_id"] = current_user_id or (lambda: None)
+    app.before_request(start_services)
+    app.teardown_appcontext(_remove_db_session)
+    app.register_blueprint(analysis_api)
+
+
+def _remove_db_session(exception=None):
+    # Each request uses one scoped session (see data/db_client.py); return its connection to the pool
+    db_session.remove()
+
+
+@analysis_api.route("/analyze", methods=["POST", "OPTIONS"])
+def analyze():
+    if request.method == "OPTIONS":
+        # Handle CORS preflight
+        response = jsonify({"status": "preflight"})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "*")
+        response.headers.add("Access-Control-Allow-Methods", "*")
+        return response
+
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No JSON data received"}), 400
+
+    claim = data.get("claim", "").strip()
+    if not claim:
+        return jsonify({"error": "Missing claim text"}), 400
+
+    # A claim analyzed before with the same data version gets its stored report right away;
+    # send "refresh": true to analyze it again
+    claim_hash = request_key(claim)
+    user_id = current_app.extensions["analysis_user_id"]()
+    refresh = bool(data.get("refresh"))
+    if not refresh:
+        stored = history.find_stored_analysis(db_session, claim_hash)
+        if stored is not None:
+            analysis = history.reuse_analysis(db_session, stored, claim, user_id=user_id)
+            return jsonify({
+                "analysis_id": analysis.id,
+                "status": "succeeded",
+                "stored": True,
+                "response": analysis.report,
+            })
+
+    # The history row is written before the job exists, so a fast job always finds it
+    job_id = uuid.uuid4().hex
+    analysis = history.start_analysis(db_session, claim, claim_hash, job_id, user_id=user_id)
+    try:
+        get_job_queue().submit(claim, job_id=job_id, refresh=refresh)
+    except QueueFullError as e:
+        db_session.delete(analysis)
+        db_session.commit()
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = "5"
+        return response, 429
+
+    return jsonify({
+        "analysis_id": analysis.id,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": url_for("analysis.job_status", job_id=job_id),
+        "result_url": url_for("analysis.job_result", job_id=job_id),
+    }), 202
+
+
+@analysis_api.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@analysis_api.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status == "succeeded":
+        return jsonify({"job_id": job.id, "response": job.result})
+    if job.status == "failed":
+        return jsonify({"job_id": job.id, "error": job.error}), 500
+    # Still queued or running
+    return jsonify(job.to_dict()), 202
+
+
+def _sse(event, data):
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@analysis_api.route("/analyze/stream", methods=["GET", "POST"])
+def analyze_stream():
+    # EventSource can only send GET requests, so the claim may also come from the query string
+    if request.method == "POST":
+        claim = (request.get_json(silent=True) or {}).get("claim", "").strip()
+    else:
+        claim = request.args.get("claim", "").strip()
+    if not claim:
+        return jsonify({"error": "Missing claim text"}), 400
+
+    def generate():
+        # Job results are cached as the agent's details dict (see run_analysis)
+        cached = analysis_coalescer.cached(claim)
+        if cached is not None:
+            yield _sse("done", {"response": cached["report"], "cached": True})
+            return
+        # A client that disconnects closes this generator; closing the agent's stream cancels the run
+        events = get_agent().stream(user_input=claim)
+        try:
+            for event, data in events:
+                if event == "done":
+                    analysis_coalescer.remember(claim, {"report": data["response"]})
+                yield _sse(event, data)
+        finally:
+            events.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@analysis_api.route("/metrics")
+def metrics():
+    """Prometheus metrics: node and external call timings, retries, cache hits, coalesced requests and rate limiter state."""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
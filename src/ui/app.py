@@ -2,20 +2,21 @@ import os
 import sys
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify
 from flask_cors import CORS
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# The repository root, so this file runs as a script and shares src/ui/analysis_api.py with app.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from dotenv import load_dotenv
 load_dotenv()
-from data.db_client import (
-    SessionLocal,
+from src.data.db_client import (
+    db_session,
     create_user,
     get_user_by_username,
     get_all_users,
     update_user_email,
     delete_user,
+    Analysis,
 )
-
-import google.generativeai as genai
-from agent.GeminiPatentAgent import GeminiPatentAgent
+from src.data import history
+from src.ui.analysis_api import register_analysis_api, start_services
 
 # Initialize Flask app
 app = Flask(__name__, template_folder="templates")
@@ -28,13 +29,17 @@ SERP_API_KEY = os.getenv("SERP_API_KEY")
 if not GOOGLE_API_KEY or not SERP_API_KEY:
     raise EnvironmentError("Missing GOOGLE_API_KEY or SERP_API_KEY")
 
-# Configure Gemini
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel("gemini-2.5-pro")
-agent = GeminiPatentAgent(model=model, serpapi_api_key=SERP_API_KEY)
-
 app.secret_key = 'your_super_secret_key_here'  # 🔐 Change this in production
 
+def _current_user_id():
+    """Returns the id of the logged-in user, or None for anonymous API requests."""
+    user = get_user_by_username(db_session, session['username']) if 'username' in session else None
+    return user.id if user else None
+
+# Job queue, /analyze, /jobs, /analyze/stream and /metrics (see analysis_api.py); analyses are
+# stored in the logged-in user's history
+register_analysis_api(app, current_user_id=_current_user_id)
+
 # --- Flask Routes ---
 
 @app.route('/')
@@ -43,29 +48,6 @@ def root():
         return redirect(url_for('dashboard'))
     return redirect(url_for('login'))
 
-@app.route("/analyze", methods=["POST", "OPTIONS"])
-def analyze():
-    if request.method == "OPTIONS":
-        response = jsonify({"status": "preflight"})
-        response.headers.add("Access-Control-Allow-Origin", "*")
-        response.headers.add("Access-Control-Allow-Headers", "*")
-        response.headers.add("Access-Control-Allow-Methods", "*")
-        return response
-
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "No JSON data received"}), 400
-
-    claim = data.get("claim", "").strip()
-    if not claim:
-        return jsonify({"error": "Missing claim text"}), 400
-
-    try:
-        result = agent.run(user_input=claim)
-        return jsonify({"response": result})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     message = None
@@ -76,21 +58,18 @@ def register():
         password = request.form['password']   
         email = f"{username}"     
 
-        db = SessionLocal()
         try:
-            if get_user_by_username(db, username):
+            if get_user_by_username(db_session, username):
                 message = "Username already exists."
                 message_type = "error"
             else:
-                create_user(db, username, email)
+                create_user(db_session, username, email)
                 message = "Registration successful! Please log in."
                 message_type = "success"
         except Exception as e:
-            db.rollback()
+            db_session.rollback()
             message = f"Error during registration: {str(e)}"
             message_type = "error"
-        finally:
-            db.close()
 
     return render_template('register.html', message=message, message_type=message_type)
 
@@ -104,26 +83,36 @@ def login():
         username = request.form['username']
         password = request.form['password']  # Not validated in this demo
 
-        db = SessionLocal()
-        try:
-            user = get_user_by_username(db, username)
-            if user:
-                session['username'] = username
-                return redirect(url_for('dashboard'))
-            else:
-                message = "Invalid username."
-                message_type = "error"
-        finally:
-            db.close()
+        user = get_user_by_username(db_session, username)
+        if user:
+            session['username'] = username
+            return redirect(url_for('dashboard'))
+        else:
+            message = "Invalid username."
+            message_type = "error"
 
     return render_template('login.html', message=message, message_type=message_type)
 
 
 @app.route('/dashboard')
 def dashboard():
-    if 'username' in session:
-        return render_template('index.html', username=session['username'])
-    return redirect(url_for('login'))
+    if 'username' not in session:
+        return redirect(url_for('login'))
+    # History is paged by id (?before=<id of the last analysis shown>), newest first
+    analyses, next_cursor = history.list_analyses(
+        db_session, _current_user_id(), before=request.args.get('before', type=int)
+    )
+    return render_template('index.html', username=session['username'], analyses=analyses, next_cursor=next_cursor)
+
+
+@app.route('/analyses/<int:analysis_id>')
+def analysis_detail(analysis_id):
+    if 'username' not in session:
+        return jsonify({"error": "Login required"}), 401
+    analysis = db_session.get(Analysis, analysis_id)
+    if analysis is None or analysis.user_id != _current_user_id():
+        return jsonify({"error": "Analysis not found"}), 404
+    return jsonify(history.analysis_details(db_session, analysis))
 
 
 @app.route('/logout', methods=['POST'])
@@ -134,4 +123,7 @@ def logout():
 # --- Main Execution ---
 
 if __name__ == '__main__':
+    # The reloader's parent process only watches files; the serving child runs the jobs
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_services()
     app.run(debug=True)
@@ -23,6 +23,28 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 });
 
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Polls a job result URL until the job succeeds (200) or fails
+async function pollJobResult(resultUrl, output) {
+  for (;;) {
+    const res = await fetch(resultUrl);
+    if (res.status === 200) {
+      return res.json();
+    }
+    if (res.status !== 202) {
+      const body = await res.json().catch(() => ({}));
+      throw new Error(body.error || `Job failed with status ${res.status}`);
+    }
+    const job = await res.json();
+    output.textContent =
+      job.status === "running"
+        ? "Analyzing claim. Please wait..."
+        : "Analysis queued. Please wait...";
+    await sleep(2000);
+  }
+}
+
 // Claim form handler
 document.getElementById("claim-form").onsubmit = async function (e) {
   e.preventDefault();
@@ -52,11 +74,21 @@ document.getElementById("claim-form").onsubmit = async function (e) {
       body: JSON.stringify({ claim: input }),
     });
 
+    if (res.status === 429) {
+      output.textContent = "The server is busy. Please try again in a moment.";
+      return;
+    }
     if (!res.ok) {
       throw new Error(`Server responded with status ${res.status}`);
     }
 
-    const data = await res.json();
+    // /analyze answers a previously analyzed claim with its stored report (200);
+    // otherwise it queues a background job (202) whose result endpoint we poll
+    let data = await res.json();
+    if (res.status === 202) {
+      output.textContent = "Analysis queued. Please wait...";
+      data = await pollJobResult(`${BASE_URL}${data.result_url}`, output);
+    }
     let resultText = "";
 
     if (data.summary) {
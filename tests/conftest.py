@@ -0,0 +1,50 @@
+# tests/conftest.py
+"""
+Points every on-disk store at a temporary directory before the code under test is imported,
+so the suite never touches src/data. Run from the repository root: python -m pytest -q
+"""
+import os
+import tempfile
+
+import pytest
+
+_DATA_DIR = tempfile.mkdtemp(prefix="claimforge-tests-")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_DATA_DIR, 'claim_forge.db')}")
+os.environ.setdefault("PATENT_SEARCH_CACHE_PATH", os.path.join(_DATA_DIR, "search_cache.db"))
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_DATA_DIR, "llm_cache.db"))
+os.environ.setdefault("CHECKPOINT_PATH", os.path.join(_DATA_DIR, "checkpoints.db"))
+os.environ.setdefault("PATENT_RERANK_STORE", os.path.join(_DATA_DIR, "embeddings"))
+os.environ.setdefault("PATENTSVIEW_API_KEY", "test-key")
+# The web apps refuse to import without these; no test calls Gemini
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+os.environ.setdefault("SERP_API_KEY", "test-key")
+
+
+@pytest.fixture
+def patentsview():
+    """
+    Replaces the shared PatentsView client with one answering every search with numbered
+    patents, without HTTP. Its 'calls' attribute counts the requests.
+    """
+    from src.agent.tools.patentsview_client import PatentsViewClient, set_patentsview_client
+
+    class CountingClient(PatentsViewClient):
+        def __init__(self):
+            super().__init__(api_key="test-key")
+            self.calls = 0
+
+        def search_patents(self, query, fields, options, sort=None):
+            self.calls += 1
+            return {"patents": [
+                {"patent_number": str(i), "patent_title": f"Patent {i}", "patent_date": "2010-01-01", "patent_abstract": "A brake."}
+                for i in range(1, options["size"] + 1)
+            ]}
+
+        async def asearch_patents(self, query, fields, options, sort=None):
+            return self.search_patents(query, fields, options, sort)
+
+    client = CountingClient()
+    set_patentsview_client(client)
+    yield client
+    set_patentsview_client(None)
@@ -0,0 +1,150 @@
+# tests/test_analysis_api.py
+import json
+import threading
+import time
+import uuid
+
+import pytest
+from flask import Flask
+
+from src.ui import analysis_api
+
+
+class FakeAgent:
+    """Answers every claim with a fixed report and one reference, without a model."""
+
+    def __init__(self):
+        self.runs = 0
+        self.stream_closed = threading.Event()
+
+    def stream(self, user_input):
+        try:
+            yield "llm_done", {"iteration": 1, "action": "search"}
+            yield "report_chunk", {"text": "Report "}
+            yield "report_chunk", {"text": "text\nwith a newline"}
+            yield "done", {"response": "Report text\nwith a newline"}
+        finally:
+            self.stream_closed.set()
+
+    def run(self, user_input, details=False, refresh=False):
+        self.runs += 1
+        patent = {"title": "Brake", "patent_number": "7", "publication_date": "2010-01-01", "abstract": "A brake.", "url": None}
+        return {"report": f"Report on {user_input}", "references": [patent], "queries": ["brake"]}
+
+
+@pytest.fixture
+def agent():
+    agent = FakeAgent()
+    analysis_api.set_agent(agent)
+    yield agent
+    analysis_api.set_agent(None)
+
+
+@pytest.fixture
+def client(agent):
+    app = Flask(__name__)
+    analysis_api.register_analysis_api(app)
+    return app.test_client()
+
+
+def _wait_for(client, job_id):
+    for _ in range(200):
+        job = client.get(f"/jobs/{job_id}").get_json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_analyze_runs_a_job_and_reuses_its_stored_report(client, agent):
+    claim = f"A magnetic brake {uuid.uuid4().hex}"
+    response = client.post("/analyze", json={"claim": claim})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body["status_url"] == f"/jobs/{body['job_id']}"
+    assert _wait_for(client, body["job_id"])["status"] == "succeeded"
+    assert client.get(body["result_url"]).get_json()["response"] == f"Report on {claim}"
+
+    # The stored report answers the same claim without another run
+    again = client.post("/analyze", json={"claim": claim})
+    assert again.status_code == 200
+    assert again.get_json()["stored"] is True
+    assert agent.runs == 1
+
+
+def test_analyze_rejects_a_missing_claim(client):
+    assert client.post("/analyze", json={"claim": "  "}).status_code == 400
+    assert client.get(f"/jobs/{uuid.uuid4().hex}").status_code == 404
+
+
+@pytest.mark.parametrize("module", ["app", "src.ui.app"])
+def test_both_web_apps_serve_the_analysis_api(module):
+    import importlib
+
+    app = importlib.import_module(module).app
+    rules = {rule.rule for rule in app.url_map.iter_rules()}
+    assert {"/analyze", "/analyze/stream", "/jobs/<job_id>", "/jobs/<job_id>/result", "/metrics"} <= rules
+
+
+def _events(body: str) -> list:
+    """Parses a Server-Sent Events body into (event, data) pairs."""
+    events = []
+    for message in body.split("\n\n"):
+        if not message:
+            continue
+        fields = dict(line.split(": ", 1) for line in message.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_analyze_stream_sends_each_event_as_an_sse_message(client, agent):
+    claim = f"A magnetic brake {uuid.uuid4().hex}"
+    response = client.get("/analyze/stream", query_string={"claim": claim})
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    body = response.get_data(as_text=True)
+    assert body.endswith("\n\n")
+    assert _events(body) == [
+        ("llm_done", {"iteration": 1, "action": "search"}),
+        ("report_chunk", {"text": "Report "}),
+        ("report_chunk", {"text": "text\nwith a newline"}),
+        ("done", {"response": "Report text\nwith a newline"}),
+    ]
+    assert agent.stream_closed.is_set()
+
+    # The finished report is remembered: a repeat is answered at once
+    repeat = client.post("/analyze/stream", json={"claim": claim}).get_data(as_text=True)
+    assert _events(repeat) == [("done", {"response": "Report text\nwith a newline", "cached": True})]
+
+
+def test_analyze_stream_closes_the_run_when_the_client_disconnects(client, agent):
+    response = client.get("/analyze/stream", query_string={"claim": f"claim {uuid.uuid4().hex}"}, buffered=False)
+    first = next(iter(response.response))
+    assert _events(first.decode() if isinstance(first, bytes) else first)[0][0] == "llm_done"
+    response.close()
+    assert agent.stream_closed.is_set()
+
+
+def test_agent_stream_cancels_the_run_when_closed(monkeypatch, patentsview):
+    from src.agent.GeminiPatentAgent import GeminiPatentAgent
+
+    monkeypatch.setenv("LLM_CACHE", "0")
+    monkeypatch.setenv("CHECKPOINTS", "0")
+
+    class SlowModel:
+        model_name = "slow"
+        calls = 0
+
+        def generate_content(self, prompt, **kwargs):
+            self.calls += 1
+            time.sleep(0.1)
+            text = 'Action: search("magnetic brake")' if self.calls == 1 else "Action: final_report()"
+            return type("Response", (), {"text": text})()
+
+    model = SlowModel()
+    events = GeminiPatentAgent(model).stream("A magnetic brake.")
+    assert next(events)[0] == "llm_done"
+    events.close()
+    time.sleep(0.5)
+    # The run stopped before its next planning step or the report
+    assert model.calls == 1
@@ -0,0 +1,116 @@
+# tests/test_batch.py
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from src import batch
+
+
+class FakeAgent:
+    """Plans and searches twice before the report, recording every disclosure it analyzes."""
+
+    analyzed = []
+
+    def __init__(self, model):
+        pass
+
+    def stream(self, user_input):
+        FakeAgent.analyzed.append(user_input)
+        for _ in range(2):
+            time.sleep(0.01)
+            yield "llm_done", {"iteration": 1, "action": "search"}
+            time.sleep(0.01)
+            yield "search_done", {"count": 1}
+        yield "report_done", {}
+        yield "done", {"response": f"Report on {user_input}"}
+
+
+@pytest.fixture(autouse=True)
+def fake_agent(monkeypatch):
+    FakeAgent.analyzed = []
+    monkeypatch.setattr(batch, "GeminiPatentAgent", FakeAgent)
+    monkeypatch.setattr(batch, "create_model", lambda: None)
+    monkeypatch.setattr(batch, "_agent", None)
+
+
+@pytest.fixture
+def disclosures(tmp_path):
+    source = tmp_path / "disclosures"
+    source.mkdir()
+    for name in ("a", "b", "c", "d"):
+        (source / f"{name}.txt").write_text(f"Disclosure {name}", encoding="utf-8")
+    return str(source)
+
+
+def _read_results(path):
+    # Skips a line cut off by a crash, as load_checkpoint does
+    results = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                continue
+    return results
+
+
+def test_resumes_from_a_partially_written_output(tmp_path, disclosures):
+    output = tmp_path / "results.jsonl"
+    # a succeeded, b failed, and the crash cut off c's line
+    output.write_text(
+        json.dumps({"id": "a", "status": "ok", "report": "Old report"}) + "\n"
+        + json.dumps({"id": "b", "status": "error", "error": "Quota exceeded"}) + "\n"
+        + '{"id": "c", "status": "o',
+        encoding="utf-8",
+    )
+
+    summary = batch.run_batch(disclosures, str(output), workers=2)
+    assert sorted(FakeAgent.analyzed) == ["Disclosure c", "Disclosure d"]
+    assert summary["completed"] == 2 and summary["failed"] == 0
+
+    # The cut-off line stays on its own line, and every new result can be read back
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert lines[2] == '{"id": "c", "status": "o'
+    new = [json.loads(line) for line in lines[3:]]
+    assert sorted(r["id"] for r in new) == ["c", "d"]
+    assert batch.load_checkpoint(str(output)) == {"a", "b", "c", "d"}
+
+    # Re-running finds nothing left to do unless failed disclosures are retried
+    FakeAgent.analyzed = []
+    assert batch.run_batch(disclosures, str(output))["completed"] == 0
+    batch.run_batch(disclosures, str(output), retry_failed=True)
+    assert FakeAgent.analyzed == ["Disclosure b"]
+    assert _read_results(str(output))[-1]["status"] == "ok"
+
+
+def test_stage_timings_are_summed_over_iterations(tmp_path, disclosures):
+    output = str(tmp_path / "results.jsonl")
+    summary = batch.run_batch(disclosures, output, workers=1)
+
+    for result in _read_results(output):
+        stages = result["stages"]
+        # Each of the two iterations spends about 10ms planning and 10ms searching
+        assert stages["llm"] >= 0.02 and stages["search"] >= 0.02
+        assert stages["report"] < stages["llm"]
+        assert sum(stages.values()) <= result["duration"]
+    assert set(summary["latency"]) == {"total", "llm", "search", "report"}
+
+
+def test_process_workers_get_their_own_rerank_store(tmp_path, monkeypatch):
+    store = str(tmp_path / "rerank")
+    slots = multiprocessing.Value("i", 0)
+    for slot in range(2):
+        monkeypatch.setenv("PATENT_RERANK_STORE", store)
+        batch._init_worker(slots)
+        assert os.environ["PATENT_RERANK_STORE"] == os.path.join(store, f"worker-{slot}")
+    assert isinstance(batch._agent, FakeAgent)
+
+
+def test_empty_disclosure_is_an_error(monkeypatch):
+    monkeypatch.setattr(batch, "_agent", FakeAgent(None))
+    result = batch.analyze_disclosure(("empty", ""))
+    assert result["status"] == "error"
+    assert FakeAgent.analyzed == []
@@ -0,0 +1,164 @@
+# tests/test_checkpoints.py
+import asyncio
+
+import pytest
+
+from src.agent.GeminiPatentAgent import GeminiPatentAgent
+from src.agent.cache.search_cache import SearchCache, set_search_cache
+from src.agent.cache.tiered_cache import TieredCache
+from src.agent.checkpoint.checkpoint_store import CheckpointStore, disclosure_hash, set_checkpoint_store
+from src.agent.prompts.react_prompts import REACT_PLANNING_PROMPT
+
+DISCLOSURE = "A bicycle brake whose magnetorheological fluid stiffens in a magnetic field."
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class ScriptedModel:
+    """Plans one search, then asks for the report; the report call fails while fail_report is set."""
+
+    model_name = "scripted"
+
+    def __init__(self):
+        self.plans = self.reports = 0
+        self.fail_report = False
+
+    def generate_content(self, prompt, **kwargs):
+        if "PRIOR ART PATENT SEARCH RESULTS" in prompt:
+            self.reports += 1
+            if self.fail_report:
+                raise RuntimeError("report call failed")
+            return Response(f"Report {self.reports}")
+        self.plans += 1
+        if "returned:" in prompt:
+            return Response("Thought: These results cover the claim.\nAction: final_report()")
+        return Response('Thought: I should search.\nAction: search("magnetorheological brake")')
+
+
+def run(agent, run_id, **kwargs):
+    return asyncio.run(agent.arun(DISCLOSURE, run_id=run_id, **kwargs))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    set_checkpoint_store(store)
+    yield store
+    set_checkpoint_store(None)
+    store.close()
+
+
+@pytest.fixture
+def model(monkeypatch, patentsview):
+    monkeypatch.setenv("LLM_CACHE", "0")
+    set_search_cache(None)
+    return ScriptedModel()
+
+
+def test_store_keeps_the_latest_checkpoint_per_run(store):
+    digest = disclosure_hash(DISCLOSURE)
+    store.save("run-1", "llm", {"iteration": 1}, digest)
+    store.save("run-1", "search", {"iteration": 1, "search_results": []}, digest)
+    checkpoint = store.load("run-1")
+    assert (checkpoint.last_node, checkpoint.status, checkpoint.state["iteration"]) == ("search", "running", 1)
+
+    store.set_status("run-1", "failed")
+    assert store.load("run-1").status == "failed"
+    assert store.load("unknown") is None
+
+
+def test_find_latest_prefers_a_run_that_searched(store):
+    digest = disclosure_hash(DISCLOSURE)
+    store.save("searched", "search", {"search_results": []}, digest)
+    store.save("planned", "llm", {}, digest)
+    assert store.find_latest(digest).run_id == "searched"
+    # Whitespace does not change the disclosure's hash
+    assert disclosure_hash("  " + DISCLOSURE.replace(" ", "\n")) == digest
+    assert store.find_latest(disclosure_hash("another disclosure")) is None
+
+
+def test_expired_checkpoints_are_ignored(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"), ttl=0)
+    store.save("run-1", "llm", {}, "digest")
+    assert store.load("run-1") is None
+    assert store.find_latest("digest") is None
+    store.close()
+
+
+def test_failed_run_resumes_after_its_last_completed_node(store, model, patentsview):
+    agent = GeminiPatentAgent(model)
+    model.fail_report = True
+    with pytest.raises(RuntimeError):
+        run(agent, "run-1")
+    checkpoint = store.load("run-1")
+    # The search found enough patents, so the report followed it directly
+    assert (checkpoint.last_node, checkpoint.status) == ("search", "failed")
+    assert (model.plans, model.reports, patentsview.calls) == (1, 1, 1)
+
+    model.fail_report = False
+    assert run(agent, "run-1") == "Report 2"
+    # Only the report is generated again
+    assert (model.plans, model.reports, patentsview.calls) == (1, 2, 1)
+    assert store.load("run-1").status == "completed"
+
+
+def test_completed_run_is_returned_as_is(store, model):
+    agent = GeminiPatentAgent(model)
+    assert run(agent, "run-1") == "Report 1"
+    assert run(agent, "run-1") == "Report 1"
+    assert model.reports == 1
+
+
+def test_new_run_of_a_searched_disclosure_only_regenerates_the_report(store, model, patentsview):
+    agent = GeminiPatentAgent(model)
+    run(agent, "run-1")
+    result = run(agent, "run-2", details=True)
+    assert result["report"] == "Report 2"
+    assert result["references"]
+    assert (model.plans, patentsview.calls) == (1, 1)
+
+
+def test_refresh_starts_over_without_cached_calls(store, model, patentsview, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_NONDETERMINISTIC", "1")
+    search_cache = SearchCache(db_path=None)
+    set_search_cache(search_cache)
+    agent = GeminiPatentAgent(model)
+    agent.model.cache = TieredCache("llm_responses")
+    try:
+        run(agent, "run-1")
+        assert run(agent, "run-2") == "Report 1"  # Served from the checkpoint and the LLM cache
+        assert (model.plans, model.reports, patentsview.calls) == (1, 1, 1)
+
+        assert run(agent, "run-3", refresh=True) == "Report 2"
+        assert (model.plans, model.reports, patentsview.calls) == (2, 2, 2)
+        # The refreshed run is checkpointed like any other
+        assert store.load("run-3").status == "completed"
+    finally:
+        set_search_cache(None)
+
+
+def test_new_run_continues_a_failed_run_with_too_few_patents(store, model, patentsview):
+    # Another run of the disclosure failed after its first search found a single patent
+    patent = {"title": "MR brake", "patent_number": "7", "publication_date": "2010-01-01", "abstract": "A brake.", "url": None}
+    state = {
+        "user_input": DISCLOSURE,
+        "prompt": REACT_PLANNING_PROMPT.format(user_input=DISCLOSURE),
+        "search_queries": None,
+        "priority_date": None,
+        "max_iterations": 5,
+        "iteration": 1,
+        "history": ["LLM Response:\nAction: search(\"mr brake\")", "Observation: Tool `search` returned: [...]"],
+        "queries": ["mr brake"],
+        "search_results": [patent],
+    }
+    store.save("run-1", "search", state, disclosure_hash(DISCLOSURE))
+    store.set_status("run-1", "failed")
+
+    result = run(GeminiPatentAgent(model), "run-2", details=True)
+    # One patent is not enough: planning resumes instead of reporting on the partial results
+    assert result["report"] == "Report 1"
+    assert (model.plans, model.reports) == (1, 1)
+    assert [p["patent_number"] for p in result["references"]] == ["7"]
@@ -0,0 +1,108 @@
+# tests/test_coalescing.py
+import threading
+import time
+
+import pytest
+
+from src.agent.limits.coalescing import RequestCoalescer, request_key
+
+
+def _run_concurrently(coalescer, texts, fn):
+    """Calls coalescer.do(text, fn) from one thread per text; returns the results or errors."""
+    outcomes = [None] * len(texts)
+
+    def call(i, text):
+        try:
+            outcomes[i] = coalescer.do(text, fn)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=call, args=(i, text)) for i, text in enumerate(texts)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_for_followers(coalescer, count, timeout=5.0):
+    # Followers are counted when they join the in-flight call, before they start waiting
+    deadline = time.monotonic() + timeout
+    while coalescer.stats()["coalesced"] < count:
+        assert time.monotonic() < deadline, "followers did not join the call"
+        time.sleep(0.001)
+
+
+def test_request_key_ignores_whitespace():
+    assert request_key("A  brake\n with fluid ") == request_key("A brake with fluid")
+    assert request_key("A brake") != request_key("A clutch")
+
+
+def test_concurrent_identical_requests_share_one_call():
+    coalescer = RequestCoalescer("test")
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "report"
+
+    threads, outcomes = _run_concurrently(coalescer, ["claim", " claim", "claim "], fn)
+    _wait_for_followers(coalescer, 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert outcomes == ["report"] * 3
+    assert len(calls) == 1
+    assert coalescer.stats()["executed"] == 1
+
+
+def test_errors_are_shared_but_not_cached():
+    coalescer = RequestCoalescer("test")
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("model unavailable")
+
+    threads, outcomes = _run_concurrently(coalescer, ["claim", "claim"], failing)
+    _wait_for_followers(coalescer, 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert coalescer.do("claim", lambda: "report") == "report"
+
+
+def test_results_are_cached_for_the_ttl():
+    coalescer = RequestCoalescer("test", ttl=60)
+    assert coalescer.do("claim", lambda: "first") == "first"
+    assert coalescer.do("claim", lambda: "second") == "first"
+    assert coalescer.cached("claim") == "first"
+    stats = coalescer.stats()
+    assert (stats["executed"], stats["cached"]) == (1, 2)
+    assert stats["coalesced_rate"] == pytest.approx(2 / 3)
+
+
+def test_expired_or_disabled_cache_runs_again():
+    expired = RequestCoalescer("test", ttl=1e-9)
+    expired.do("claim", lambda: "first")
+    assert expired.do("claim", lambda: "second") == "second"
+
+    disabled = RequestCoalescer("test", ttl=0)
+    disabled.do("claim", lambda: "first")
+    assert disabled.cached("claim") is None
+
+
+def test_remember_replaces_the_cached_result():
+    coalescer = RequestCoalescer("test", ttl=60)
+    coalescer.do("claim", lambda: "first")
+    coalescer.remember("claim", "refreshed")
+    assert coalescer.do("claim", lambda: "third") == "refreshed"
+
+
+def test_cache_is_bounded():
+    coalescer = RequestCoalescer("test", ttl=60, max_entries=2)
+    for text in ("a", "b", "c"):
+        coalescer.do(text, lambda: text.upper())
+    assert coalescer.cached("a") is None
+    assert (coalescer.cached("b"), coalescer.cached("c")) == ("B", "C")
@@ -0,0 +1,94 @@
+# tests/test_history.py
+import uuid
+
+import pytest
+
+from src.data import history
+from src.data.db_client import SessionLocal, create_user, init_db
+from src.agent.limits.coalescing import request_key
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user(db):
+    name = uuid.uuid4().hex
+    return create_user(db, name, f"{name}@example.com")
+
+
+def _analyses(db, user, count):
+    """Stores count finished analyses for the user; returns their ids, oldest first."""
+    ids = []
+    for i in range(count):
+        claim = f"claim {i} {uuid.uuid4().hex}"
+        job_id = uuid.uuid4().hex
+        ids.append(history.start_analysis(db, claim, request_key(claim), job_id, user_id=user.id).id)
+        history.finish_analysis(db, job_id, result=f"report {i}")
+    return ids
+
+
+def _pages(db, user, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = history.list_analyses(db, user.id, before=cursor, limit=limit)
+        pages.append([a.id for a in page])
+        if cursor is None:
+            return pages
+
+
+def test_list_analyses_pages_newest_first(db, user):
+    ids = _analyses(db, user, 5)
+    assert _pages(db, user, limit=2) == [ids[4:2:-1], ids[2:0:-1], ids[:1]]
+
+
+def test_full_last_page_has_no_next_cursor(db, user):
+    ids = _analyses(db, user, 4)
+    page, cursor = history.list_analyses(db, user.id, limit=4)
+    assert ([a.id for a in page], cursor) == (ids[::-1], None)
+    assert _pages(db, user, limit=2) == [ids[3:1:-1], ids[1::-1]]
+
+
+def test_cursor_boundaries(db, user):
+    ids = _analyses(db, user, 3)
+    # The cursor itself is excluded; a cursor at the oldest id gives an empty page
+    page, cursor = history.list_analyses(db, user.id, before=ids[1], limit=5)
+    assert ([a.id for a in page], cursor) == ([ids[0]], None)
+    assert history.list_analyses(db, user.id, before=ids[0]) == ([], None)
+
+
+def test_list_analyses_only_returns_the_users_history(db, user):
+    other = create_user(db, f"other-{user.username}", f"other-{user.email}")
+    _analyses(db, other, 2)
+    mine = _analyses(db, user, 1)
+    page, cursor = history.list_analyses(db, user.id)
+    assert ([a.id for a in page], cursor) == (mine, None)
+
+
+def test_stored_report_is_reused_within_its_data_version(db, user, monkeypatch):
+    claim = f"A brake {uuid.uuid4().hex}"
+    job_id = uuid.uuid4().hex
+    history.start_analysis(db, claim, request_key(claim), job_id, user_id=user.id)
+    assert history.find_stored_analysis(db, request_key(claim)) is None
+
+    details = {
+        "report": "report",
+        "queries": ["magnetic brake"],
+        "references": [{"patent_number": "1", "title": "Brake", "url": "https://patents.google.com/patent/US1"}],
+    }
+    stored = history.finish_analysis(db, job_id, result=details)
+    assert history.find_stored_analysis(db, request_key("  " + claim)).id == stored.id
+
+    reused = history.reuse_analysis(db, stored, claim, user_id=user.id)
+    reused_details = history.analysis_details(db, reused)
+    assert (reused_details["report"], reused_details["reused_from"]) == ("report", stored.id)
+    assert reused_details["queries"] == ["magnetic brake"]
+    assert [r["patent_number"] for r in reused_details["references"]] == ["1"]
+
+    monkeypatch.setenv("ANALYSIS_DATA_VERSION", "2")
+    assert history.find_stored_analysis(db, request_key(claim)) is None
@@ -0,0 +1,121 @@
+# tests/test_jobs.py
+import threading
+import time
+
+import pytest
+
+from src.agent.limits.coalescing import RequestCoalescer
+from src.data.db_client import SessionLocal, Job, init_db
+from src.data.jobs import JobQueue, QueueFullError
+
+
+@pytest.fixture(autouse=True)
+def empty_jobs_table():
+    init_db()
+    db = SessionLocal()
+    try:
+        db.query(Job).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _wait_for(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while queue.get(job_id).status in ("queued", "running"):
+        assert time.monotonic() < deadline, f"job {job_id} did not finish"
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+def test_claim_next_takes_the_oldest_queued_job_once():
+    queue = JobQueue(runner=str.upper)
+    first = queue.submit("first claim")
+    queue.submit("second claim")
+
+    assert queue._claim_next() == (first, "first claim", False)
+    assert queue.get(first).status == "running"
+    assert queue.get(first).started_at is not None
+    assert queue._claim_next()[1] == "second claim"
+    assert queue._claim_next() is None
+
+
+def test_submit_rejects_jobs_beyond_max_pending():
+    queue = JobQueue(runner=str.upper, max_pending=2)
+    queue.submit("a")
+    queue.submit("b")
+    with pytest.raises(QueueFullError):
+        queue.submit("c")
+
+
+def test_start_requeues_interrupted_jobs_and_runs_them():
+    finished = []
+    queue = JobQueue(runner=str.upper, workers=1, poll_interval=0.01, on_finish=lambda *args: finished.append(args))
+    job_id = queue.submit("interrupted claim")
+    # A worker claimed the job, then the process stopped before it finished
+    assert queue._claim_next()[0] == job_id
+
+    queue.start()
+    try:
+        job = _wait_for(queue, job_id)
+    finally:
+        queue.stop()
+    assert (job.status, job.result) == ("succeeded", "INTERRUPTED CLAIM")
+    assert finished == [(job_id, "INTERRUPTED CLAIM", None)]
+
+
+def test_failed_runs_are_recorded():
+    def runner(claim):
+        raise RuntimeError("model unavailable")
+
+    queue = JobQueue(runner=runner, workers=1, poll_interval=0.01)
+    queue.start()
+    try:
+        job = _wait_for(queue, queue.submit("claim"))
+    finally:
+        queue.stop()
+    assert (job.status, job.error) == ("failed", "model unavailable")
+    assert job.finished_at is not None
+
+
+def test_workers_never_run_a_job_twice():
+    runs = []
+    lock = threading.Lock()
+
+    def runner(claim):
+        with lock:
+            runs.append(claim)
+        return claim
+
+    queue = JobQueue(runner=runner, workers=4, max_pending=50, poll_interval=0.01)
+    job_ids = [queue.submit(f"claim {i}") for i in range(20)]
+    queue.start()
+    try:
+        jobs = [_wait_for(queue, job_id) for job_id in job_ids]
+    finally:
+        queue.stop()
+    assert all(job.status == "succeeded" for job in jobs)
+    assert sorted(runs) == sorted(f"claim {i}" for i in range(20))
+
+
+def test_refresh_jobs_bypass_the_coalescer():
+    calls = []
+
+    def runner(claim, refresh=False):
+        calls.append(refresh)
+        return f"report {len(calls)}"
+
+    coalescer = RequestCoalescer("test", ttl=60)
+    queue = JobQueue(runner=runner, workers=1, poll_interval=0.01, coalescer=coalescer)
+    queue.start()
+    try:
+        first = _wait_for(queue, queue.submit("claim"))
+        repeat = _wait_for(queue, queue.submit("claim"))
+        refreshed = _wait_for(queue, queue.submit("claim", refresh=True))
+        after = _wait_for(queue, queue.submit("claim"))
+    finally:
+        queue.stop()
+    assert (first.result, repeat.result, refreshed.result, after.result) == ("report 1", "report 1", "report 2", "report 2")
+    assert refreshed.refresh and not first.refresh
+    # Only refresh jobs pass the argument, so plain runners keep working
+    assert calls == [False, True]
@@ -0,0 +1,130 @@
+# tests/test_llm_cache.py
+import asyncio
+import threading
+
+import pytest
+
+from src.agent.cache.llm_cache import CachedResponse, CachingModel
+from src.agent.cache.tiered_cache import TieredCache
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class CountingModel:
+    """Answers every prompt with a numbered response, so a repeated call is visible."""
+
+    model_name = "counting-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        text = f"{prompt} #{self.calls}"
+        return [Response(text[:4]), Response(text[4:])] if stream else Response(text)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return self.generate_content(prompt, **kwargs)
+
+
+@pytest.fixture
+def model():
+    return CountingModel()
+
+
+@pytest.fixture
+def cached(model):
+    return CachingModel(model, cache=TieredCache("llm_responses"), cache_nondeterministic=True)
+
+
+def test_repeated_prompt_is_served_from_cache(model, cached):
+    first = cached.generate_content("claim")
+    second = cached.generate_content("claim")
+    assert model.calls == 1
+    assert isinstance(second, CachedResponse)
+    assert second.text == first.text == "claim #1"
+
+
+def test_key_covers_the_generation_config(model, cached):
+    cached.generate_content("claim", generation_config={"temperature": 0})
+    cached.generate_content("claim", generation_config={"temperature": 1})
+    cached.generate_content("claim", generation_config={"temperature": 0})
+    assert model.calls == 2
+
+
+def test_use_cache_false_bypasses_reads_and_writes(model, cached):
+    cached.generate_content("claim", use_cache=False)
+    assert cached.generate_content("claim").text == "claim #2"
+    assert cached.generate_content("claim", use_cache=False).text == "claim #3"
+    assert model.calls == 3
+
+
+def test_uncached_view_calls_the_model_every_time(model, cached):
+    cached.generate_content("claim")
+    view = cached.uncached()
+    assert view.generate_content("claim").text == "claim #2"
+    assert asyncio.run(view.generate_content_async("claim")).text == "claim #3"
+    assert view.model_name == "counting-model"
+    # The cached response is left as it was
+    assert cached.generate_content("claim").text == "claim #1"
+
+
+def test_only_deterministic_calls_are_cached_by_default(model):
+    cached = CachingModel(model, cache=TieredCache("llm_responses"))
+    cached.generate_content("claim", generation_config={"temperature": 0.7})
+    cached.generate_content("claim", generation_config={"temperature": 0.7})
+    cached.generate_content("claim", generation_config={"temperature": 0})
+    cached.generate_content("claim", generation_config={"temperature": 0})
+    cached.generate_content("claim")
+    assert model.calls == 4
+    # The model's own generation config counts too
+    model._generation_config = {"temperature": 0}
+    cached.generate_content("another claim")
+    cached.generate_content("another claim")
+    assert model.calls == 5
+
+
+def test_nondeterministic_caching_is_set_from_the_environment(model, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_NONDETERMINISTIC", "1")
+    cached = CachingModel(model, cache=TieredCache("llm_responses"))
+    cached.generate_content("claim", generation_config={"temperature": 0.7})
+    cached.generate_content("claim", generation_config={"temperature": 0.7})
+    assert model.calls == 1
+
+
+def test_stream_is_cached_once_consumed(model, cached):
+    chunks = cached.generate_content("claim", stream=True)
+    assert model.calls == 1 and cached.cache.get(cached.make_key("claim")) is None
+    assert "".join(c.text for c in chunks) == "claim #1"
+
+    replay = cached.generate_content("claim", stream=True)
+    assert [c.text for c in replay] == ["claim #1"]
+    assert model.calls == 1
+
+
+def test_async_calls_share_the_cache(model, cached):
+    cached.generate_content("claim")
+    response = asyncio.run(cached.generate_content_async("claim"))
+    assert response.text == "claim #1"
+    assert model.calls == 1
+
+
+def test_async_cache_access_runs_off_the_event_loop(model):
+    threads = []
+
+    class RecordingCache(TieredCache):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+        def set(self, key, value, ttl=None):
+            threads.append(threading.current_thread())
+            return super().set(key, value, ttl)
+
+    cached = CachingModel(model, cache=RecordingCache("llm_responses"), cache_nondeterministic=True)
+    asyncio.run(cached.generate_content_async("claim"))
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
@@ -0,0 +1,84 @@
+# tests/test_local_index.py
+import json
+
+import pytest
+
+from src.agent.tools import patent_tools
+from src.agent.tools.local_index import LocalPatentIndex, build_index, tokenize
+
+
+@pytest.fixture(scope="module")
+def dumps(tmp_path_factory):
+    root = tmp_path_factory.mktemp("local_index")
+    titles = root / "g_patent.tsv"
+    titles.write_text(
+        "patent_id\tpatent_title\tpatent_date\n"
+        "100\tMagnetorheological bicycle brake\t2012-05-01\n"
+        "200\tHydraulic disc brake for bicycles\t2018-09-12\n"
+        "300\tSolar panel mounting rail\t2015-03-03\n"
+        "400\tBrake pad wear sensor\t2020-01-20\n",
+        encoding="utf-8",
+    )
+    # Abstracts come from a second dump and are merged into the same patents
+    abstracts = root / "g_patent_abstract.jsonl"
+    abstracts.write_text("\n".join(json.dumps(r) for r in [
+        {"patent_id": "100", "patent_abstract": "A brake whose fluid stiffens in a magnetic field."},
+        {"patent_id": "300", "patent_abstract": "A rail for mounting solar panels on roofs."},
+    ]), encoding="utf-8")
+    return [str(titles), str(abstracts)]
+
+
+@pytest.fixture(scope="module")
+def index(dumps, tmp_path_factory):
+    out = tmp_path_factory.mktemp("index")
+    meta = build_index(dumps, str(out))
+    assert meta["num_docs"] == 4
+    return LocalPatentIndex(str(out))
+
+
+def test_tokenize_drops_stopwords_and_short_tokens():
+    assert tokenize("A brake, wherein the fluid is MR-fluid") == ["brake", "fluid", "mr", "fluid"]
+
+
+def test_search_ranks_by_bm25(index):
+    results = index.search("magnetic fluid brake", max_results=3)
+    assert [r["patent_number"] for r in results][0] == "100"
+    assert {r["patent_number"] for r in results} == {"100", "200", "400"}
+    assert results[0]["patent_abstract"].startswith("A brake whose fluid")
+
+
+def test_search_respects_max_results_and_unknown_terms(index):
+    assert len(index.search("brake", max_results=1)) == 1
+    assert index.search("quantum teleportation") == []
+
+
+def test_search_before_date_skips_later_patents(index):
+    results = index.search("brake", max_results=3, before="2019-01-01")
+    assert {r["patent_number"] for r in results} == {"100", "200"}
+
+
+def test_patent_search_uses_the_local_backend(index, monkeypatch):
+    monkeypatch.setenv("PATENT_SEARCH_BACKEND", "local")
+    monkeypatch.setattr(patent_tools, "get_local_index", lambda: index)
+    results = patent_tools.patent_search("solar panel rail", max_results=2)
+    assert results[0].patent_number == "300"
+    assert results[0].url == "https://patents.google.com/patent/US300"
+
+
+def test_spilled_chunks_build_the_same_index(dumps, index, tmp_path):
+    # A chunk is spilled after every couple of postings, so the merge combines many of them
+    out = tmp_path / "chunked"
+    build_index(dumps, str(out), chunk_postings=2)
+    chunked = LocalPatentIndex(str(out))
+    assert chunked.num_terms == index.num_terms
+    for query in ("magnetic fluid brake", "brake", "solar panel rail"):
+        assert chunked.search(query, max_results=4) == index.search(query, max_results=4)
+    # Nothing but the index files is left behind
+    assert not [p for p in out.iterdir() if p.is_dir()]
+
+
+def test_term_table_lookup(index):
+    offset, df = index.lookup("brake")
+    assert df == 3
+    assert sorted(int(d) for d in index._post_docs[offset:offset + df]) == [0, 1, 3]
+    assert index.lookup("aaaa") is None and index.lookup("zzzz") is None
@@ -0,0 +1,65 @@
+# tests/test_memory.py
+import json
+
+from src.agent.memory.memory import AgentMemory
+from src.agent.utils.tokens import estimate_tokens
+
+
+def _observation(count):
+    patents = [
+        {"patent_number": str(i), "publication_date": "2010-01-01", "title": f"Brake {i}", "abstract": "A brake. " * 40}
+        for i in range(count)
+    ]
+    return f"Observation: Tool `search` returned: {json.dumps(patents)}"
+
+
+def test_unbounded_memory_keeps_every_entry_verbatim():
+    memory = AgentMemory()
+    entries = ["LLM Response:\n" + "x" * 2000, _observation(5)]
+    for entry in entries:
+        memory.add_entry(entry)
+    assert memory.get_history() == "\n".join(entries)
+    assert memory.token_count() == estimate_tokens("\n".join(entries))
+
+
+def test_history_is_compacted_under_the_token_budget():
+    memory = AgentMemory(max_tokens=600, keep_recent=2, summary_chars=100)
+    for i in range(6):
+        memory.add_entry(f"LLM Response {i}:\n" + "thinking " * 100)
+    assert memory.token_count() <= 600
+    # Older entries are truncated, the most recent ones are kept whole
+    history = memory._history
+    assert history[0].endswith(" ...[truncated]") and len(history[0]) == 100 + len(" ...[truncated]")
+    assert history[-2:] == [f"LLM Response {i}:\n" + "thinking " * 100 for i in (4, 5)]
+    assert memory.get_history() == "\n".join(history)
+
+
+def test_recent_entries_are_kept_even_over_budget():
+    memory = AgentMemory(max_tokens=10, keep_recent=3)
+    entries = [f"entry {i} " + "word " * 50 for i in range(3)]
+    for entry in entries:
+        memory.add_entry(entry)
+    assert memory.token_count() > 10
+    assert memory.get_history() == "\n".join(entries)
+
+
+def test_search_observations_become_patent_stubs():
+    memory = AgentMemory(max_tokens=200, keep_recent=1)
+    memory.add_entry(_observation(3))
+    memory.add_entry("LLM Response:\nAction: final_report()")
+    stub = memory._history[0]
+    assert stub == (
+        "Observation: Tool `search` returned: 3 patents: "
+        "0 (2010-01-01) Brake 0; 1 (2010-01-01) Brake 1; 2 (2010-01-01) Brake 2"
+    )
+    assert "A brake." not in memory.get_history()
+
+
+def test_compacted_entries_are_not_summarized_again():
+    memory = AgentMemory(max_tokens=300, keep_recent=1, summary_chars=50)
+    memory.add_entry(_observation(2))
+    memory.add_entry("x" * 2000)
+    first = memory._history[0]
+    memory.add_entry("y" * 2000)
+    assert memory._history[0] == first
+    assert memory._compacted_upto == 2
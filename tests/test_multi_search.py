@@ -0,0 +1,79 @@
+# tests/test_multi_search.py
+import asyncio
+import threading
+import time
+
+from src.agent.tools import patent_tools
+from src.agent.tools.patent_record import PatentRecord
+
+
+def _numbers(results):
+    return [p.get("patent_number") for p in results]
+
+
+def test_merge_ranks_by_hits_then_best_position():
+    a, b, c, d = (PatentRecord(n, f"Patent {n}") for n in "abcd")
+    merged = patent_tools._merge_results([
+        [a, b, c],
+        [d, c],
+        "No patents found for this query on PatentsView.",  # Failed searches are skipped
+        [c, b],
+    ])
+    # c is found by all three queries, b by two; a and d once each, a at a better position
+    assert _numbers(merged) == ["c", "b", "a", "d"]
+
+
+def test_merge_keeps_the_first_copy_of_a_patent():
+    first = {"patent_number": "1", "title": "First copy"}
+    merged = patent_tools._merge_results([[first], [{"patent_number": "1", "title": "Second copy"}]])
+    assert merged == [first]
+
+
+def test_multi_search_dedupes_queries_and_results(patentsview):
+    results = patent_tools.multi_search(["brake", "clutch", "brake", "  "], max_results=3, refresh=True)
+    # Every query finds patents 1-3: two requests, three unique patents in rank order
+    assert patentsview.calls == 2
+    assert _numbers(results) == ["1", "2", "3"]
+
+
+def test_multi_search_without_queries():
+    assert patent_tools.multi_search(["", " "]).startswith("Error")
+    assert asyncio.run(patent_tools.amulti_search([])).startswith("Error")
+
+
+def test_multi_search_bounds_concurrent_searches(patentsview):
+    lock, active, peak = threading.Lock(), [0], [0]
+    search = patentsview.search_patents
+
+    def slow_search(*args, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return search(*args, **kwargs)
+
+    patentsview.search_patents = slow_search
+    patent_tools.multi_search([f"query {i}" for i in range(6)], max_results=2, max_concurrency=2, refresh=True)
+    assert peak[0] == 2
+
+
+def test_amulti_search_bounds_concurrent_searches(patentsview):
+    active, peak = [0], [0]
+    search = patentsview.search_patents
+
+    async def slow_search(*args, **kwargs):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.05)
+        active[0] -= 1
+        return search(*args, **kwargs)
+
+    patentsview.asearch_patents = slow_search
+    results = asyncio.run(patent_tools.amulti_search(
+        [f"query {i}" for i in range(6)], max_results=2, max_concurrency=3, refresh=True,
+    ))
+    assert peak[0] == 3
+    assert patentsview.calls == 6
+    assert _numbers(results) == ["1", "2"]
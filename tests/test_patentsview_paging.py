@@ -0,0 +1,91 @@
+# tests/test_patentsview_paging.py
+import asyncio
+
+import pytest
+
+from src.agent.tools.patentsview_client import MAX_PAGE_SIZE, PatentsViewClient, _Pager
+
+
+def _page(*numbers):
+    return {"patents": [{"patent_number": str(n)} for n in numbers]}
+
+
+class PagingClient(PatentsViewClient):
+    """Serves `total` patents numbered from 1, honoring the size and after options."""
+
+    def __init__(self, total):
+        super().__init__(api_key="test-key")
+        self.total = total
+        self.requests = []
+
+    def search_patents(self, query, fields, options, sort=None):
+        self.requests.append((options, sort))
+        after = int(options.get("after", 0))
+        return _page(*range(after + 1, min(after + options["size"], self.total) + 1))
+
+    async def asearch_patents(self, query, fields, options, sort=None):
+        return self.search_patents(query, fields, options, sort)
+
+
+def test_single_page_limit_sends_no_sort():
+    pager = _Pager(["patent_title"], page_size=100, limit=25, sort_field="patent_number")
+    assert (pager.fields, pager.sort, pager.first_size) == (["patent_title"], None, 25)
+    assert pager.take(_page(*range(1, 26))) == (_page(*range(1, 26))["patents"], None)
+
+
+def test_paged_limit_sorts_by_the_cursor_field():
+    pager = _Pager(["patent_title"], page_size=10, limit=25, sort_field="patent_number")
+    assert pager.fields == ["patent_title", "patent_number"]
+    assert pager.sort == [{"patent_number": "asc"}]
+    assert pager.first_size == 10
+
+    assert pager.take(_page(*range(1, 11)))[1] == ("10", 10)
+    assert pager.take(_page(*range(11, 21)))[1] == ("20", 5)  # Only 5 left to fetch
+    patents, cursor = pager.take(_page(*range(21, 26)))
+    assert (len(patents), cursor) == (5, None)
+
+
+def test_take_stops_on_a_short_or_empty_page():
+    pager = _Pager([], page_size=10, limit=None, sort_field="patent_number")
+    assert pager.sort == [{"patent_number": "asc"}]
+    assert pager.take(_page(*range(1, 11)))[1] == ("10", 10)
+    assert pager.take(_page(11, 12))[1] is None
+    assert pager.take({"patents": None}) == ([], None)
+
+
+def test_take_trims_a_page_longer_than_the_limit():
+    pager = _Pager([], page_size=10, limit=15, sort_field="patent_number")
+    pager.take(_page(*range(1, 11)))
+    patents, cursor = pager.take(_page(*range(11, 21)))  # The API ignored the requested size
+    assert ([p["patent_number"] for p in patents], cursor) == (["11", "12", "13", "14", "15"], None)
+
+
+@pytest.mark.parametrize("page_size, expected", [(0, 1), (50, 50), (MAX_PAGE_SIZE * 5, MAX_PAGE_SIZE)])
+def test_page_size_is_clamped(page_size, expected):
+    assert _Pager([], page_size, limit=None, sort_field="patent_number").first_size == expected
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_patents_follows_the_cursor(prefetch):
+    client = PagingClient(total=23)
+    numbers = [p["patent_number"] for p in client.iter_patents({}, [], page_size=10, prefetch=prefetch)]
+    assert numbers == [str(n) for n in range(1, 24)]
+    assert [options for options, _ in client.requests] == [{"size": 10}, {"size": 10, "after": "10"}, {"size": 10, "after": "20"}]
+
+
+def test_iter_patents_stops_paging_when_closed():
+    client = PagingClient(total=1000)
+    patents = client.iter_patents({}, [], page_size=10, prefetch=False)
+    assert [next(patents)["patent_number"] for _ in range(10)] == [str(n) for n in range(1, 11)]
+    patents.close()
+    assert len(client.requests) == 1
+
+
+def test_aiter_patents_honors_the_limit():
+    client = PagingClient(total=1000)
+
+    async def collect():
+        return [p["patent_number"] async for p in client.aiter_patents({}, [], page_size=10, limit=15)]
+
+    assert asyncio.run(collect()) == [str(n) for n in range(1, 16)]
+    assert [options for options, _ in client.requests] == [{"size": 10}, {"size": 5, "after": "10"}]
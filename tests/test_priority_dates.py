@@ -0,0 +1,107 @@
+# tests/test_priority_dates.py
+import pytest
+
+from src.agent.cache.search_cache import SearchCache, set_search_cache
+from src.agent.tools import patent_tools
+from src.agent.tools.local_index import LocalPatentIndex, build_index
+from src.agent.tools.patentsview_client import PatentsViewClient, set_patentsview_client
+from src.agent.utils.dates import before_priority_date, parse_date, parse_priority_date
+
+DATES = {"1": "2019-03-13", "2": "2019-03-14", "3": "2019-03-15", "4": None}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2019-03-14", "2019-03-14"),
+    ("2019/03/14", "2019-03-14"),
+    ("03/14/2019", "2019-03-14"),
+    ("March 14, 2019", "2019-03-14"),
+    ("Mar. 14 2019", "2019-03-14"),
+    ("14 March 2019", "2019-03-14"),
+    ("March 2019", None),  # Partial dates are not guessed
+    ("2019", None),
+    ("2019-02-30", None),  # Not a calendar date
+    ("soon", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_date(text, expected):
+    assert parse_date(text) == expected
+
+
+@pytest.mark.parametrize("disclosure, expected", [
+    ("Title: Brake\nPriority Date: 2019-03-14\nClaim 1: ...", "2019-03-14"),
+    ("priority date - March 14, 2019 (US provisional)", "2019-03-14"),
+    ("Priority Date: 14 Mar 2019, filed in Germany", "2019-03-14"),
+    ("Priority Date: March 2019", None),
+    ("Priority Date: TBD", None),
+    ("Claim 1: a brake.", None),
+    (None, None),
+])
+def test_parse_priority_date(disclosure, expected):
+    assert parse_priority_date(disclosure) == expected
+
+
+def test_before_priority_date_excludes_the_same_day_and_undated():
+    patents = [{"patent_number": n, "publication_date": d} for n, d in DATES.items()]
+    assert [p["patent_number"] for p in before_priority_date(patents, "2019-03-14")] == ["1"]
+    assert before_priority_date(patents, None) is patents
+
+
+class DatedClient(PatentsViewClient):
+    """Answers with patents dated around the priority date, ignoring the date filter it receives."""
+
+    def __init__(self):
+        super().__init__(api_key="test-key")
+        self.queries = []
+
+    def search_patents(self, query, fields, options, sort=None):
+        self.queries.append(query)
+        return {"patents": [
+            {"patent_number": n, "patent_title": f"Brake {n}", "patent_date": d, "patent_abstract": "A brake."}
+            for n, d in DATES.items()
+        ]}
+
+
+@pytest.fixture
+def dated_client():
+    client = DatedClient()
+    set_patentsview_client(client)
+    set_search_cache(SearchCache(db_path=None))
+    yield client
+    set_patentsview_client(None)
+    set_search_cache(None)
+
+
+def test_api_search_filters_by_priority_date(dated_client):
+    results = patent_tools.patent_search("brake", max_results=4, priority_date="2019-03-14")
+    assert [p.patent_number for p in results] == ["1"]
+    assert dated_client.queries[0]["_and"][1] == {"_lt": {"patent_date": "2019-03-14"}}
+
+
+def test_dated_searches_are_cached_apart(dated_client):
+    # Results cached without a priority date never answer a dated search
+    patent_tools.patent_search("brake", max_results=4)
+    results = patent_tools.patent_search("brake", max_results=4, priority_date="2019-03-15")
+    assert [p.patent_number for p in results] == ["1", "2"]
+    assert len(dated_client.queries) == 2
+    # A repeat of the dated search is served, still filtered, from the cache
+    again = patent_tools.patent_search("brake", max_results=4, priority_date="2019-03-15")
+    assert [p.patent_number for p in again] == ["1", "2"]
+    assert len(dated_client.queries) == 2
+
+
+def test_local_search_filters_by_priority_date(tmp_path, monkeypatch):
+    dump = tmp_path / "g_patent.tsv"
+    dump.write_text(
+        "patent_id\tpatent_title\tpatent_date\n"
+        + "".join(f"{n}\tMagnetic brake {n}\t{d or ''}\n" for n, d in DATES.items()),
+        encoding="utf-8",
+    )
+    build_index([str(dump)], str(tmp_path / "index"))
+    index = LocalPatentIndex(str(tmp_path / "index"))
+    monkeypatch.setenv("PATENT_SEARCH_BACKEND", "local")
+    monkeypatch.setattr(patent_tools, "get_local_index", lambda: index)
+
+    results = patent_tools.patent_search("magnetic brake", max_results=4, priority_date="2019-03-14")
+    assert [p.patent_number for p in results] == ["1"]
+    assert len(patent_tools.patent_search("magnetic brake", max_results=4)) == 4
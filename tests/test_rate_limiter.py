@@ -0,0 +1,107 @@
+# tests/test_rate_limiter.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.agent.limits.rate_limiter import RateLimitedModel, RateLimiter, TokenBucket
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(60, period=60.0)  # One token per second
+    now = bucket.updated
+    assert bucket.wait_time(60, now) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1, now) == 1.0
+    assert bucket.wait_time(1, now + 0.5) == 0.5
+    assert bucket.wait_time(1, now + 1.0) == 0
+    # Never refilled beyond its capacity
+    assert bucket.wait_time(60, now + 3600) == 0 and bucket.tokens == 60
+
+
+def test_token_bucket_oversized_request_waits_for_a_full_bucket():
+    bucket = TokenBucket(10, period=10.0)
+    now = bucket.updated
+    assert bucket.wait_time(1000, now) == 0
+    bucket.consume(1000)  # The debt delays later callers
+    assert bucket.wait_time(1, now) == 991.0
+
+
+def test_limiter_caps_calls_in_flight():
+    limiter = RateLimiter("test", max_in_flight=2)
+    lock = threading.Lock()
+    active = peak = 0
+
+    def call():
+        nonlocal active, peak
+        with limiter.limit():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+    metrics = limiter.metrics()
+    assert (metrics["acquired_total"], metrics["in_flight"], metrics["queue_depth"]) == (6, 0, 0)
+    assert metrics["wait_seconds_max"] > 0
+
+
+def test_limiter_queues_requests_over_the_rate():
+    limiter = RateLimiter("test", requests_per_minute=600)  # 10 per second after the burst
+    for _ in range(600):
+        limiter.acquire()
+        limiter.release()
+    start = time.monotonic()
+    with limiter.limit():
+        pass
+    assert time.monotonic() - start >= 0.05
+
+
+def test_async_limiter_caps_calls_in_flight():
+    limiter = RateLimiter("test", max_in_flight=1)
+    active = peak = 0
+
+    async def call():
+        nonlocal active, peak
+        async with limiter.alimit():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(4)))
+
+    asyncio.run(main())
+    assert peak == 1
+    assert limiter.metrics()["acquired_total"] == 4
+
+
+def test_from_env_overrides_defaults(monkeypatch):
+    monkeypatch.setenv("TESTAPI_RPM", "120")
+    monkeypatch.setenv("TESTAPI_MAX_IN_FLIGHT", "0")
+    limiter = RateLimiter.from_env("testapi", requests_per_minute=45, tokens_per_minute=1000, max_in_flight=8)
+    assert limiter._requests.capacity == 120
+    assert limiter._tokens.capacity == 1000
+    assert limiter.max_in_flight is None  # 0 means unlimited
+
+
+def test_limited_model_charges_prompt_and_response_tokens():
+    class Model:
+        def generate_content(self, prompt, **kwargs):
+            return type("Response", (), {"text": "x" * 400, "usage_metadata": None})()
+
+    limiter = RateLimiter("test", tokens_per_minute=10_000)
+    model = RateLimitedModel(Model(), limiter=limiter)
+    model.generate_content("y" * 400)
+    # 100 estimated tokens for the prompt and 100 for the response, less a few ms of refill
+    assert limiter._tokens.tokens == pytest.approx(10_000 - 200, abs=5)
+    assert limiter.metrics()["in_flight"] == 0
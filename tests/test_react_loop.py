@@ -0,0 +1,98 @@
+# tests/test_react_loop.py
+import pytest
+
+from src.agent.graph.patent_graph import END, next_node, route_after_llm, route_after_search, route_entry
+from src.agent.memory.memory import AgentMemory
+from src.agent.nodes.llm_node import INVALID_ACTION, NO_RESULTS_GUARDRAIL, _apply_response, parse_action
+
+PATENT = {"patent_number": "1", "title": "Brake"}
+
+
+def _config():
+    return {"configurable": {"memory": AgentMemory(max_tokens=0)}}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('Thought: search.\nAction: search("magnetic brake")', ("search", "magnetic brake")),
+    ("**Action:** `search('mr fluid')`", ("search", "mr fluid")),
+    ('Action: search("first")\nThought: better.\nAction: search("second")', ("search", "second")),
+    ("Action: final_report()", ("final_report", None)),
+    ("Thought: I am done.", (None, None)),
+    ("Action: search(unclosed", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_action(text, expected):
+    assert parse_action(text) == expected
+
+
+def test_malformed_action_falls_back_to_another_planning_step():
+    state = _apply_response({}, _config(), "Action: lookup(magnetic brake)")
+    assert (state["action"], state["tool_input"], state["iteration"]) == (None, None, 1)
+    assert state["history"][-1] == INVALID_ACTION
+    # A search without a query is not usable either
+    state = _apply_response(state, _config(), "Action: search()")
+    assert (state["action"], state["iteration"]) == (None, 2)
+    assert state["history"][-1] == INVALID_ACTION
+    assert route_after_llm({**state, "max_iterations": 5}) == "llm"
+
+
+def test_report_before_any_prior_art_is_refused():
+    state = _apply_response({}, _config(), "Action: final_report()")
+    assert state["action"] is None
+    assert state["history"][-1] == NO_RESULTS_GUARDRAIL
+
+    state = _apply_response({"search_results": [PATENT]}, _config(), "Action: final_report()")
+    assert state["action"] == "final_report"
+    assert state["history"][-1] != NO_RESULTS_GUARDRAIL
+
+
+def test_search_action_sets_the_query():
+    state = _apply_response({}, _config(), 'Action: search("magnetic brake")')
+    assert (state["action"], state["tool_input"]) == ("search", "magnetic brake")
+    assert route_after_llm(state) == "search"
+
+
+@pytest.mark.parametrize("state, expected", [
+    ({}, "llm"),
+    ({"search_queries": ["a", "b"]}, "multi_search"),
+    ({"search_queries": ["a"], "resume_at": "final_report"}, "final_report"),
+])
+def test_route_entry(state, expected):
+    assert route_entry(state) == expected
+
+
+@pytest.mark.parametrize("state, expected", [
+    ({"action": "search", "iteration": 5, "max_iterations": 5}, "search"),
+    ({"action": "final_report", "search_results": [PATENT]}, "final_report"),
+    ({"action": None, "iteration": 2, "max_iterations": 5}, "llm"),
+    # Out of iterations without a usable action: report what was found, or end without a report
+    ({"action": None, "iteration": 5, "max_iterations": 5, "search_results": [PATENT]}, "final_report"),
+    ({"action": None, "iteration": 5, "max_iterations": 5}, END),
+])
+def test_route_after_llm(state, expected):
+    assert route_after_llm(state) == expected
+
+
+def test_route_after_search_stops_at_enough_patents(monkeypatch):
+    monkeypatch.setenv("AGENT_ENOUGH_PATENTS", "2")
+    state = {"iteration": 1, "max_iterations": 5, "search_results": [PATENT]}
+    assert route_after_search(state) == "llm"
+    state["search_results"] = [PATENT, {"patent_number": "2"}]
+    assert route_after_search(state) == "final_report"
+
+
+def test_route_after_search_stops_at_the_iteration_cap(monkeypatch):
+    monkeypatch.setenv("AGENT_ENOUGH_PATENTS", "10")
+    assert route_after_search({"iteration": 5, "max_iterations": 5, "search_results": [PATENT]}) == "final_report"
+    assert route_after_search({"iteration": 5, "max_iterations": 5, "search_results": []}) == END
+    assert route_after_search({"iteration": 4, "max_iterations": 5, "search_results": []}) == "llm"
+
+
+def test_next_node_mirrors_the_edges(monkeypatch):
+    monkeypatch.setenv("AGENT_ENOUGH_PATENTS", "1")
+    assert next_node("llm", {"action": "search"}) == "search"
+    assert next_node("search", {"search_results": [PATENT]}) == "final_report"
+    assert next_node("multi_search", {"search_results": [], "iteration": 0, "max_iterations": 5}) == "llm"
+    assert next_node("search", {"search_results": [], "iteration": 5, "max_iterations": 5}) is None
+    assert next_node("final_report", {"final_report": "done"}) is None
@@ -0,0 +1,83 @@
+# tests/test_report_builder.py
+import logging
+
+from src.agent.prompts.react_prompts import FINAL_REPORT_PROMPT
+from src.agent.prompts.report_builder import _terms, build_report_prompt, format_reference, key_sentences
+from src.agent.tools import patent_tools
+from src.agent.tools.patent_record import PatentRecord
+from src.agent.utils.tokens import estimate_tokens
+
+
+def test_records_and_dicts_build_the_same_prompt():
+    record = PatentRecord("123", "Brake pad", "2019-01-01", "A brake pad with a wear sensor.")
+    from_records = build_report_prompt("A braking system.", [record], max_tokens=0)
+    from_dicts = build_report_prompt("A braking system.", [record.to_dict()], max_tokens=0)
+    assert from_records == from_dicts
+    assert "[1] US 123 (2019-01-01): Brake pad" in from_records.text
+
+
+def test_final_report_takes_patent_search_results(patentsview):
+    class Model:
+        def generate_content(self, prompt):
+            self.prompt = prompt
+            return type("Response", (), {"text": "report"})()
+
+    model = Model()
+    results = patent_tools.patent_search("brake wear sensor", max_results=2, refresh=True)
+    assert isinstance(results[0], PatentRecord)
+    assert patent_tools.final_report(model, "A braking system.", results) == "report"
+    assert "[2] US 2 (2010-01-01): Patent 2" in model.prompt
+
+
+def _patents(count):
+    return [
+        {"patent_number": str(i), "title": f"Patent {i}", "publication_date": "2010-01-01", "abstract": f"A brake number {i}."}
+        for i in range(1, count + 1)
+    ]
+
+
+def _budget_for(invention, patents, keep):
+    # The token budget that fits exactly the first `keep` references (each counts one separator token)
+    fixed = estimate_tokens(FINAL_REPORT_PROMPT.format(invention_text=invention, search_results=""))
+    terms = _terms(invention)
+    return fixed + sum(estimate_tokens(format_reference(i, p, terms, 600)) + 1 for i, p in enumerate(patents[:keep], 1))
+
+
+def test_lowest_ranked_references_are_dropped_to_fit_the_budget(caplog):
+    patents = _patents(5)
+    budget = _budget_for("A braking system.", patents, keep=2)
+    with caplog.at_level(logging.WARNING):
+        prompt = build_report_prompt("A braking system.", patents, max_tokens=budget, abstract_chars=600)
+    assert (prompt.references, prompt.dropped) == (2, 3)
+    assert "[1] US 1" in prompt.text and "[2] US 2" in prompt.text and "US 3" not in prompt.text
+    assert prompt.tokens <= budget
+    assert "dropped 3 of 5 references" in caplog.text
+
+
+def test_everything_is_kept_within_the_budget(caplog):
+    patents = _patents(5)
+    with caplog.at_level(logging.WARNING):
+        prompt = build_report_prompt("A braking system.", patents, max_tokens=_budget_for("A braking system.", patents, 5))
+    assert (prompt.references, prompt.dropped) == (5, 0)
+    assert not caplog.records
+
+
+def test_the_disclosure_is_never_cut(caplog):
+    invention = "Claim 1: a brake comprising " + "a magnetorheological fluid chamber, " * 400 + "and a coil."
+    with caplog.at_level(logging.WARNING):
+        prompt = build_report_prompt(invention, _patents(3), max_tokens=100)
+    assert invention in prompt.text
+    # At least one reference is always sent, over budget if need be
+    assert (prompt.references, prompt.dropped) == (1, 2)
+    assert "dropped 2 of 3 references" in caplog.text
+    assert "exceeds its 100-token budget even with one reference" in caplog.text
+
+
+def test_key_sentences_keeps_the_first_and_the_most_relevant_sentences():
+    abstract = "A vehicle part is described. It has a cup holder. The brake uses magnetorheological fluid. It is blue."
+    terms = _terms("magnetorheological fluid brake")
+    assert key_sentences(abstract, terms, 1000) == abstract
+    assert key_sentences(abstract, terms, 80) == "A vehicle part is described. The brake uses magnetorheological fluid."
+    # An overlong first sentence is cut at a word boundary
+    short = key_sentences("A very long first sentence about brakes and fluids.", terms, 30)
+    assert len(short) <= 30 and short.endswith("...[truncated]")
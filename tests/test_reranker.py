@@ -0,0 +1,93 @@
+# tests/test_reranker.py
+import multiprocessing
+
+import numpy as np
+
+from src.agent.tools.reranker import EmbeddingStore, HashingEmbedder, Reranker
+
+PATENTS = [
+    {"patent_number": "1", "title": "Solar panel mounting rail", "abstract": "A rail for roof-mounted solar panels."},
+    {"patent_number": "2", "title": "Magnetorheological bicycle brake", "abstract": "Brake fluid stiffens in a magnetic field."},
+    {"patent_number": "3", "title": "Bicycle brake lever", "abstract": "A lever for rim brakes on bicycles."},
+]
+
+
+def _vectors(values, dim=4):
+    return np.array([[v] * dim for v in values], dtype=np.float32)
+
+
+def test_store_returns_added_vectors_and_skips_known_keys(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=4)
+    store.add(["a", "b"], _vectors([1, 2]))
+    store.add(["b", "c", "c"], _vectors([9, 3, 3]))
+    assert len(store) == 3
+
+    rows, missing = store.lookup(["c", "x", "a"])
+    assert missing == ["x"]
+    assert rows[1] == -1
+    np.testing.assert_array_equal(store.vectors(rows[[0, 2]])[:, 0], [3, 1])
+
+
+def test_store_persists_and_drops_a_torn_write(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=4)
+    store.add(["a", "b"], _vectors([1, 2]))
+    # A crash after writing a key but before its vector
+    with open(tmp_path / "keys.txt", "a", encoding="utf-8") as f:
+        f.write("c\n")
+
+    reopened = EmbeddingStore(str(tmp_path), dim=4)
+    assert len(reopened) == 2
+    assert reopened.lookup(["c"])[1] == ["c"]
+    assert (tmp_path / "keys.txt").read_text(encoding="utf-8") == "a\nb\n"
+    reopened.add(["c"], _vectors([3]))
+    np.testing.assert_array_equal(reopened.vectors(reopened.lookup(["a", "b", "c"])[0])[:, 0], [1, 2, 3])
+
+
+def test_store_sees_rows_added_by_another_instance(tmp_path):
+    first = EmbeddingStore(str(tmp_path), dim=4)
+    second = EmbeddingStore(str(tmp_path), dim=4)
+    first.add(["a"], _vectors([1]))
+    # Before appending, the second store catches up instead of overwriting row 0
+    second.add(["a", "b"], _vectors([7, 2]))
+    assert len(second) == 2
+    np.testing.assert_array_equal(second.vectors(second.lookup(["a", "b"])[0])[:, 0], [1, 2])
+
+
+def _add_keys(directory, worker):
+    store = EmbeddingStore(directory, dim=4)
+    for i in range(40):
+        keys = [f"k{(worker * 7 + i * 3 + j) % 120}" for j in range(4)]
+        _, missing = store.lookup(keys)
+        store.add(missing, _vectors([int(k[1:]) for k in missing]))
+
+
+def test_store_shared_by_processes_stays_consistent(tmp_path):
+    processes = [multiprocessing.Process(target=_add_keys, args=(str(tmp_path), w)) for w in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    store = EmbeddingStore(str(tmp_path), dim=4)
+    keys = (tmp_path / "keys.txt").read_text(encoding="utf-8").split()
+    assert len(keys) == len(set(keys)) == len(store)
+    # Every row holds the vector written for its key
+    np.testing.assert_array_equal(store.vectors(store.lookup(keys)[0])[:, 0], [int(k[1:]) for k in keys])
+
+
+def test_rerank_orders_by_similarity_and_caches_embeddings(tmp_path):
+    embedder = HashingEmbedder(dim=64)
+    reranker = Reranker(embedder, EmbeddingStore(str(tmp_path), embedder.dim))
+    ranked = reranker.rerank("magnetorheological fluid bicycle brake", PATENTS, top_k=2)
+    assert [p["patent_number"] for p in ranked] == ["2", "3"]
+    assert len(reranker.store) == 3
+
+    # Cached vectors give the same ranking as embedding from scratch
+    uncached = Reranker(embedder).rerank("magnetorheological fluid bicycle brake", PATENTS, top_k=2)
+    assert uncached == ranked
+
+
+def test_rerank_min_score_drops_unrelated_candidates():
+    ranked = Reranker(HashingEmbedder(dim=64)).rerank("bicycle brake", PATENTS, top_k=3, min_score=0.1)
+    assert "1" not in [p["patent_number"] for p in ranked]
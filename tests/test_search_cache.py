@@ -0,0 +1,104 @@
+# tests/test_search_cache.py
+import asyncio
+import threading
+
+import pytest
+
+from src.agent.cache.search_cache import SearchCache, set_search_cache
+from src.agent.cache.tiered_cache import TieredCache
+from src.agent.tools import patent_tools
+
+
+@pytest.fixture
+def search_cache():
+    cache = SearchCache(db_path=None)
+    set_search_cache(cache)
+    yield cache
+    set_search_cache(None)
+
+
+def test_tiered_cache_memory_and_disk_hits(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = TieredCache("t", db_path=path)
+    cache.set("k", {"a": 1})
+    assert cache.get("k") == {"a": 1}
+    assert cache.stats()["memory_hits"] == 1
+    cache.close()
+
+    # A new instance starts with an empty memory tier and finds the entry on disk
+    reopened = TieredCache("t", db_path=path)
+    assert reopened.get("k") == {"a": 1}
+    assert reopened.get("k") == {"a": 1}
+    stats = reopened.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+    reopened.close()
+
+
+def test_tiered_cache_expired_entries_miss(tmp_path):
+    cache = TieredCache("t", db_path=str(tmp_path / "cache.db"), ttl=3600)
+    cache.set("old", "value", ttl=0)
+    cache.set("fresh", "value")
+    assert cache.get("old") is None
+    assert cache.get("fresh") == "value"
+    assert cache.stats()["misses"] == 1
+    # The expired row is deleted on lookup
+    assert cache.stats()["disk_entries"] == 1
+    cache.close()
+
+
+def test_tiered_cache_evicts_least_recently_used():
+    cache = TieredCache("t", max_memory_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_patent_search_is_served_from_cache(patentsview, search_cache):
+    first = patent_tools.patent_search("magnetic brake", max_results=3)
+    second = patent_tools.patent_search("  Magnetic   brake ", max_results=3)
+    assert patentsview.calls == 1
+    assert [p.patent_number for p in second] == [p.patent_number for p in first] == ["1", "2", "3"]
+    assert search_cache.stats()["hits"] == 1
+
+
+def test_patent_search_refresh_bypasses_cache(patentsview, search_cache):
+    patent_tools.patent_search("magnetic brake", max_results=3)
+    patent_tools.patent_search("magnetic brake", max_results=3, refresh=True)
+    assert patentsview.calls == 2
+
+
+def test_patent_search_refetches_expired_results(patentsview):
+    set_search_cache(SearchCache(db_path=None, ttl=0))
+    try:
+        patent_tools.patent_search("magnetic brake", max_results=3)
+        patent_tools.patent_search("magnetic brake", max_results=3)
+    finally:
+        set_search_cache(None)
+    assert patentsview.calls == 2
+
+
+def test_apatent_search_uses_the_cache_off_the_event_loop(patentsview):
+    threads = []
+
+    class RecordingCache(SearchCache):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+        def set(self, key, value):
+            threads.append(threading.current_thread())
+            return super().set(key, value)
+
+    set_search_cache(RecordingCache(db_path=None))
+    try:
+        asyncio.run(patent_tools.apatent_search("magnetic brake", max_results=3))
+        results = asyncio.run(patent_tools.apatent_search("magnetic brake", max_results=3))
+    finally:
+        set_search_cache(None)
+    assert [p.patent_number for p in results] == ["1", "2", "3"]
+    assert patentsview.calls == 1
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads